@@ -0,0 +1,70 @@
+import streamlit as st
+
+from utils.data import get_resume_etablissements
+from utils.resume import CARACTERISTIQUES, INDICATEURS_RESUME
+
+TYPES = {'Tous': None, 'Collèges': 'COLLEGE', 'Lycées': 'LYCEE'}
+ORDRES = {'Décroissant': False, 'Croissant': True}
+
+def classement_page():
+    st.title("🏆 Classement des établissements")
+    st.markdown("Établissements classés selon leur secteur de recrutement (communes, voies, départements, "
+                "recrutement hors région), leur effectif ou leur IPS.")
+
+    # Une ligne par établissement, calculée à l'ingestion : la page ne relit jamais les règles
+    resume = get_resume_etablissements()
+    if resume is None:
+        return
+
+    # L'IPS (export brut) et l'effectif (annuaire) ne sont proposés que s'ils sont renseignés dans la version
+    indicateurs = {
+        libelle: colonne for colonne, libelle in INDICATEURS_RESUME.items() if resume[colonne].notna().any()
+    }
+    col_type, col_indicateur, col_ordre = st.columns(3)
+    with col_type:
+        type_etablissement = TYPES[st.radio("Type d'établissement", options=list(TYPES), horizontal=True)]
+    with col_indicateur:
+        indicateur = indicateurs[st.selectbox("Classer par", options=list(indicateurs))]
+    with col_ordre:
+        croissant = ORDRES[st.radio("Ordre", options=list(ORDRES), horizontal=True)]
+
+    col_departements, col_caracteristiques = st.columns(2)
+    with col_departements:
+        departements = st.multiselect("Départements", options=sorted(resume['libelle_departement'].dropna().unique()))
+    with col_caracteristiques:
+        libelles = {libelle: colonne.lower() for colonne, libelle in CARACTERISTIQUES.items() if colonne.lower() in resume.columns}
+        caracteristiques = st.multiselect("Caractéristiques", options=list(libelles))
+    hors_region = st.checkbox("Uniquement les établissements qui recrutent hors région")
+    nombre = st.slider("Nombre d'établissements affichés", min_value=10, max_value=200, value=20, step=10)
+
+    selection = resume
+    if type_etablissement:
+        selection = selection[selection['type_etablissement'] == type_etablissement]
+    if departements:
+        selection = selection[selection['libelle_departement'].isin(departements)]
+    for libelle in caracteristiques:
+        selection = selection[selection[libelles[libelle]]]
+    if hors_region:
+        selection = selection[selection['part_hors_region'] > 0]
+    if selection.empty:
+        st.info("Aucun établissement ne correspond à ces critères")
+        return
+
+    classement = selection.sort_values(indicateur, ascending=croissant, na_position='last', kind='stable').head(nombre)
+    st.caption(f"{len(selection)} établissements correspondent aux critères")
+    st.dataframe(
+        classement[['nom_etablissement', 'nom_commune', 'libelle_departement', 'type_etablissement', 'code_rne']
+                   + list(indicateurs.values())],
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            'nom_etablissement': "Établissement",
+            'nom_commune': "Commune",
+            'libelle_departement': "Département",
+            'type_etablissement': "Type",
+            'code_rne': "Code RNE",
+            'part_hors_region': st.column_config.ProgressColumn(INDICATEURS_RESUME['part_hors_region'], min_value=0, max_value=1, format="%.2f"),
+            'ips_etablissement': st.column_config.NumberColumn(INDICATEURS_RESUME['ips_etablissement'], format="%.1f"),
+            **{colonne: INDICATEURS_RESUME[colonne] for colonne in ['nb_communes', 'nb_voies', 'nb_departements', 'nombre_d_eleves']},
+        },
+    )
@@ -0,0 +1,37 @@
+import json
+
+import streamlit as st
+from streamlit_folium import folium_static
+
+from utils.cartes import create_hexagones_map
+from utils.data import get_hexagones
+from utils.hexagones import INDICATEURS_HEXAGONES, NIVEAUX_HEXAGONES, geojson_hexagones
+
+def densite_page():
+    st.title("🗺️ Carte régionale de la sectorisation")
+    st.markdown("Adresses sectorisées, communes sans secteur de collège ou de lycée, établissements et IPS, "
+                "agrégés sur une grille d'hexagones. Les adresses sont placées au centre de leur commune.")
+
+    hexagones = get_hexagones()
+    if hexagones is None:
+        return
+
+    # L'IPS n'est proposé que si la version contient ips_etablissement (export brut)
+    indicateurs = {
+        libelle: colonne for colonne, libelle in INDICATEURS_HEXAGONES.items()
+        if colonne != 'ips_moyen' or hexagones['ips_moyen'].notna().any()
+    }
+    col_indicateur, col_niveau = st.columns(2)
+    with col_indicateur:
+        libelle = st.selectbox("Indicateur", options=list(indicateurs))
+    with col_niveau:
+        niveau = st.radio("Échelle", options=list(NIVEAUX_HEXAGONES), horizontal=True)
+    rayon_km, zoom = NIVEAUX_HEXAGONES[niveau]
+
+    geojson, seuils = geojson_hexagones(hexagones, niveau, indicateurs[libelle])
+    if not geojson['features']:
+        st.info("Aucune cellule pour cet indicateur")
+        return
+    folium_static(create_hexagones_map(geojson, seuils, libelle, zoom), width=1100, height=650)
+    st.caption(f"{len(geojson['features'])} hexagones de {rayon_km:g} km de rayon, "
+               f"{len(json.dumps(geojson)) / 1e3:.0f} ko de GeoJSON")
@@ -0,0 +1,99 @@
+import streamlit as st
+import pandas as pd
+from streamlit_folium import folium_static
+
+from utils.data import get_enveloppe, get_index_etablissements, get_polygones, get_voisins, load_data_annuaire, version_session
+from utils.schema import COLONNES_ANNUAIRE_PERIMETRE
+from utils.api import geocode_addresses
+from utils.cartes import create_address_map
+
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=256)
+def geocoder_perimetre(version, etab_selectionnee, _df_code_rne):
+    """Géocodage des adresses du secteur, mis en cache par version des données et établissement"""
+    return geocode_addresses(_df_code_rne)
+
+def secteurs_voisins(codes_rne, df_etab):
+    """Établissements du même type dont le secteur touche, chevauche ou partage des voies avec celui de l'établissement"""
+    voisins = [get_voisins(code_rne) for code_rne in codes_rne]
+    voisins = [v for v in voisins if v is not None]
+    if not voisins:
+        return
+    voisins = pd.concat(voisins)
+    st.subheader("Secteurs voisins")
+    if voisins.empty:
+        st.caption("Aucun secteur voisin ou chevauchant pour cet établissement")
+        return
+    noms = dict(zip(df_etab['Identifiant_de_l_etablissement'].astype(str), df_etab['Nom_etablissement']))
+    st.dataframe(
+        pd.DataFrame({
+            'Établissement': voisins['voisin'].map(noms).fillna(voisins['voisin']),
+            'Code RNE': voisins['voisin'],
+            'Frontière commune (km)': voisins['frontiere_km'].round(2),
+            'Chevauchement (km²)': voisins['chevauchement_km2'].round(2),
+            'Voies partagées': voisins['voies_partagees'],
+            'Exemples de voies': voisins['exemples_voies'],
+        }).sort_values(['Frontière commune (km)', 'Voies partagées'], ascending=False),
+        hide_index=True,
+    )
+
+def perimetre_page():
+    st.title("Périmètre de recrutement de l'établissement")
+    
+    df_etab, index_etablissements = load_data_annuaire(COLONNES_ANNUAIRE_PERIMETRE), get_index_etablissements()
+    if df_etab is None or index_etablissements is None:
+        st.error("Impossible de charger les données")
+        return
+    
+    # Ajout d'une valeur par défaut pour la ville
+    etab_disponibles = ['Sélectionnez un établissement'] + sorted([str(etabb) for etabb in df_etab['etab_recherche'].unique()])
+    etab_selectionnee = st.selectbox(
+        "Rechercher un étalissement",
+        options=etab_disponibles,
+        index=0,
+        key="etab_search"
+    )
+
+    # Adresses du secteur : tranches de l'index inversé code_rne -> adresses (déjà projetées
+    # et renommées pour le géocodage), sans parcourir la carte scolaire
+    index, adresses = index_etablissements
+    etab = df_etab[df_etab['etab_recherche'] == etab_selectionnee]
+    secteurs = index.reindex(etab['Identifiant_de_l_etablissement'].astype(str).unique()).dropna()
+    df_code_rne = pd.concat(
+        [adresses.iloc[int(secteur.debut):int(secteur.fin)] for secteur in secteurs.itertuples()] or [adresses.iloc[:0]]
+    )
+    if len(secteurs):
+        st.caption(
+            f"Secteur : {int(secteurs['nb_villes'].sum())} ville(s), {int(secteurs['nb_voies'].sum())} voie(s), "
+            f"{int(secteurs['nb_hors_region'].sum())} adresse(s) hors région"
+        )
+        secteurs_voisins(secteurs.index, df_etab)
+
+    # Polygone du secteur (versions produites avec --geometries) : le géocodage des
+    # adresses devient facultatif
+    polygones = next((p for p in (get_polygones(code_rne) for code_rne in secteurs.index) if p), None)
+    # À défaut, aire de recrutement calculée par lot (enveloppe des adresses géocodées)
+    enveloppe = None if polygones else next((e for e in (get_enveloppe(code_rne) for code_rne in secteurs.index) if e), None)
+    if enveloppe:
+        st.caption(
+            f"Aire de recrutement calculée : {enveloppe['surface_km2']:.1f} km², compacité {enveloppe['compacite']:.2f} "
+            f"({enveloppe['points_retenus']} point(s) retenu(s) sur {enveloppe['points']})"
+        )
+    if (polygones or enveloppe) and not st.checkbox("Afficher aussi les adresses du secteur (géocodage BAN)", value=False):
+        st.subheader("Périmètre de recrutement de l'établissement")
+        folium_static(create_address_map(pd.DataFrame(columns=['latitude', 'longitude', 'adresse', 'city']), etab, polygones, enveloppe and enveloppe['geometrie']))
+        return
+
+    results = geocoder_perimetre(version_session(), etab_selectionnee, df_code_rne)
+    if results is not None:
+        st.subheader("Résultats de la recherche : " + str(len(results)) + " adresses/villes trouvées")
+        
+        #DEGUG
+        # st.dataframe(results)
+        # st.dataframe(df_etab[df_etab['etab_recherche'] == etab_selectionnee])
+
+        st.subheader("Périmètre de recrutement de l'établissement")
+        map = create_address_map(results, etab, polygones, enveloppe and enveloppe['geometrie'])
+        folium_static(map)
+    
+    elif etab_selectionnee != 'Sélectionnez un établissement':
+        st.error("Données manquantes pour cet établissement. Essayez avec un autre établissement !")
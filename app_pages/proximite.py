@@ -0,0 +1,85 @@
+import streamlit as st
+from streamlit_folium import folium_static
+
+from utils.data import get_commune_geo, get_index_spatial, get_index_villes, load_data
+from utils.schema import COLONNES_SEARCH
+from utils.spatial import dans_rayon, plus_proches
+from utils.cartes import create_proximite_map
+
+TYPES = {'Collèges et lycées': None, 'Collèges': 'Collège', 'Lycées': 'Lycée'}
+
+def etablissements_proches(index, annuaire, position, type_etablissement, nombre=None, rayon_km=None):
+    """Lignes de l'annuaire les plus proches de position (nombre) ou à moins de rayon_km, avec leur distance"""
+    if type_etablissement not in index:
+        return annuaire.iloc[:0].assign(distance_km=[])
+    if rayon_km is not None:
+        distances, lignes = dans_rayon(index, position[0], position[1], rayon_km, type_etablissement)
+    else:
+        distances, lignes = plus_proches(index, position[0], position[1], nombre, type_etablissement)
+        distances, lignes = distances[lignes >= 0], lignes[lignes >= 0]
+    return annuaire.iloc[lignes].assign(distance_km=distances)
+
+def choisir_position():
+    """Point de départ : centre d'une commune ou coordonnées saisies"""
+    mode = st.radio("Point de départ", ["Centre d'une commune", "Coordonnées GPS"], horizontal=True)
+    if mode == "Coordonnées GPS":
+        col_lat, col_lon = st.columns(2)
+        with col_lat:
+            latitude = st.number_input("Latitude", value=43.6045, format="%.5f")
+        with col_lon:
+            longitude = st.number_input("Longitude", value=1.4440, format="%.5f")
+        return [latitude, longitude]
+
+    df, index_villes = load_data(COLONNES_SEARCH), get_index_villes()
+    if df is None or index_villes is None:
+        return None
+    ville = st.selectbox("Commune", options=['Sélectionnez une ville'] + list(index_villes), index=0, key="ville_proximite")
+    if ville == 'Sélectionnez une ville':
+        return None
+    debut, _ = index_villes[ville]
+    commune = get_commune_geo(df['code_insee'].iloc[debut])
+    if commune is None:
+        st.warning("Position de la commune inconnue : saisissez des coordonnées GPS")
+        return None
+    return [float(commune['latitude']), float(commune['longitude'])]
+
+def proximite_page():
+    st.title("📍 Établissements proches de chez moi")
+
+    spatial = get_index_spatial()
+    if spatial is None:
+        return
+    index, annuaire = spatial
+
+    position = choisir_position()
+    col_type, col_mode, col_valeur = st.columns(3)
+    with col_type:
+        type_etablissement = TYPES[st.selectbox("Type d'établissement", options=list(TYPES))]
+    with col_mode:
+        recherche = st.radio("Recherche", ["Les plus proches", "Dans un rayon"], horizontal=True)
+    with col_valeur:
+        if recherche == "Dans un rayon":
+            rayon_km, nombre = st.slider("Rayon (km)", min_value=1, max_value=50, value=10), None
+        else:
+            rayon_km, nombre = None, st.slider("Nombre d'établissements", min_value=1, max_value=20, value=5)
+
+    if position is None:
+        return
+
+    proches = etablissements_proches(index, annuaire, position, type_etablissement, nombre, rayon_km)
+    if proches.empty:
+        st.warning("Aucun établissement trouvé avec ces critères")
+        return
+
+    st.subheader(f"{len(proches)} établissement{'s' if len(proches) > 1 else ''} trouvé{'s' if len(proches) > 1 else ''}")
+    folium_static(create_proximite_map(position, proches, rayon_km))
+    st.dataframe(
+        proches[['Nom_etablissement', 'Type_etablissement', 'Adresse_1', 'Code_postal', 'Nom_commune', 'distance_km']]
+        .rename(columns={
+            'Nom_etablissement': 'Établissement', 'Type_etablissement': 'Type', 'Adresse_1': 'Adresse',
+            'Code_postal': 'Code postal', 'Nom_commune': 'Commune', 'distance_km': 'Distance (km)',
+        })
+        .round({'Distance (km)': 1}),
+        hide_index=True,
+        use_container_width=True,
+    )
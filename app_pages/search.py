@@ -0,0 +1,183 @@
+import streamlit as st
+from streamlit_folium import folium_static
+
+from utils.adresses import filtrer_numero, resoudre_adresse
+from utils.data import load_data, get_commune_geo, get_index_adresses, get_index_spatial, get_requete
+from utils.requetes import MOTEUR
+from utils.schema import COLONNES_SEARCH
+from utils.api import get_coordinates, get_etablissements_api
+from utils.cartes import create_map
+
+# Dictionnaire des emojis pour les caractéristiques
+CARACTERISTIQUES_EMOJI = {
+    'restauration': '🍽️ Restauration',
+    'hebergement': '🛏️ Internat',
+    'ulis': '♿ ULIS',
+    'apprentissage': '📚 Apprentissage',
+    'segpa': '📖 SEGPA',
+    'section_arts': '🎨 Section Arts',
+    'section_cinema': '🎬 Section Cinéma',
+    'section_theatre': '🎭 Section Théâtre',
+    'section_sport': '⚽ Section Sport',
+    'section_internationale': '🌍 Section Internationale',
+    'section_europeenne': '🇪🇺 Section Européenne',
+    'lycee_agricole': '🌾 Lycée Agricole',
+    'lycee_militaire': '🎖️ Lycée Militaire',
+    'lycee_des_metiers': '🔧 Lycée des Métiers',
+    'post_bac': '🎓 Post-BAC'
+}
+
+def afficher_etablissement(etab):
+    # Créer le HTML pour les badges au début
+    badges_html = [f'<span class="badge">👥 <strong>Effectif :</strong> {etab["nombre_d_eleves"] if etab["nombre_d_eleves"] else "Non renseigné"}</span>']
+    
+    # Ajouter les badges pour les caractéristiques
+    for key, emoji_label in CARACTERISTIQUES_EMOJI.items():
+        if etab.get(key, "0") == "1" or etab.get(key, 0) == 1:
+            badges_html.append(f'<span class="badge">{emoji_label}</span>')
+    
+    # Jointure de tous les badges
+    badges = ''.join(badges_html)
+    
+    html = f"""
+    <div class="result-card">
+        <h3>{etab['nom_etablissement']} ({etab['type_etablissement']})</h3>
+        <div class="contact-item">
+            📍 {etab['adresse_1']}, {etab['code_postal']} {etab['nom_commune']}
+        </div>
+        <div class="contact-item">
+            📞 <a href="tel:{etab['telephone']}">{etab['telephone']}</a>
+        </div>
+        <div class="contact-item">
+            ✉️ <a href="mailto:{etab['mail']}">{etab['mail']}</a>
+        </div>
+        <div class="contact-item">
+            🔗 <a href="{etab['web']}" target="_blank">{etab['web']}</a>
+        </div>
+        <div class="badge-container">
+            {badges}
+        </div>
+    </div>
+    """
+    
+    st.markdown(html, unsafe_allow_html=True)
+
+def search_page():
+    st.title("🏫 Recherchez de l'établissement scolaire de votre secteur")
+    
+    df, index_adresses = load_data(COLONNES_SEARCH), get_index_adresses()
+    if df is None or index_adresses is None:
+        return
+    
+    recherche_adresse(df, index_adresses)
+
+@st.fragment
+def recherche_adresse(df, index_adresses):
+    """Saisie libre de l'adresse : une seule requête (validée par Entrée) résout ville, voie et numéro."""
+    texte = st.text_input(
+        "Adresse",
+        placeholder="Ex. : 12 bis rue de la Paix, Toulouse",
+        help="Numéro et voie, puis la commune (après une virgule) ou son code postal",
+        key="adresse_search"
+    )
+    if not texte.strip():
+        return
+    
+    resultat = resoudre_adresse(index_adresses, texte)
+    if resultat['statut'] == 'commune_inconnue':
+        st.warning("Commune non reconnue : indiquez-la après une virgule ou par son code postal")
+        return
+    ville, code_insee = resultat['ville'], resultat['code_insee']
+    if resultat['statut'] == 'voie_manquante':
+        st.info(f"Le secteur dépend de la voie à {ville} : précisez-la dans l'adresse")
+        return
+    if resultat['statut'] == 'voie_inconnue':
+        st.warning(f"Voie non trouvée à {ville}")
+        afficher_plus_proches(code_insee, None, ville)
+        return
+    
+    # Les règles d'une voie sont une simple sélection de positions, sans parcourir tout le tableau.
+    # Le moteur duckdb relit ces mêmes règles dans la copie Parquet alors que l'index a déjà leurs
+    # positions : ce chemin ne sert qu'à exercer le moteur sur la page (voir utils.requetes)
+    if MOTEUR == 'duckdb':
+        etablissements = get_requete('regles_voie', df, code_insee, resultat['libelles'])
+        if etablissements is None:
+            return
+    else:
+        etablissements = df.iloc[resultat['positions']]
+    numero, rep = resultat['adresse']['numero'], resultat['adresse']['rep']
+    # « 12 bis RUE DES LILAS, TOULOUSE (HAUTE-GARONNE) » ; commune sans voie : la ville seule
+    voie = resultat['voie'] or ""
+    if voie and numero is not None:
+        voie = f"{numero} {rep.lower() + ' ' if rep else ''}{voie}"
+    st.caption("Adresse reconnue : " + ", ".join(partie for partie in [voie, ville] if partie)
+               + (" (correspondance approchée)" if resultat['score'] < 1 else ""))
+    
+    # Gestion du numéro de voie
+    if (etablissements['no_de_voie_debut'].notna().any() and 
+        len(etablissements[['no_de_voie_debut', 'no_de_voie_fin']].drop_duplicates()) > 1):
+        if numero is None:
+            min_voie = int(etablissements['no_de_voie_debut'].min())
+            max_voie = int(etablissements['no_de_voie_fin'].max())
+            st.info(f"Le secteur dépend du numéro : précisez-le dans l'adresse (entre {min_voie} et {max_voie})")
+            return
+        etablissements = filtrer_numero(etablissements, numero)
+    
+    afficher_resultats(etablissements, resultat['voie'], ville, code_insee)
+
+def afficher_plus_proches(code_insee, type_choisi, ville_selectionnee):
+    """Repli sans règle de secteur : collège et lycée les plus proches de la voie (ou du centre de la commune)"""
+    # scipy n'est chargé que pour ce repli (voie inconnue), pas à chaque affichage de la page
+    from utils.spatial import plus_proches
+
+    spatial = get_index_spatial()
+    if spatial is None:
+        return
+    index, annuaire = spatial
+    position = get_coordinates(code_insee, type_choisi, ville_selectionnee) if type_choisi else None
+    if position is None:
+        commune = get_commune_geo(code_insee)
+        if commune is None:
+            return
+        position = [commune['latitude'], commune['longitude']]
+
+    lignes = []
+    for type_etablissement in ['Collège', 'Lycée']:
+        if type_etablissement in index:
+            distances, positions = plus_proches(index, position[0], position[1], 1, type_etablissement)
+            etab = annuaire.iloc[positions[0]]
+            lignes.append(f"- **{etab['Nom_etablissement']}** ({etab['Nom_commune']}) : {distances[0]:.1f} km")
+    if lignes:
+        st.info("Établissements les plus proches (à titre indicatif, hors sectorisation) :\n\n" + "\n".join(lignes))
+
+@st.fragment
+def afficher_resultats(etablissements, type_choisi, ville_selectionnee, code_insee):
+    """Fragment : liste et cartes des établissements du secteur. Les appels API et le géocodage sont en cache."""
+    if len(etablissements) > 0:
+        nb_colleges = len(etablissements[etablissements['type_etablissement'] == "COLLEGE"])
+        nb_lycees = len(etablissements[etablissements['type_etablissement'] == "LYCEE"])
+        
+        result_text = []
+        if nb_colleges > 0:
+            result_text.append(f"{nb_colleges} collège{'s' if nb_colleges > 1 else ''}")
+        if nb_lycees > 0:
+            result_text.append(f"{nb_lycees} lycée{'s' if nb_lycees > 1 else ''}")
+        
+        if result_text:  # N'affiche que s'il y a des résultats
+            st.subheader("Résultats de la recherche")
+            st.write(" et ".join(result_text) + " trouvé" + ("s" if nb_colleges + nb_lycees > 1 else ""))
+            
+            codes_rne = tuple(etablissements['code_rne'].tolist())
+            api_data = get_etablissements_api(codes_rne)
+            
+            if api_data and 'results' in api_data:
+                st.subheader("Localisation des établissements")
+                map = create_map(api_data['results'], True, code_insee, type_choisi, ville_selectionnee,
+                                 commune=get_commune_geo(code_insee))
+                folium_static(map)
+                
+                for etab in api_data['results']:
+                    afficher_etablissement(etab)
+    else:
+        st.warning("Aucun établissement trouvé avec ces critères")
+        afficher_plus_proches(code_insee, type_choisi, ville_selectionnee)
@@ -0,0 +1,44 @@
+import json
+import os
+
+import streamlit as st
+from streamlit_folium import folium_static
+
+from utils.cartes import create_secteurs_map
+from utils.data import get_matrice, version_session
+from utils.polygones import DOSSIER_TUILES, URL_TUILES
+
+TYPES = {'Collèges': 'college', 'Lycées': 'lycee'}
+
+def secteurs_page():
+    st.title("🧩 Carte des secteurs")
+    st.markdown("Secteurs de recrutement de tous les établissements d'un département ou de la région, "
+                "une couleur par établissement. Seules les tuiles visibles sont chargées.")
+
+    version = version_session()
+    chemin_index = os.path.join(DOSSIER_TUILES, version or '', 'index.json')
+    if version is None or not os.path.exists(chemin_index):
+        st.info("Carte indisponible : les tuiles sont produites par python -m pipeline.ingestion --geometries "
+                "(ou python -m pipeline.tuiles pour une version existante).")
+        return
+    with open(chemin_index, encoding='utf-8') as f:
+        index = json.load(f)
+
+    # Libellés des départements : table des communes de la matrice origine-destination
+    libelles = {}
+    matrice = get_matrice()
+    if matrice is not None:
+        communes = matrice['communes']
+        libelles = dict(zip(communes['code_departement'].astype(str), communes['libelle_departement_eleve']))
+    departements = {'Toute la région': None}
+    departements.update({libelles.get(code, code): code for code in index['departements']})
+
+    col_type, col_departement = st.columns(2)
+    with col_type:
+        type_etablissement = TYPES[st.radio("Type d'établissement", options=list(TYPES), horizontal=True)]
+    with col_departement:
+        departement = departements[st.selectbox("Département", options=list(departements))]
+
+    url = f"{URL_TUILES}/{version}/{type_etablissement}"
+    folium_static(create_secteurs_map(url, index, departement), width=1100, height=650)
+    st.caption(f"{index['tuiles']} tuiles, zooms {index['zooms'][0]} à {index['zooms'][1]}")
@@ -0,0 +1,870 @@
+import streamlit as st
+import plotly.graph_objects as go
+
+from utils.audit import STATUTS_AUDIT
+from utils.data import (
+    get_audit, get_distances, get_enveloppes, get_matrice, get_populations, get_requete, load_data, version_session,
+)
+from utils.distances import SEUILS_KM, TOUS_TYPES
+from utils.evolution import (
+    charger_version, comparer, etablissements_ouverts_fermes, resume_par_departement, resume_par_etablissement,
+)
+from utils.schema import COLONNES_STATS
+from utils.snapshot import lister_versions
+
+def stats_page():
+    # Configuration du style
+    st.markdown("""
+        <style>
+        .big-font {
+            font-size:20px !important;
+            color: #4F4F4F !important;
+        }
+        .plotly-title {
+            font-size:24px !important;
+            color: #4F4F4F !important;
+        }
+        .filter-container {
+            background-color: #f8f9fa;
+            padding: 20px;
+            border-radius: 10px;
+            margin-bottom: 20px;
+        }
+        div[data-testid="stMetricValue"] {
+            color: #4F4F4F !important;
+        }
+        </style>
+    """, unsafe_allow_html=True)
+    
+    st.markdown('<h1 style="color: #4F4F4F;">📊 Tableau de bord sur la carte scolaire des collèges et lycées publics</h1>', unsafe_allow_html=True)
+
+    # Chargement des données
+    df = load_data(COLONNES_STATS)
+    if df is None:
+        st.error("Impossible de charger les données")
+        return
+
+    # type_etablissement et libelle_departement_eleve sont déjà nettoyés (chaînes, sans NaN)
+    # lors de la préparation de l'instantané : le DataFrame partagé n'est jamais modifié ici
+
+    # Configuration des filtres
+    with st.container():
+        st.markdown('<div class="filter-container">', unsafe_allow_html=True)
+        col_dept, col_type = st.columns(2)
+
+        with col_dept:
+            # Filtrage des valeurs vides pour les départements
+            dept_list = [d for d in df['libelle_departement_eleve'].unique() if d.strip()]
+            all_departments = sorted(dept_list)
+            selected_departments = st.multiselect(
+                "Sélectionner un ou plusieurs départements",
+                options=all_departments,
+                default=all_departments,
+                key="department_filter"
+            )
+
+        with col_type:
+            # Filtrage des valeurs vides pour les types
+            type_list = [t for t in df['type_etablissement'].unique() if t.strip()]
+            all_types = ['Tous'] + sorted(type_list)
+            selected_type = st.selectbox(
+                "Sélectionnez le type d'établissement",
+                options=all_types,
+                index=0,
+                key="type_filter"
+            )
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    # Filtrage des données
+    filtered_df = df
+    if selected_departments:
+        filtered_df = filtered_df[filtered_df['libelle_departement_eleve'].isin(selected_departments)]
+    if selected_type != 'Tous':
+        filtered_df = filtered_df[filtered_df['type_etablissement'] == selected_type]
+    # Chiffres clés et agrégats par département : moteur pandas (filtered_df) ou duckdb (copie Parquet), voir utils.requetes
+    departements_requete = selected_departments or list(df['libelle_departement_eleve'].unique())
+    chiffres = get_requete('chiffres_cles', df, departements_requete, selected_type)
+    if chiffres is None:
+        return
+
+    # Configuration des couleurs
+    colors = {
+        'COLLEGE': '#1f77b4',
+        'LYCEE': '#ff7f0e',
+        'background': '#ffffff',
+        'text': '#4F4F4F'
+    }
+
+    # Métriques principales
+    st.markdown('<p class="big-font">Chiffres clés</p>', unsafe_allow_html=True)
+    col_stats1, col_stats2, col_stats3 = st.columns(3)
+    
+    with col_stats1:
+        st.metric(
+            label="Total établissements",
+            value=f"{chiffres['etablissements']:,}"
+        )
+    with col_stats2:
+        st.metric(
+            label="Collèges",
+            value=f"{chiffres['colleges']:,}"
+        )
+    with col_stats3:
+        st.metric(
+            label="Lycées",
+            value=f"{chiffres['lycees']:,}"
+        )
+
+    # Graphiques
+    col1, col2 = st.columns(2)
+
+    with col1:
+        # Répartition par département avec code_rne unique
+        dept_count = get_requete('etablissements_par_departement', df, departements_requete, selected_type).pivot(
+            index='libelle_departement_eleve', columns='type_etablissement', values='etablissements',
+        ).fillna(0).astype(int)
+        fig_dept = go.Figure(data=[
+            go.Bar(name='Collèges', x=dept_count.index, y=dept_count.get('COLLEGE', [0]*len(dept_count)), marker_color=colors['COLLEGE']),
+            go.Bar(name='Lycées', x=dept_count.index, y=dept_count.get('LYCEE', [0]*len(dept_count)), marker_color=colors['LYCEE'])
+        ])
+        
+        fig_dept.update_layout(
+            title={'text': "Établissements par département", 'font': {'size': 24, 'color': colors['text']}},
+            barmode='group',
+            xaxis={'title': {'text': "Département", 'font': {'size': 18, 'color': colors['text']}},
+                'tickfont': {'size': 14, 'color': colors['text']}, 'tickangle': 45},
+            yaxis={'title': {'text': "Nombre d'établissements", 'font': {'size': 18, 'color': colors['text']}},
+                'tickfont': {'size': 14, 'color': colors['text']}},
+            paper_bgcolor=colors['background'],
+            plot_bgcolor=colors['background'],
+            font={'color': colors['text']},
+            height=500
+        )
+        st.plotly_chart(fig_dept, use_container_width=True)
+
+    with col2:
+        # Ratio établissements/population, précalculé par département de résidence et par type
+        dept_ratio = ratios_departements(selected_departments, selected_type)
+
+        if dept_ratio is not None and not dept_ratio.empty:  # Vérifie si on a des données à afficher
+            fig_ratio = go.Figure(data=[
+                go.Bar(
+                    x=dept_ratio.index,
+                    y=dept_ratio.values,
+                    marker_color=colors['COLLEGE'],
+                    text=[f"{val:.1f}" for val in dept_ratio.values],  # Ajoute les valeurs sur les barres
+                    textposition='outside'
+                )
+            ])
+            fig_ratio.update_layout(
+                title={'text': "Établissements pour 100K habitants", 'font': {'size': 24, 'color': colors['text']}},
+                xaxis={'title': {'text': "Département", 'font': {'size': 18, 'color': colors['text']}},
+                    'tickfont': {'size': 14, 'color': colors['text']}, 'tickangle': 45},
+                yaxis={'title': {'text': "Ratio pour 100k habitants", 'font': {'size': 18, 'color': colors['text']}},
+                    'tickfont': {'size': 14, 'color': colors['text']}},
+                paper_bgcolor=colors['background'],
+                plot_bgcolor=colors['background'],
+                font={'color': colors['text']},
+                height=500,
+                showlegend=False
+            )
+            st.plotly_chart(fig_ratio, use_container_width=True)
+        else:
+            st.warning("Pas de données disponibles pour le calcul du ratio")
+
+    ratios_communes(selected_departments, selected_type)
+
+
+    # Métriques sectorisation unique
+    st.markdown("<p class='big-font'>Chiffres sur la sectorisation unique</p><span>La sectorisation unique signifie que toute une ville est sectorisée dans les mêmes établissements, il n'y a donc pas de granularité par adresse.</span><br>", unsafe_allow_html=True)
+    col_stats12, col_stats22, col_stats32 = st.columns(3)
+    
+    
+    with col_stats12:
+        st.metric(
+            label="Nombre de villes",
+            value=f"{chiffres['villes']}"
+        )
+    with col_stats22:
+        st.metric(
+            label="Sectorisation collège/lycée unique",
+            value=f"{chiffres['villes_unique']}"
+        )
+    with col_stats32:
+        st.metric(
+            label="Sectorisation collège unique",
+            value=f"{chiffres['villes_unique_college']}"
+        )
+
+ 
+        # Villes dont la sectorisation dépend de la voie, par département (liste triée, sans doublon)
+        dept_ville_details = get_requete('villes_avec_voies', df, departements_requete, selected_type)
+
+    ### Graphique sectorisation unique ########################################
+    # Fonction pour formater la liste des villes
+    def format_ville_list(villes):
+        villes_uniques = sorted(list(set(villes)))
+        
+        def format_line(text, max_length=50):
+            if len(text) <= max_length:
+                return text
+            
+            last_space = text[:max_length].rfind(' ')
+            if last_space == -1:  # Si pas d'espace trouvé
+                return text[:max_length] + "<br>" + format_line(text[max_length:])
+            return text[:last_space] + "<br>" + format_line(text[last_space+1:])
+
+        # Formater la liste des villes
+        if len(villes_uniques) > 10:
+            ville_list = f"Villes: {', '.join(villes_uniques[:10])}..."
+        else:
+            ville_list = f"Villes: {', '.join(villes_uniques)}"
+        return format_line(ville_list)
+
+    # Création du graphique avec texte personnalisé au survol
+    fig_sectorisation = go.Figure(data=[
+        go.Bar(
+            x=dept_ville_details['libelle_departement_eleve'],
+            y=[len(villes) for villes in dept_ville_details['villes']],
+            marker_color=colors['COLLEGE'],
+            hovertemplate="<b>%{x}</b><br>" +
+                        "Nombre de villes: %{y}<br>" +
+                        "%{customdata}<extra></extra>",
+            customdata=[format_ville_list(villes) for villes in dept_ville_details['villes']]
+        )
+    ])
+
+    # Mise en page du graphique
+    fig_sectorisation.update_layout(
+        title={
+            'text': "Nombre de villes avec sectorisations multiples par département", 
+            'font': {'size': 24, 'color': colors['text']}
+        },
+        xaxis={
+            'title': {'text': "Département", 'font': {'size': 18, 'color': colors['text']}},
+            'tickfont': {'size': 14, 'color': colors['text']}, 
+            'tickangle': 45
+        },
+        yaxis={
+            'title': {'text': "Nombre de villes", 'font': {'size': 18, 'color': colors['text']}},
+            'tickfont': {'size': 14, 'color': colors['text']}
+        },
+        paper_bgcolor=colors['background'],
+        plot_bgcolor=colors['background'],
+        font={'color': colors['text']},
+        height=500,
+        showlegend=False,
+        hoverlabel=dict(
+            bgcolor=colors['text'],
+            font_size=14,
+            font_family="Arial"
+        )
+    )
+    st.plotly_chart(fig_sectorisation, use_container_width=True)
+    st.markdown("<span>Les sectorisations multiples sont mises en place pour favoriser l'inclusion sociale.</span><br>", unsafe_allow_html=True)
+    
+
+    # Métriques données manquantes
+    st.markdown("<p class='big-font'>Chiffres sur les données manquantes</p><span>", unsafe_allow_html=True)
+    col_stats13, col_stats23 = st.columns(2)
+    
+    with col_stats13:
+        villes_college = set(filtered_df[(filtered_df['type_etablissement']=='COLLEGE') & ('libelle_region' != 'HORS REGION')]['com_name_upper'].unique())
+        villes_lycee = set(filtered_df[(filtered_df['type_etablissement']=='LYCEE') & ('libelle_region' != 'HORS REGION')]['com_name_upper'].unique())
+        villes_college_only = villes_college - villes_lycee
+        villes_lycee_only = villes_lycee - villes_college
+        
+        st.metric(
+            label="Villes manquantes dans la carte des lycées",
+            value=f"{len(villes_college_only)}"
+        )
+        
+        st.metric(
+            label="Villes manquantes dans la carte des collèges",
+            value=f"{len(villes_lycee_only)}"
+        )
+    with col_stats23:
+        adressevilles_college = set(map(tuple, 
+            filtered_df[
+                (filtered_df['type_etablissement']=='COLLEGE') & 
+                (filtered_df['libelle_region'] != 'HORS REGION')
+            ][['com_name_upper', 'type_et_libelle']].values
+        ))
+        adressevilles_lycee = set(map(tuple, 
+            filtered_df[
+                (filtered_df['type_etablissement']=='LYCEE') & 
+                (filtered_df['libelle_region'] != 'HORS REGION')
+            ][['com_name_upper', 'type_et_libelle']].values
+        ))
+        adressevilles_college_only = adressevilles_college - adressevilles_lycee - villes_lycee_only
+        adressevilles_lycee_only = adressevilles_lycee - adressevilles_college - villes_college_only
+        
+        st.metric(
+            label="Adresses manquantes dans la carte des lycées",
+            value=f"{len(adressevilles_college_only)}" 
+        )
+        st.metric(
+            label="Adresses manquantes dans la carte des collèges",
+            value=f"{len(adressevilles_lycee_only)}" 
+        )
+
+    # Fonction pour regrouper par département. filtered_df ne dépend que de la version
+    # des données et des filtres : ils font partie de la clé du cache.
+    @st.cache_data(show_spinner=False)
+    def group_by_dept(version, departements, type_choisi, data_set):
+        dept_counts = {}
+        for item in data_set:
+            ville = item[0] if isinstance(item, tuple) else item
+            dept = filtered_df[filtered_df['com_name_upper'] == ville]['libelle_departement_eleve'].iloc[0]
+            dept_counts[dept] = dept_counts.get(dept, 0) + 1
+        return dept_counts
+
+    cle_cache = (version_session(), tuple(selected_departments), selected_type)
+    villes_missing_lycees = group_by_dept(*cle_cache, villes_college_only)
+    villes_missing_colleges = group_by_dept(*cle_cache, villes_lycee_only)
+    addr_missing_lycees = group_by_dept(*cle_cache, adressevilles_college_only)
+    addr_missing_colleges = group_by_dept(*cle_cache, adressevilles_lycee_only)
+
+    # Création des 4 graphiques
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # Graphique 1: Villes manquantes dans la carte des lycées
+        fig1 = go.Figure(data=[
+            go.Bar(
+                x=list(villes_missing_lycees.keys()),
+                y=list(villes_missing_lycees.values()),
+                marker_color='#1f77b4',
+                hovertemplate="<b>%{x}</b><br>" +
+                             "Nombre de villes: %{y}<br>" +
+                             "%{customdata}<extra></extra>",
+                customdata=[format_ville_list([v for v in villes_college_only 
+                           if filtered_df[filtered_df['com_name_upper'] == v]['libelle_departement_eleve'].iloc[0] == dept])
+                           for dept in villes_missing_lycees.keys()]
+            )
+        ])
+        fig1.update_layout(
+            title={
+            'text': "Villes manquantes dans la carte des lycées", 
+            'font': {'size': 18, 'color': colors['text']}
+            },
+            xaxis={
+                'title': {'text': "Département", 'font': {'size': 18, 'color': colors['text']}},
+                'tickfont': {'size': 12, 'color': colors['text']}, 
+                'tickangle': 45
+            },
+            yaxis={
+                'title': {'text': "Nombre de villes", 'font': {'size': 18, 'color': colors['text']}},
+                'tickfont': {'size': 12, 'color': colors['text']}
+            },
+            height=400,
+            showlegend=False,
+            paper_bgcolor=colors['background'],
+            plot_bgcolor=colors['background'],
+            font={'color': colors['text']},
+            hoverlabel=dict(
+                bgcolor=colors['text'],
+                font_size=14,
+                font_family="Arial"
+            )
+        )
+        
+        st.plotly_chart(fig1, use_container_width=True)
+
+        # Graphique 3: Villes manquantes dans la carte des collèges
+        fig3 = go.Figure(data=[
+            go.Bar(
+                x=list(villes_missing_colleges.keys()),
+                y=list(villes_missing_colleges.values()),
+                marker_color='#2ca02c',
+                hovertemplate="<b>%{x}</b><br>" +
+                             "Nombre de villes: %{y}<br>" +
+                             "%{customdata}<extra></extra>",
+                customdata=[format_ville_list([v for v in villes_lycee_only 
+                           if filtered_df[filtered_df['com_name_upper'] == v]['libelle_departement_eleve'].iloc[0] == dept])
+                           for dept in villes_missing_colleges.keys()]
+            )
+        ])
+        fig3.update_layout(
+            title={
+            'text': "Villes manquantes dans la carte des collèges", 
+            'font': {'size': 18, 'color': colors['text']}
+            },
+            xaxis={
+                'title': {'text': "Département", 'font': {'size': 18, 'color': colors['text']}},
+                'tickfont': {'size': 12, 'color': colors['text']}, 
+                'tickangle': 45
+            },
+            yaxis={
+                'title': {'text': "Nombre de villes", 'font': {'size': 18, 'color': colors['text']}},
+                'tickfont': {'size': 12, 'color': colors['text']}
+            },
+            height=400,
+            showlegend=False,
+            paper_bgcolor=colors['background'],
+            plot_bgcolor=colors['background'],
+            font={'color': colors['text']},
+            hoverlabel=dict(
+                bgcolor=colors['text'],
+                font_size=14,
+                font_family="Arial"
+            )
+        )
+        st.plotly_chart(fig3, use_container_width=True)
+
+
+    with col2:
+        # Graphique 2: Adresses manquantes dans la carte des lycées
+        fig2 = go.Figure(data=[
+            go.Bar(
+                x=list(addr_missing_lycees.keys()),
+                y=list(addr_missing_lycees.values()),
+                marker_color='#ff7f0e',
+                hovertemplate="<b>%{x}</b><br>" +
+                             "Nombre d'adresses: %{y}<br>" +
+                             "%{customdata}<extra></extra>",
+                customdata=[format_ville_list([v[0] for v in adressevilles_college_only 
+                           if filtered_df[filtered_df['com_name_upper'] == v[0]]['libelle_departement_eleve'].iloc[0] == dept])
+                           for dept in addr_missing_lycees.keys()]
+            )
+        ])
+        fig2.update_layout(
+            title={
+            'text': "Adresses manquantes dans la carte des lycées", 
+            'font': {'size': 18, 'color': colors['text']}
+            },
+            xaxis={
+                'title': {'text': "Département", 'font': {'size': 18, 'color': colors['text']}},
+                'tickfont': {'size': 12, 'color': colors['text']}, 
+                'tickangle': 45
+            },
+            yaxis={
+                'title': {'text': "Nombre d'adresses", 'font': {'size': 18, 'color': colors['text']}},
+                'tickfont': {'size': 12, 'color': colors['text']}
+            },
+            height=400,
+            showlegend=False,
+            paper_bgcolor=colors['background'],
+            plot_bgcolor=colors['background'],
+            font={'color': colors['text']},
+            hoverlabel=dict(
+                bgcolor=colors['text'],
+                font_size=14,
+                font_family="Arial"
+            )
+        )
+        st.plotly_chart(fig2, use_container_width=True)
+
+        # Graphique 4: Adresses manquantes dans la carte des collèges
+        fig4 = go.Figure(data=[
+            go.Bar(
+                x=list(addr_missing_colleges.keys()),
+                y=list(addr_missing_colleges.values()),
+                marker_color='#d62728',
+                hovertemplate="<b>%{x}</b><br>" +
+                             "Nombre d'adresses: %{y}<br>" +
+                             "%{customdata}<extra></extra>",
+                customdata=[format_ville_list([v[0] for v in adressevilles_lycee_only 
+                           if filtered_df[filtered_df['com_name_upper'] == v[0]]['libelle_departement_eleve'].iloc[0] == dept])
+                           for dept in addr_missing_colleges.keys()]
+            )
+        ])
+        fig4.update_layout(
+            title={
+                'text': "Adresses manquantes dans la carte des collèges", 
+                'font': {'size': 18, 'color': colors['text']}
+            },
+            xaxis={
+                'title': {'text': "Département", 'font': {'size': 18, 'color': colors['text']}},
+                'tickfont': {'size': 12, 'color': colors['text']}, 
+                'tickangle': 45
+            },
+            yaxis={
+                'title': {'text': "Nombre d'adresses", 'font': {'size': 18, 'color': colors['text']}},
+                'tickfont': {'size': 12, 'color': colors['text']}
+            },
+            height=400,
+            showlegend=False,
+            paper_bgcolor=colors['background'],
+            plot_bgcolor=colors['background'],
+            font={'color': colors['text']},
+            hoverlabel=dict(
+                bgcolor=colors['text'],
+                font_size=14,
+                font_family="Arial"
+            )
+        )
+        st.plotly_chart(fig4, use_container_width=True)
+    desaccords_regles_polygones(colors, selected_departments, selected_type)
+
+    distances_domicile_etablissement(colors, selected_departments, selected_type)
+    flux_sectorisation(colors, selected_departments, selected_type)
+    aires_recrutement(colors, selected_departments, selected_type)
+    evolution_sectorisation(colors)
+
+def ratios_departements(departements, type_choisi):
+    """Établissements pour 100 000 habitants par département : sélection dans la table précalculée"""
+    populations = get_populations()
+    if populations is None:
+        return None
+    _, par_departement = populations
+    # 'Tous' : ligne tous types précalculée (un établissement collège et lycée n'y est compté qu'une fois)
+    lignes = par_departement[
+        par_departement['libelle_departement_eleve'].isin(departements) & par_departement['population'].notna()
+        & (par_departement['type_etablissement'] == (TOUS_TYPES if type_choisi == 'Tous' else type_choisi))
+    ].set_index('libelle_departement_eleve').sort_index()
+    return lignes['etablissements'] / lignes['population'] * 100_000
+
+@st.fragment
+def ratios_communes(departements, type_choisi):
+    """Détail par commune du ratio établissements / habitants (si les populations communales sont chargées)"""
+    populations = get_populations()
+    if populations is None:
+        return
+    par_commune, _ = populations
+    par_commune = par_commune[par_commune['population'].notna()]
+    options = [d for d in departements if d in set(par_commune['libelle_departement_eleve'])]
+    if not options:
+        return
+    with st.expander("Détail par commune"):
+        departement = st.selectbox("Département", options=options, key="departement_communes")
+        communes = par_commune[
+            (par_commune['libelle_departement_eleve'] == departement)
+            & (par_commune['type_etablissement'] == (TOUS_TYPES if type_choisi == 'Tous' else type_choisi))
+        ]
+        st.dataframe(
+            communes.sort_values('population', ascending=False)[['com_name_upper', 'population', 'etablissements', 'pour_100k']],
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                'com_name_upper': "Commune",
+                'population': st.column_config.NumberColumn("Population", format="%d"),
+                'etablissements': "Établissements de secteur",
+                'pour_100k': st.column_config.NumberColumn("Pour 100k habitants", format="%.1f"),
+            },
+        )
+
+@st.fragment
+def desaccords_regles_polygones(colors, departements, type_choisi):
+    """Données manquantes : règles de la carte scolaire en désaccord avec les polygones des secteurs"""
+    audit = get_audit()
+    if audit is None:
+        return
+    etablissements, par_departement = audit
+    par_departement = par_departement[par_departement['libelle_departement_eleve'].isin(departements)]
+    if type_choisi != 'Tous':
+        par_departement = par_departement[par_departement['type_etablissement'] == type_choisi]
+        etablissements = etablissements[etablissements['type_etablissement'] == type_choisi]
+    if par_departement.empty:
+        return
+    par_departement = par_departement.groupby('libelle_departement_eleve', as_index=False)[
+        ['regles', 'conforme', 'hors_secteur', 'sans_polygone', 'non_geocodee']].sum()
+
+    st.markdown("<span>Règles (voie et plage de numéros) dont la position géocodée tombe hors du polygone de leur établissement.</span><br>", unsafe_allow_html=True)
+    verifiables = par_departement['conforme'].sum() + par_departement['hors_secteur'].sum()
+    col_desaccord, col_sans_polygone, col_non_geocodees = st.columns(3)
+    with col_desaccord:
+        st.metric(label="Règles hors du polygone", value=f"{par_departement['hors_secteur'].sum():,}",
+                  delta=f"{par_departement['hors_secteur'].sum() / verifiables:.1%} des règles vérifiables" if verifiables else None,
+                  delta_color="off")
+    with col_sans_polygone:
+        st.metric(label="Règles d'établissements sans polygone", value=f"{par_departement['sans_polygone'].sum():,}")
+    with col_non_geocodees:
+        st.metric(label="Voies non géocodées", value=f"{par_departement['non_geocodee'].sum():,}")
+
+    fig_audit = go.Figure(data=[
+        go.Bar(name=libelle, x=par_departement['libelle_departement_eleve'], y=par_departement[statut])
+        for statut, libelle in STATUTS_AUDIT.items()
+    ])
+    fig_audit.update_layout(
+        title={'text': "Règles et polygones par département", 'font': {'size': 18, 'color': colors['text']}},
+        barmode='stack',
+        xaxis={'tickfont': {'size': 12, 'color': colors['text']}, 'tickangle': 45},
+        yaxis={'title': {'text': "Nombre de règles", 'font': {'size': 18, 'color': colors['text']}}},
+        height=400,
+        paper_bgcolor=colors['background'],
+        plot_bgcolor=colors['background'],
+        font={'color': colors['text']},
+    )
+    st.plotly_chart(fig_audit, use_container_width=True)
+
+    desaccords = etablissements[etablissements['hors_secteur'] > 0].sort_values('part_desaccord', ascending=False)
+    if not desaccords.empty:
+        st.dataframe(
+            desaccords[['code_rne', 'type_etablissement', 'regles', 'hors_secteur', 'part_desaccord', 'ecart_median_km', 'dans_autre_secteur']],
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                'code_rne': "Code RNE",
+                'type_etablissement': "Type",
+                'regles': "Règles",
+                'hors_secteur': "Hors du polygone",
+                'part_desaccord': st.column_config.ProgressColumn("Part en désaccord", min_value=0, max_value=1, format="%.2f"),
+                'ecart_median_km': st.column_config.NumberColumn("Écart médian", format="%.1f km"),
+                'dans_autre_secteur': "Dans un autre secteur",
+            },
+        )
+
+@st.fragment
+def distances_domicile_etablissement(colors, departements, type_choisi):
+    """Section : distances entre les communes des secteurs et leur établissement"""
+    st.markdown("<p class='big-font'>Distances domicile - établissement</p><span>Distance à vol d'oiseau entre le centre de chaque commune du secteur et l'établissement de rattachement.</span><br>", unsafe_allow_html=True)
+    distances = get_distances()
+    if distances is None:
+        return
+    etablissements, par_departement = distances
+    par_departement = par_departement[
+        par_departement['libelle_departement_eleve'].isin(departements)
+        & (par_departement['type_etablissement'] == (TOUS_TYPES if type_choisi == 'Tous' else type_choisi))
+    ]
+    etablissements = etablissements[etablissements['libelle_departement_eleve'].isin(departements)]
+    if type_choisi != 'Tous':
+        etablissements = etablissements[etablissements['type_etablissement'] == type_choisi]
+    if par_departement.empty:
+        st.info("Aucune distance disponible pour cette sélection")
+        return
+
+    seuil = st.selectbox("Seuil de distance", options=SEUILS_KM, index=1, format_func=lambda km: f"{km} km", key="seuil_distance")
+    part = f"part_plus_{seuil}_km"
+    col_mediane, col_p90, col_part = st.columns(3)
+    with col_mediane:
+        st.metric(label="Médiane des médianes départementales", value=f"{par_departement['mediane_km'].median():.1f} km")
+    with col_p90:
+        st.metric(label="90e centile le plus élevé", value=f"{par_departement['p90_km'].max():.1f} km")
+    with col_part:
+        st.metric(label=f"Établissements dont la médiane dépasse {seuil} km", value=f"{(etablissements['mediane_km'] > seuil).sum():,}")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        fig_distances = go.Figure(data=[
+            go.Bar(name='Médiane', x=par_departement['libelle_departement_eleve'], y=par_departement['mediane_km'], marker_color=colors['COLLEGE']),
+            go.Bar(name='90e centile', x=par_departement['libelle_departement_eleve'], y=par_departement['p90_km'], marker_color=colors['LYCEE'],
+                   customdata=par_departement['max_km'], hovertemplate="%{y:.1f} km (maximum : %{customdata:.1f} km)"),
+        ])
+        fig_distances.update_layout(
+            title={'text': "Distances par département", 'font': {'size': 18, 'color': colors['text']}},
+            barmode='group',
+            xaxis={'tickfont': {'size': 12, 'color': colors['text']}, 'tickangle': 45},
+            yaxis={'title': {'text': "Distance (km)", 'font': {'size': 18, 'color': colors['text']}}},
+            height=400,
+            paper_bgcolor=colors['background'],
+            plot_bgcolor=colors['background'],
+            font={'color': colors['text']},
+        )
+        st.plotly_chart(fig_distances, use_container_width=True)
+    with col2:
+        fig_part = go.Figure(data=[
+            go.Bar(
+                x=par_departement['libelle_departement_eleve'],
+                y=par_departement[part] * 100,
+                marker_color=colors['COLLEGE'],
+                text=[f"{val:.0%}" for val in par_departement[part]],
+                textposition='outside',
+            )
+        ])
+        fig_part.update_layout(
+            title={'text': f"Part des communes à plus de {seuil} km", 'font': {'size': 18, 'color': colors['text']}},
+            xaxis={'tickfont': {'size': 12, 'color': colors['text']}, 'tickangle': 45},
+            yaxis={'title': {'text': "Part des communes (%)", 'font': {'size': 18, 'color': colors['text']}}},
+            height=400,
+            showlegend=False,
+            paper_bgcolor=colors['background'],
+            plot_bgcolor=colors['background'],
+            font={'color': colors['text']},
+        )
+        st.plotly_chart(fig_part, use_container_width=True)
+
+    tableau = etablissements[['code_rne', 'Nom_etablissement', 'type_etablissement', 'libelle_departement_eleve',
+                              'communes', 'mediane_km', 'p90_km', 'max_km', part]]
+    st.dataframe(
+        tableau,
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            'Nom_etablissement': "Établissement",
+            'type_etablissement': "Type",
+            'libelle_departement_eleve': "Département",
+            'communes': "Communes du secteur",
+            'mediane_km': st.column_config.NumberColumn("Médiane", format="%.1f km"),
+            'p90_km': st.column_config.NumberColumn("90e centile", format="%.1f km"),
+            'max_km': st.column_config.NumberColumn("Maximum", format="%.1f km"),
+            part: st.column_config.ProgressColumn(f"Part à plus de {seuil} km", min_value=0, max_value=1, format="%.2f"),
+        },
+    )
+
+@st.fragment
+def flux_sectorisation(colors, departements, type_choisi):
+    """Section : flux entre communes et établissements, lus dans la matrice origine-destination"""
+    # Import local : scipy n'est chargé qu'à l'affichage de la section
+    from utils.matrice import etablissements_par_commune, flux_departements, plus_grands_secteurs
+
+    st.markdown("<p class='big-font'>Flux entre communes et établissements</p><span>Nombre de voies sectorisées entre le département de résidence et celui de l'établissement.</span><br>", unsafe_allow_html=True)
+    matrice = get_matrice()
+    if matrice is None:
+        return
+    type_etablissement = None if type_choisi == 'Tous' else type_choisi
+    communes = matrice['communes']
+    libelles = dict(zip(communes['code_departement'], communes['libelle_departement_eleve']))
+
+    flux = flux_departements(matrice, 'voies', type_etablissement)
+    flux = flux.rename(index=libelles, columns=libelles)
+    flux = flux[flux.index.isin(departements)]
+    flux = flux.loc[:, flux.sum(axis=0) > 0]
+    if flux.empty:
+        st.info("Aucun flux pour cette sélection")
+        return
+
+    dans_departement = sum(flux.at[d, d] for d in flux.index if d in flux.columns)
+    selection = communes['libelle_departement_eleve'].isin(departements).to_numpy()
+    nb_etablissements = etablissements_par_commune(matrice, type_etablissement)[selection]
+    col_flux, col_multiples, col_max = st.columns(3)
+    with col_flux:
+        st.metric(label="Voies sectorisées hors de leur département", value=f"{1 - dans_departement / flux.to_numpy().sum():.1%}")
+    with col_multiples:
+        st.metric(label="Communes rattachées à plusieurs établissements", value=f"{(nb_etablissements > (1 if type_etablissement else 2)).sum():,}")
+    with col_max:
+        st.metric(label="Établissements de rattachement au plus", value=f"{nb_etablissements.max() if len(nb_etablissements) else 0}")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        fig_flux = go.Figure(data=go.Heatmap(
+            z=flux.to_numpy(), x=list(flux.columns), y=list(flux.index), colorscale='Blues',
+            hovertemplate="Résidence : %{y}<br>Établissement : %{x}<br>%{z} voies<extra></extra>",
+        ))
+        fig_flux.update_layout(
+            title={'text': "Flux entre départements", 'font': {'size': 18, 'color': colors['text']}},
+            xaxis={'title': {'text': "Département de l'établissement"}, 'tickangle': 45},
+            yaxis={'title': {'text': "Département de résidence"}},
+            height=500,
+            paper_bgcolor=colors['background'],
+            plot_bgcolor=colors['background'],
+            font={'color': colors['text']},
+        )
+        st.plotly_chart(fig_flux, use_container_width=True)
+    with col2:
+        secteurs = plus_grands_secteurs(matrice, 15, 'voies', type_etablissement)
+        st.markdown("Établissements aux plus grands secteurs")
+        st.dataframe(
+            secteurs[['code_rne', 'type_etablissement', 'communes', 'voies']].rename(columns={
+                'code_rne': 'Code RNE', 'type_etablissement': 'Type', 'communes': 'Communes', 'voies': 'Voies',
+            }),
+            hide_index=True,
+            use_container_width=True,
+        )
+
+@st.fragment
+def aires_recrutement(colors, departements, type_choisi):
+    """Section : surface et compacité des aires de recrutement calculées (enveloppes concaves)"""
+    enveloppes, distances = get_enveloppes(), get_distances()
+    if enveloppes is None or distances is None:
+        return
+    st.markdown("<p class='big-font'>Aires de recrutement</p><span>Enveloppe des adresses géocodées de chaque secteur. Compacité : 1 pour un disque, proche de 0 pour un secteur étiré ou morcelé.</span><br>", unsafe_allow_html=True)
+    etablissements = distances[0][['code_rne', 'Nom_etablissement', 'type_etablissement', 'libelle_departement_eleve']]
+    aires = enveloppes.merge(etablissements, on='code_rne')
+    aires = aires[aires['libelle_departement_eleve'].isin(departements)]
+    if type_choisi != 'Tous':
+        aires = aires[aires['type_etablissement'] == type_choisi]
+    if aires.empty:
+        st.info("Aucune aire de recrutement pour cette sélection")
+        return
+
+    col_surface, col_compacite, col_ecartes = st.columns(3)
+    with col_surface:
+        st.metric(label="Surface médiane", value=f"{aires['surface_km2'].median():.1f} km²")
+    with col_compacite:
+        st.metric(label="Compacité médiane", value=f"{aires['compacite'].median():.2f}")
+    with col_ecartes:
+        st.metric(label="Points écartés (aberrants)", value=f"{int((aires['points'] - aires['points_retenus']).sum()):,}")
+
+    fig_compacite = go.Figure(data=[go.Histogram(x=aires['compacite'], nbinsx=20, marker_color=colors['COLLEGE'])])
+    fig_compacite.update_layout(
+        title={'text': "Répartition de la compacité des secteurs", 'font': {'size': 18, 'color': colors['text']}},
+        xaxis={'title': {'text': "Compacité"}, 'range': [0, 1]},
+        yaxis={'title': {'text': "Établissements"}},
+        height=400,
+        paper_bgcolor=colors['background'],
+        plot_bgcolor=colors['background'],
+        font={'color': colors['text']},
+    )
+    st.plotly_chart(fig_compacite, use_container_width=True)
+    st.dataframe(
+        aires[['code_rne', 'Nom_etablissement', 'type_etablissement', 'libelle_departement_eleve',
+               'surface_km2', 'compacite', 'points_retenus']].sort_values('compacite'),
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            'Nom_etablissement': "Établissement",
+            'type_etablissement': "Type",
+            'libelle_departement_eleve': "Département",
+            'surface_km2': st.column_config.NumberColumn("Surface", format="%.1f km²"),
+            'compacite': st.column_config.ProgressColumn("Compacité", min_value=0, max_value=1, format="%.2f"),
+            'points_retenus': "Points",
+        },
+    )
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def comparer_versions(avant, apres):
+    """Rapport des changements entre deux versions (immuables : le couple de noms suffit comme clé)"""
+    df_avant, df_apres = charger_version(avant), charger_version(apres)
+    return comparer(df_avant, df_apres), etablissements_ouverts_fermes(df_avant, df_apres)
+
+@st.fragment
+def evolution_sectorisation(colors):
+    """Section : changements de sectorisation entre deux versions des données"""
+    st.markdown("<p class='big-font'>Évolution de la sectorisation entre deux versions des données</p>", unsafe_allow_html=True)
+    versions = lister_versions()
+    if len(versions) < 2:
+        st.info("Au moins deux versions produites par le pipeline d'ingestion sont nécessaires pour comparer la sectorisation.")
+        return
+
+    col_avant, col_apres = st.columns(2)
+    with col_avant:
+        avant = st.selectbox("Version de référence", options=versions, index=len(versions) - 2, key="version_avant")
+    with col_apres:
+        apres = st.selectbox("Version comparée", options=versions, index=len(versions) - 1, key="version_apres")
+    if avant == apres:
+        st.info("Sélectionnez deux versions différentes")
+        return
+
+    rapport, ouverts_fermes = comparer_versions(avant, apres)
+    col_ajouts, col_suppressions, col_reaffectations, col_etab = st.columns(4)
+    with col_ajouts:
+        st.metric(label="Adresses ajoutées", value=f"{(rapport['changement'] == 'ajout').sum():,}")
+    with col_suppressions:
+        st.metric(label="Adresses supprimées", value=f"{(rapport['changement'] == 'suppression').sum():,}")
+    with col_reaffectations:
+        st.metric(label="Adresses réaffectées", value=f"{(rapport['changement'] == 'réaffectation').sum():,}")
+    with col_etab:
+        st.metric(
+            label="Établissements ouverts / fermés",
+            value=f"{(ouverts_fermes['statut'] == 'ouvert').sum()} / {(ouverts_fermes['statut'] == 'fermé').sum()}",
+        )
+
+    if rapport.empty:
+        st.info("Aucun changement de sectorisation entre ces deux versions")
+        return
+
+    par_departement = resume_par_departement(rapport)
+    fig_evolution = go.Figure(data=[
+        go.Bar(name=changement.capitalize(), x=par_departement.index, y=par_departement[changement])
+        for changement in par_departement.columns
+    ])
+    fig_evolution.update_layout(
+        title={'text': "Changements par département", 'font': {'size': 18, 'color': colors['text']}},
+        barmode='stack',
+        xaxis={'tickfont': {'size': 12, 'color': colors['text']}, 'tickangle': 45},
+        yaxis={'title': {'text': "Nombre d'adresses", 'font': {'size': 18, 'color': colors['text']}}},
+        height=400,
+        paper_bgcolor=colors['background'],
+        plot_bgcolor=colors['background'],
+        font={'color': colors['text']},
+    )
+    st.plotly_chart(fig_evolution, use_container_width=True)
+
+    st.dataframe(resume_par_etablissement(rapport), hide_index=True, use_container_width=True)
+    st.download_button(
+        "Télécharger le rapport des changements (CSV)",
+        data=rapport.to_csv(index=False).encode('utf-8'),
+        file_name=f"changements_sectorisation_{avant}_{apres}.csv",
+        mime='text/csv',
+    )
@@ -0,0 +1,71 @@
+"""
+Audit par lot des règles de la carte scolaire contre les polygones des secteurs
+(voir utils.audit), pour toute une version.
+
+Les voies des règles sont géocodées avec le cache de pipeline.geocodage (seules les
+voies jamais vues sont envoyées à l'API BAN) ; la jointure spatiale est une seule
+requête STRtree pour toute la région. Les résumés par établissement et par
+département (instantanés audit_etablissements et audit_departements) sont écrits
+dans le dossier de la version et ajoutés à son manifeste.
+
+La version doit contenir les polygones des secteurs (ingestion avec --geometries).
+
+Usage : python -m pipeline.audit [--version <version>] [--sans-geocodage]
+"""
+import argparse
+import os
+import time
+
+from pipeline.geocodage import positionner
+from utils.audit import auditer_regles, resumer_audit
+from utils.data import COLONNES_GEOCODAGE
+from utils.polygones import geometries_detaillees
+from utils.snapshot import chemin_snapshot, dossier_version, ecrire_snapshot, lire_snapshot, version_courante
+
+TABLES_AUDIT = ['audit_etablissements', 'audit_departements']
+
+def auditer_version(dossier, geocoder=True):
+    """Écrit les résumés de l'audit d'une version ; renvoie (etablissements, departements), ou None sans polygones"""
+    if not os.path.exists(chemin_snapshot('polygones', dossier)):
+        return None
+    regles = lire_snapshot('carte_scolaire', columns=['code_rne', 'type_etablissement', 'libelle_departement_eleve'] + list(COLONNES_GEOCODAGE), dossier=dossier)
+    regles = regles[regles['code_rne'].notna()].rename(columns=COLONNES_GEOCODAGE)
+    regles = regles.astype({'code_rne': str, 'type_etablissement': str, 'libelle_departement_eleve': str})
+    regles = positionner(regles, lire_snapshot('communes_geo', dossier=dossier).set_index('code_insee'), geocoder)
+    # Une commune entière est vérifiée à son centroïde
+    regles['geocodee'] = regles['geocodee'] | regles['adresse'].isna()
+    etablissements = lire_snapshot('etablissements', dossier=dossier)
+    audit = auditer_regles(
+        regles,
+        geometries_detaillees(lire_snapshot('polygones', dossier=dossier)),
+        dict(zip(etablissements['code_rne'].astype(str), etablissements['type_etablissement'].astype(str))),
+    )
+    tables = resumer_audit(audit)
+    for nom, table in zip(TABLES_AUDIT, tables):
+        ecrire_snapshot(table, nom, dossier)
+    return tables
+
+def main():
+    from pipeline.ingestion import completer_manifeste
+
+    parser = argparse.ArgumentParser(description="Audit des règles de la carte scolaire contre les polygones des secteurs")
+    parser.add_argument('--version', default=None, help="Version à auditer (par défaut : la version active)")
+    parser.add_argument('--sans-geocodage', action='store_true', help="Cache de géocodage uniquement (sans appel à l'API BAN)")
+    args = parser.parse_args()
+
+    version = args.version or version_courante()
+    if version is None:
+        raise SystemExit("Aucune version active : lancer d'abord python -m pipeline.ingestion --geometries")
+    dossier = dossier_version(version)
+    debut = time.perf_counter()
+    tables = auditer_version(dossier, geocoder=not args.sans_geocodage)
+    if tables is None:
+        raise SystemExit(f"La version {version} n'a pas de polygones (ingestion sans --geometries)")
+    completer_manifeste(dossier, TABLES_AUDIT)
+    etablissements, _ = tables
+    print(f"Version {version} : {int(etablissements['regles'].sum())} règles auditées, "
+          f"{int(etablissements['hors_secteur'].sum())} hors du polygone de leur établissement "
+          f"({time.perf_counter() - debut:.1f} s)")
+
+if __name__ == "__main__":
+    main()
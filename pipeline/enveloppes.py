@@ -0,0 +1,61 @@
+"""
+Calcul par lot des aires de recrutement (enveloppes concaves, voir utils.enveloppes)
+de tous les établissements d'une version.
+
+Les voies distinctes des secteurs (instantané adresses_etablissements) sont géocodées
+par l'API BAN, avec cache (pipeline.geocodage) ; une règle sans voie (commune entière),
+une voie non trouvée ou un lot en échec est placé au centroïde de sa commune (table
+communes_geo). Avec --sans-geocodage, seul le cache est utilisé (calcul hors ligne).
+
+L'instantané enveloppes est écrit dans le dossier de la version et ajouté à son
+manifeste.
+
+Usage : python -m pipeline.enveloppes [--version <version>] [--sans-geocodage]
+"""
+import argparse
+
+import numpy as np
+
+from pipeline.geocodage import positionner
+from utils.enveloppes import construire_enveloppes
+from utils.snapshot import dossier_version, ecrire_snapshot, lire_snapshot, version_courante
+
+def points_secteurs(adresses, index, communes_geo, geocoder=True):
+    """Un point par adresse de secteur : code_rne, latitude, longitude"""
+    longueurs = (index['fin'] - index['debut']).to_numpy()
+    points = adresses.iloc[np.concatenate([np.arange(d, f) for d, f in zip(index['debut'], index['fin'])] or [[]]).astype(int)]
+    points = points.assign(code_rne=np.repeat(index.index.astype(str).to_numpy(), longueurs)).reset_index(drop=True)
+    return positionner(points, communes_geo, geocoder)[['code_rne', 'latitude', 'longitude']]
+
+def calculer_enveloppes(dossier, geocoder=True):
+    """Écrit l'instantané enveloppes d'une version ; renvoie la table"""
+    index = lire_snapshot('index_etablissements', dossier=dossier).set_index('code_rne')
+    points = points_secteurs(
+        lire_snapshot('adresses_etablissements', dossier=dossier),
+        index,
+        lire_snapshot('communes_geo', dossier=dossier).set_index('code_insee'),
+        geocoder,
+    )
+    enveloppes = construire_enveloppes(points)
+    ecrire_snapshot(enveloppes, 'enveloppes', dossier)
+    return enveloppes
+
+def main():
+    from pipeline.ingestion import completer_manifeste
+
+    parser = argparse.ArgumentParser(description="Calcul des aires de recrutement (enveloppes concaves) des établissements")
+    parser.add_argument('--version', default=None, help="Version à compléter (par défaut : la version active)")
+    parser.add_argument('--sans-geocodage', action='store_true', help="Cache de géocodage et centroïdes des communes uniquement (sans appel à l'API BAN)")
+    args = parser.parse_args()
+
+    version = args.version or version_courante()
+    if version is None:
+        raise SystemExit("Aucune version active : lancer d'abord python -m pipeline.ingestion")
+    dossier = dossier_version(version)
+    enveloppes = calculer_enveloppes(dossier, geocoder=not args.sans_geocodage)
+    completer_manifeste(dossier, ['enveloppes'])
+    print(f"Version {version} : {len(enveloppes)} enveloppes, "
+          f"{int(enveloppes['points'].sum() - enveloppes['points_retenus'].sum())} points écartés")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Géocodage par lot des voies de la carte scolaire, avec cache persistant.
+
+Les voies (adresse, citycode) sont géocodées par l'API BAN (recherche CSV), par lots
+de TAILLE_LOT lignes. Chaque résultat (y compris « non trouvée », latitude NaN) est
+conservé dans DOSSIER_CACHE, partagé par toutes les versions et tous les calculs par
+lot (aires de recrutement, audit des règles) : seules les voies jamais vues sont
+envoyées à l'API. Un lot en échec (réseau, API) n'est pas mis en cache et sera
+retenté au prochain calcul.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.snapshot import chemin_snapshot, ecrire_snapshot, lire_snapshot
+
+DOSSIER_CACHE = 'datasets/geocodage'
+TAILLE_LOT = 5_000
+CLES_VOIE = ['adresse', 'citycode']
+
+def _normaliser(voies):
+    adresse = voies['adresse'].astype(object)
+    return voies.assign(
+        adresse=adresse.where(adresse.isna(), adresse.astype(str)),
+        citycode=pd.to_numeric(voies['citycode'], errors='coerce').astype('Int64'),
+    )
+
+def lire_cache():
+    """Voies déjà géocodées : adresse, citycode, latitude, longitude"""
+    if not os.path.exists(chemin_snapshot('voies', DOSSIER_CACHE)):
+        return pd.DataFrame({
+            'adresse': pd.Series(dtype=str), 'citycode': pd.Series(dtype='Int64'),
+            'latitude': pd.Series(dtype='float64'), 'longitude': pd.Series(dtype='float64'),
+        })
+    return lire_snapshot('voies', dossier=DOSSIER_CACHE)
+
+def _geocoder_lots(voies, taille_lot):
+    """Appels à l'API : positions des lots géocodés (les lots en échec sont absents)"""
+    from utils.api import geocode_addresses
+
+    resultats = []
+    for debut in range(0, len(voies), taille_lot):
+        lot = voies.iloc[debut:debut + taille_lot]
+        positions = geocode_addresses(lot)
+        if positions is None or len(positions) != len(lot):
+            print(f"Lot {debut // taille_lot + 1} non géocodé : il sera retenté au prochain calcul")
+            continue
+        resultats.append(lot[CLES_VOIE].assign(
+            latitude=positions['latitude'].to_numpy(dtype='float64'),
+            longitude=positions['longitude'].to_numpy(dtype='float64'),
+        ))
+    return resultats
+
+def geocoder_voies(voies, taille_lot=TAILLE_LOT):
+    """
+    voies : adresse, citycode, city, postcode. Renvoie les voies distinctes avec latitude et
+    longitude (NaN si non trouvée ou lot en échec), en complétant le cache.
+    """
+    voies = _normaliser(voies[voies['adresse'].notna()]).drop_duplicates(CLES_VOIE).reset_index(drop=True)
+    cache = _normaliser(lire_cache())
+    nouvelles = voies.merge(cache[CLES_VOIE], on=CLES_VOIE, how='left', indicator=True)
+    nouvelles = nouvelles[(nouvelles['_merge'] == 'left_only').to_numpy()].drop(columns='_merge')
+    if len(nouvelles):
+        resultats = _geocoder_lots(nouvelles, taille_lot)
+        if resultats:
+            cache = pd.concat([cache] + resultats, ignore_index=True)
+            ecrire_snapshot(cache, 'voies', DOSSIER_CACHE)
+        print(f"{len(voies) - len(nouvelles)} voie(s) reprise(s) du cache, {len(nouvelles)} envoyée(s) à l'API")
+    return voies.merge(cache, on=CLES_VOIE, how='left')
+
+def positionner(points, communes_geo, geocoder=True):
+    """
+    points : lignes avec adresse et citycode. Ajoute latitude et longitude : position de la
+    voie (cache ou API) ou, à défaut (commune entière, voie non trouvée), centroïde de la
+    commune. Avec geocoder=False, seul le cache est utilisé.
+    """
+    points = _normaliser(points)
+    voies = geocoder_voies(points) if geocoder else _normaliser(lire_cache())
+    positions = points[CLES_VOIE].merge(voies[CLES_VOIE + ['latitude', 'longitude']], on=CLES_VOIE, how='left')
+    latitude = positions['latitude'].to_numpy(dtype='float64', copy=True)
+    longitude = positions['longitude'].to_numpy(dtype='float64', copy=True)
+    centroides = communes_geo.reindex(points['citycode'].fillna(-1).to_numpy(dtype='int64'))
+    manquants = np.isnan(latitude)
+    latitude[manquants] = centroides['latitude'].to_numpy(dtype='float64')[manquants]
+    longitude[manquants] = centroides['longitude'].to_numpy(dtype='float64')[manquants]
+    return points.assign(latitude=latitude, longitude=longitude, geocodee=~manquants)
@@ -0,0 +1,282 @@
+"""
+Pipeline d'ingestion de la carte scolaire (remplace le notebook de nettoyage).
+
+1. Lecture en flux de l'export brut, par blocs, avec usecols et types explicites :
+   la colonne geo_shape (grosses chaînes JSON) n'est jamais lue à cette étape.
+2. Les lignes sont réparties dans une partition Arrow par département.
+3. Chaque département est nettoyé, typé et compacté dans un processus séparé.
+4. Les partitions sont assemblées en une version :
+   - tables de l'application et index ;
+   - annuaire, table des communes et IPS des établissements ;
+   - distances domicile-établissement ;
+   - grille hexagonale ;
+   - synthèse par établissement (utils.resume) ;
+   - populations et ratios par commune et par département (utils.populations) ;
+   - copie Parquet de la carte scolaire (utils.requetes) ;
+   - graphe de voisinage des secteurs (utils.graphe) ;
+   - avec --geometries : magasin de géométries (geo_shape par code_rne), polygones
+     simplifiés des secteurs (utils.polygones) et tuiles GeoJSON de la carte des
+     secteurs (pipeline.tuiles) ;
+   - avec --enveloppes : aires de recrutement (pipeline.enveloppes : géocodage BAN
+     des voies, puis enveloppes concaves) ;
+   - avec --audit : audit des règles contre les polygones (pipeline.audit).
+   Chaque artefact est accompagné de sa somme SHA-256 dans manifest.json.
+
+Usage : python -m pipeline.ingestion --brut <export.csv> [--populations <populations.csv>]
+        [--geometries] [--enveloppes] [--audit] [--processus 4]
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from pipeline.audit import auditer_version
+from pipeline.enveloppes import calculer_enveloppes
+from pipeline.tuiles import tuiler_version
+from utils.communes import construire_table_communes
+from utils.polygones import construire_polygones
+from utils.populations import CHEMIN_POPULATIONS
+from utils.data import (
+    CHEMIN_ANNUAIRE, completer_carte_scolaire, ecrire_carte_parquet, ecrire_graphe, ecrire_hexagones, ecrire_resume_etablissements,
+    ecrire_tables_carte_scolaire, ecrire_tables_distances, ecrire_tables_populations, filtrer_annuaire,
+)
+from utils.regles import compacter, developper, verifier_aller_retour
+from utils.snapshot import DOSSIER_VERSIONS, definir_version_courante, ecrire_snapshot
+
+CHEMIN_BRUT = 'datasets/EXTRAITfr-en-occitanie-carte-scolaire-des-colleges-lycees-publics (1).csv'
+
+# Colonnes conservées par le nettoyage (celles que le notebook ne supprimait pas)
+COLONNES_BRUTES = [
+    'code_region', 'libelle_region', 'code_academie', 'libelle_academie',
+    'code_departement', 'libelle_departement_eleve', 'code_postal', 'code_insee',
+    'com_name_upper', 'type_et_libelle', 'no_de_voie_debut', 'no_de_voie_fin',
+    'parite', 'code_rne', 'type_etablissement', 'numero_voie_et_cote',
+]
+# Tout est lu en texte : les conversions numériques sont faites au nettoyage
+TYPES_BRUTS = {colonne: 'str' for colonne in COLONNES_BRUTES}
+SCHEMA_PARTITION_BRUTE = pa.schema([(colonne, pa.string()) for colonne in COLONNES_BRUTES])
+
+def sha256(chemin):
+    empreinte = hashlib.sha256()
+    with open(chemin, 'rb') as f:
+        for bloc in iter(lambda: f.read(1 << 20), b''):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+def lire_par_blocs(chemin_brut, colonnes, taille_bloc):
+    return pd.read_csv(
+        chemin_brut, sep=';', encoding='utf-8-sig', usecols=colonnes,
+        dtype={c: TYPES_BRUTS.get(c, 'str') for c in colonnes}, chunksize=taille_bloc,
+    )
+
+def decouper_par_departement(chemin_brut, dossier, taille_bloc=100_000):
+    """Répartit l'export brut en une partition Arrow par département ; renvoie {departement: chemin}"""
+    os.makedirs(dossier, exist_ok=True)
+    ecrivains, chemins = {}, {}
+    try:
+        for bloc in lire_par_blocs(chemin_brut, COLONNES_BRUTES, taille_bloc):
+            # Les lignes sans établissement ne portent aucune règle de sectorisation
+            bloc = bloc[bloc['code_rne'].notna() & bloc['code_departement'].notna()]
+            for departement, lignes in bloc.groupby('code_departement', sort=False):
+                if departement not in ecrivains:
+                    chemins[departement] = os.path.join(dossier, f"dep={departement}.arrow")
+                    ecrivains[departement] = pa.ipc.new_file(chemins[departement], SCHEMA_PARTITION_BRUTE)
+                table = pa.Table.from_pandas(lignes[COLONNES_BRUTES], schema=SCHEMA_PARTITION_BRUTE, preserve_index=False)
+                ecrivains[departement].write_table(table)
+    finally:
+        for ecrivain in ecrivains.values():
+            ecrivain.close()
+    return chemins
+
+def nettoyer(df):
+    """Même nettoyage que le notebook : numéros de voie et codes en entiers (0 si absent)"""
+    for colonne in ['no_de_voie_debut', 'no_de_voie_fin', 'code_region', 'code_academie']:
+        df[colonne] = pd.to_numeric(df[colonne], errors='coerce').fillna(0).astype(int)
+    for colonne in ['code_postal', 'code_insee']:
+        df[colonne] = pd.to_numeric(df[colonne], errors='coerce')
+    return df
+
+def traiter_departement(chemin_brut, chemin_sortie):
+    """
+    Processus de travail : nettoie, type et compacte la partition d'un département.
+    La partition écrite contient les règles compactes dépliées (schéma de load_data).
+    Renvoie aussi le nombre de lignes brutes par établissement (comparé par le rafraîchissement).
+    """
+    brut = feather.read_table(chemin_brut).to_pandas()
+    comptages = brut.groupby(['code_departement', 'code_rne']).size().rename('lignes').reset_index()
+    df = completer_carte_scolaire(nettoyer(brut))
+    regles, communes, etablissements = compacter(df)
+    verifier_aller_retour(df, regles, communes, etablissements)
+    compact = developper(regles, communes, etablissements)
+    feather.write_feather(compact, chemin_sortie, compression='uncompressed')
+    return chemin_sortie, comptages, len(compact)
+
+def traiter_partitions(partitions_brutes, dossier_partitions, processus=None):
+    """Nettoie et compacte les partitions brutes en parallèle (un processus par département)"""
+    os.makedirs(dossier_partitions, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=processus) as executeur:
+        taches = [
+            executeur.submit(traiter_departement, chemin, os.path.join(dossier_partitions, os.path.basename(chemin)))
+            for chemin in partitions_brutes.values()
+        ]
+        return [tache.result() for tache in taches]
+
+def extraire_geometries(chemin_brut, taille_bloc=20_000):
+    """Magasin de géométries : les geo_shape (GeoJSON) distincts de chaque code_rne, lus dans une passe séparée"""
+    geometries = pd.concat([
+        bloc.dropna().drop_duplicates()
+        for bloc in lire_par_blocs(chemin_brut, ['code_rne', 'geo_shape'], taille_bloc)
+    ], ignore_index=True)
+    return geometries.drop_duplicates().sort_values('code_rne', kind='stable').reset_index(drop=True)
+
+def extraire_ips(chemin_brut, taille_bloc=100_000):
+    """Indice de position sociale (ips_etablissement) par code_rne"""
+    ips = pd.concat([
+        bloc.dropna().drop_duplicates('code_rne')
+        for bloc in lire_par_blocs(chemin_brut, ['code_rne', 'ips_etablissement'], taille_bloc)
+    ], ignore_index=True).drop_duplicates('code_rne')
+    ips['ips_etablissement'] = pd.to_numeric(ips['ips_etablissement'].str.replace(',', '.'), errors='coerce').astype('float32')
+    return ips.dropna().sort_values('code_rne').reset_index(drop=True)
+
+def lire_partitions(dossier_partitions):
+    """Concatène les partitions départementales nettoyées"""
+    df = pd.concat([
+        feather.read_feather(os.path.join(dossier_partitions, nom))
+        for nom in sorted(os.listdir(dossier_partitions)) if nom.endswith('.arrow')
+    ], ignore_index=True)
+    # Les catégories diffèrent d'une partition à l'autre : retour au texte avant de réappliquer le schéma
+    df = df.astype({c: object for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+    return completer_carte_scolaire(df)
+
+def ecrire_manifeste(dossier_version, version, sources, informations):
+    artefacts = {}
+    for racine, _, fichiers in os.walk(dossier_version):
+        for nom in sorted(fichiers):
+            if nom == 'manifest.json':
+                continue
+            chemin = os.path.join(racine, nom)
+            artefacts[os.path.relpath(chemin, dossier_version)] = {
+                'sha256': sha256(chemin),
+                'octets': os.path.getsize(chemin),
+            }
+    manifeste = {
+        'version': version,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'sources': {chemin: sha256(chemin) for chemin in sources if os.path.exists(chemin)},
+        'artefacts': artefacts,
+        **informations,
+    }
+    with open(os.path.join(dossier_version, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifeste, f, ensure_ascii=False, indent=2)
+    return manifeste
+
+def completer_manifeste(dossier_version, noms):
+    """Ajoute au manifeste d'une version les instantanés produits après l'ingestion (calculs par lot)"""
+    chemin_manifeste = os.path.join(dossier_version, 'manifest.json')
+    with open(chemin_manifeste, encoding='utf-8') as f:
+        manifeste = json.load(f)
+    for nom in noms:
+        chemin = os.path.join(dossier_version, f"{nom}.arrow")
+        manifeste['artefacts'][f"{nom}.arrow"] = {'sha256': sha256(chemin), 'octets': os.path.getsize(chemin)}
+    with open(chemin_manifeste, 'w', encoding='utf-8') as f:
+        json.dump(manifeste, f, ensure_ascii=False, indent=2)
+    return manifeste
+
+def verifier_version(dossier_version):
+    """Recalcule les sommes SHA-256 des artefacts ; lève une ValueError en cas d'écart"""
+    with open(os.path.join(dossier_version, 'manifest.json'), encoding='utf-8') as f:
+        manifeste = json.load(f)
+    for nom, attendu in manifeste['artefacts'].items():
+        if sha256(os.path.join(dossier_version, nom)) != attendu['sha256']:
+            raise ValueError(f"Artefact corrompu : {nom}")
+    return manifeste
+
+def assembler_carte_scolaire(dossier_version, comptages):
+    """Écrit les tables de l'application à partir des partitions nettoyées de la version"""
+    df = lire_partitions(os.path.join(dossier_version, 'partitions'))
+    ecrire_snapshot(comptages, 'comptages_carte_scolaire', dossier_version)
+    return ecrire_tables_carte_scolaire(df, dossier_version)
+
+def ingerer(chemin_brut=CHEMIN_BRUT, chemin_annuaire=CHEMIN_ANNUAIRE, avec_geometries=False,
+            processus=None, taille_bloc=100_000, activer=True, avec_enveloppes=False, avec_audit=False,
+            chemin_populations=CHEMIN_POPULATIONS):
+    """Produit une nouvelle version complète des artefacts et l'active ; renvoie son manifeste"""
+    debut = time.perf_counter()
+    empreinte = hashlib.sha256(''.join(sha256(c) for c in [chemin_brut, chemin_annuaire]).encode()).hexdigest()
+    version = f"{datetime.now():%Y%m%d-%H%M%S}-{empreinte[:8]}"
+    dossier_version = os.path.join(DOSSIER_VERSIONS, version)
+    dossier_brut = os.path.join(dossier_version, '_brut')
+    dossier_partitions = os.path.join(dossier_version, 'partitions')
+
+    partitions_brutes = decouper_par_departement(chemin_brut, dossier_brut, taille_bloc)
+    resultats = traiter_partitions(partitions_brutes, dossier_partitions, processus)
+    shutil.rmtree(dossier_brut)
+    comptages = pd.concat([comptage for _, comptage, _ in resultats], ignore_index=True)
+
+    df = assembler_carte_scolaire(dossier_version, comptages)
+    annuaire_brut = pd.read_csv(chemin_annuaire, sep=';', low_memory=False)
+    ecrire_snapshot(filtrer_annuaire(annuaire_brut), 'annuaire', dossier_version)
+    ecrire_snapshot(construire_table_communes(annuaire_brut), 'communes_geo', dossier_version)
+    ecrire_snapshot(extraire_ips(chemin_brut), 'ips_etablissements', dossier_version)
+    ecrire_tables_distances(dossier_version)
+    ecrire_hexagones(dossier_version)
+    ecrire_resume_etablissements(dossier_version)
+    ecrire_tables_populations(dossier_version, chemin_populations)
+    ecrire_carte_parquet(dossier_version)
+    if avec_geometries:
+        geometries = extraire_geometries(chemin_brut)
+        ecrire_snapshot(geometries, 'geometries', dossier_version)
+        ecrire_snapshot(construire_polygones(geometries), 'polygones', dossier_version)
+        tuiler_version(version)
+    ecrire_graphe(dossier_version)
+    if avec_enveloppes:
+        calculer_enveloppes(dossier_version)
+    if avec_audit:
+        auditer_version(dossier_version)
+    manifeste = ecrire_manifeste(dossier_version, version, [chemin_brut, chemin_annuaire, chemin_populations], {
+        'lignes_brutes': int(comptages['lignes'].sum()),
+        'lignes_compactes': len(df),
+        'departements': sorted(partitions_brutes),
+        'duree_secondes': round(time.perf_counter() - debut, 2),
+        # Point de départ du rafraîchissement incrémental (pipeline.rafraichissement)
+        'etat_sources': {
+            'annuaire_date_maj': str(annuaire_brut['date_maj_ligne'].max()),
+            'carte_scolaire_modifiee': None,
+            # Populations légales utilisées pour les ratios, reprises à chaque rafraîchissement
+            'populations': chemin_populations,
+        },
+    })
+    if activer:
+        definir_version_courante(version)
+    return manifeste
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion de la carte scolaire en artefacts versionnés")
+    parser.add_argument('--brut', default=CHEMIN_BRUT, help="Export CSV brut de la carte scolaire")
+    parser.add_argument('--annuaire', default=CHEMIN_ANNUAIRE, help="Export CSV de l'annuaire de l'éducation")
+    parser.add_argument('--populations', default=CHEMIN_POPULATIONS, help="Populations légales des communes (INSEE), facultatif")
+    parser.add_argument('--geometries', action='store_true', help="Extraire aussi les geo_shape et les polygones simplifiés par établissement")
+    parser.add_argument('--enveloppes', action='store_true', help="Calculer aussi les aires de recrutement (géocodage BAN des voies des secteurs)")
+    parser.add_argument('--audit', action='store_true', help="Auditer aussi les règles contre les polygones (avec --geometries)")
+    parser.add_argument('--processus', type=int, default=None, help="Nombre de processus de travail")
+    parser.add_argument('--taille-bloc', type=int, default=100_000, help="Nombre de lignes lues par bloc")
+    parser.add_argument('--sans-activer', action='store_true', help="Ne pas activer la nouvelle version")
+    args = parser.parse_args()
+
+    manifeste = ingerer(args.brut, args.annuaire, args.geometries, args.processus, args.taille_bloc,
+                        activer=not args.sans_activer, avec_enveloppes=args.enveloppes, avec_audit=args.audit,
+                        chemin_populations=args.populations)
+    print(f"Version {manifeste['version']} : {manifeste['lignes_brutes']} lignes -> "
+          f"{manifeste['lignes_compactes']} règles, {len(manifeste['departements'])} départements, "
+          f"{manifeste['duree_secondes']} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Rafraîchissement incrémental de la version active à partir de l'API Opendatasoft.
+
+- Annuaire : seules les lignes dont date_maj_ligne est égale ou postérieure à la
+  plus récente date déjà appliquée sont téléchargées (filtre where de l'export),
+  puis appliquées en upsert. Les lignes de ce jour-là sont donc relues : une
+  modification faite plus tard le même jour n'est pas manquée, et l'upsert étant
+  idempotent, un annuaire inchangé ne produit pas de nouvelle version. Les
+  établissements disparus de la source sont détectés à partir de la seule liste
+  des identifiants et supprimés.
+- Carte scolaire : la source n'a pas de date de modification par ligne. La date
+  de modification du jeu de données (métadonnées) indique s'il a changé ; le cas
+  échéant, le nombre de lignes par (département, établissement) est comparé aux
+  comptages de la version active et seuls les départements qui diffèrent sont
+  téléchargés et recompactés.
+
+La nouvelle version réutilise (liens physiques) les partitions et artefacts
+inchangés de la version active, puis est activée. Les ratios par habitant sont
+recalculés avec le fichier de populations donné à l'ingestion (etat_sources).
+
+Usage : python -m pipeline.rafraichissement [--processus 4] [--sans-activer]
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from io import StringIO
+
+import pandas as pd
+import requests
+
+from pipeline.audit import auditer_version
+from pipeline.ingestion import (
+    COLONNES_BRUTES, assembler_carte_scolaire, decouper_par_departement, ecrire_manifeste,
+    traiter_partitions, verifier_version,
+)
+from pipeline.tuiles import tuiler_version
+from utils.data import (
+    TABLES_CARTE_SCOLAIRE, ecrire_carte_parquet, ecrire_graphe, ecrire_hexagones, ecrire_resume_etablissements,
+    ecrire_tables_distances, ecrire_tables_populations, filtrer_annuaire,
+)
+from utils.schema import SCHEMA_ANNUAIRE, appliquer_schema
+from utils.snapshot import DOSSIER_VERSIONS, definir_version_courante, ecrire_snapshot, lire_snapshot, version_courante
+
+URL_API = "https://data.occitanie.education.gouv.fr/api/explore/v2.1/catalog/datasets"
+JEU_ANNUAIRE = 'fr-en-annuaire-education'
+JEU_CARTE_SCOLAIRE = 'fr-en-occitanie-carte-scolaire-des-colleges-lycees-publics'
+# Périmètre de l'annuaire local (établissements de la région Occitanie)
+FILTRE_ANNUAIRE = 'code_region="76"'
+IDENTIFIANT_ANNUAIRE = 'Identifiant_de_l_etablissement'
+ARTEFACTS_CARTE_SCOLAIRE = TABLES_CARTE_SCOLAIRE + ['comptages_carte_scolaire']
+
+def _get(compteur, chemin, params=None):
+    """Appel à l'API ; compteur['octets'] cumule le volume téléchargé"""
+    response = requests.get(f"{URL_API}/{chemin}", params=params, timeout=60)
+    response.raise_for_status()
+    compteur['octets'] += len(response.content)
+    return response
+
+def metadonnees(compteur, jeu):
+    return _get(compteur, jeu).json()
+
+def export_csv(compteur, jeu, **params):
+    return _get(compteur, f"{jeu}/exports/csv", {'delimiter': ';', **params}).text
+
+def export_json(compteur, jeu, **params):
+    return _get(compteur, f"{jeu}/exports/json", params).json()
+
+def _lier_ou_copier(source, destination):
+    """Réutilise un artefact immuable de la version précédente sans le recopier si possible"""
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+def _reprendre_artefacts(dossier_source, dossier_cible, noms):
+    for nom in noms:
+        chemin = os.path.join(dossier_source, f"{nom}.arrow")
+        if os.path.exists(chemin):
+            _lier_ou_copier(chemin, os.path.join(dossier_cible, f"{nom}.arrow"))
+
+def _concatener(reference, extrait):
+    """
+    Concatène un extrait lu séparément à un DataFrame de référence : colonnes numériques
+    converties comme dans la référence, catégories et colonnes texte ramenées en texte.
+    """
+    extrait = extrait.copy()
+    for colonne in extrait.columns.intersection(reference.columns):
+        if pd.api.types.is_numeric_dtype(reference[colonne].dtype):
+            extrait[colonne] = pd.to_numeric(extrait[colonne], errors='coerce')
+    df = pd.concat([reference, extrait], ignore_index=True)
+    df = df.astype({c: object for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+    for colonne in df.columns[df.dtypes == object]:
+        df[colonne] = df[colonne].where(df[colonne].isna(), df[colonne].astype(str))
+    return df
+
+def _identiques(a, b):
+    """Même annuaire, à l'ordre des lignes près"""
+    if sorted(a.columns) != sorted(b.columns) or len(a) != len(b):
+        return False
+    a = a[sorted(a.columns)].sort_values(IDENTIFIANT_ANNUAIRE, kind='stable').reset_index(drop=True)
+    b = b[sorted(b.columns)].sort_values(IDENTIFIANT_ANNUAIRE, kind='stable').reset_index(drop=True)
+    return a.astype(str).equals(b.astype(str))
+
+def rafraichir_annuaire(compteur, annuaire, date_maj):
+    """
+    Applique à l'annuaire filtré les lignes modifiées depuis date_maj, ce jour compris
+    (upsert), et supprime les établissements absents de la source. Renvoie (annuaire,
+    résumé) ; annuaire vaut None si rien n'a changé.
+    """
+    modifiees = pd.read_csv(StringIO(export_csv(
+        compteur, JEU_ANNUAIRE, where=f"{FILTRE_ANNUAIRE} and date_maj_ligne >= date'{date_maj}'", use_labels='true',
+    )), sep=';', low_memory=False)
+    identifiants = pd.read_csv(StringIO(export_csv(
+        compteur, JEU_ANNUAIRE, where=FILTRE_ANNUAIRE, select='identifiant_de_l_etablissement', use_labels='true',
+    )), sep=';')[IDENTIFIANT_ANNUAIRE]
+
+    locaux = annuaire[IDENTIFIANT_ANNUAIRE].astype(str)
+    supprimes = ~locaux.isin(identifiants.astype(str))
+    remplaces = locaux.isin(modifiees[IDENTIFIANT_ANNUAIRE].astype(str))
+    resume = {
+        'lignes_modifiees': len(modifiees),
+        'suppressions': int(supprimes.sum()),
+        'date_maj': str(modifiees['date_maj_ligne'].max()) if len(modifiees) else date_maj,
+    }
+    if modifiees.empty and not supprimes.any():
+        return None, resume
+
+    # Upsert : les lignes modifiées remplacent les anciennes, puis repassent par le filtre
+    # de l'application (un établissement fermé disparaît ainsi de l'annuaire)
+    conserves = annuaire[~(supprimes | remplaces).to_numpy()]
+    nouveaux = filtrer_annuaire(modifiees) if len(modifiees) else modifiees
+    rafraichi = appliquer_schema(_concatener(conserves, nouveaux), SCHEMA_ANNUAIRE)
+    # Lignes du dernier jour déjà appliquées, relues telles quelles : rien n'a changé
+    if not supprimes.any() and _identiques(rafraichi, appliquer_schema(_concatener(annuaire, annuaire.iloc[:0]), SCHEMA_ANNUAIRE)):
+        return None, resume
+    return rafraichi, resume
+
+def departements_modifies(compteur, comptages):
+    """Départements dont le nombre de lignes par établissement diffère de la version active"""
+    distants = pd.DataFrame(export_json(
+        compteur, JEU_CARTE_SCOLAIRE, select='code_departement, code_rne, count(*) as lignes',
+        group_by='code_departement, code_rne', where='code_rne is not null',
+    ), columns=['code_departement', 'code_rne', 'lignes'])
+    cles = ['code_departement', 'code_rne']
+    comparaison = comptages.astype({c: str for c in cles}).merge(
+        distants.astype({c: str for c in cles}), on=cles, how='outer', suffixes=('_local', '_distant'),
+    )
+    differents = comparaison['lignes_local'] != comparaison['lignes_distant']
+    return (set(comparaison.loc[differents, 'code_departement']),
+            set(distants['code_departement'].astype(str)), distants)
+
+def rafraichir(processus=None, activer=True):
+    """
+    Produit une nouvelle version à partir de la version active et des seules
+    modifications de la source ; renvoie son manifeste, ou None si tout est à jour.
+    """
+    debut = time.perf_counter()
+    ancienne = version_courante()
+    if ancienne is None:
+        raise RuntimeError("Aucune version active : lancer d'abord python -m pipeline.ingestion")
+    dossier_ancien = os.path.join(DOSSIER_VERSIONS, ancienne)
+    manifeste_ancien = verifier_version(dossier_ancien)
+    etat = dict(manifeste_ancien.get('etat_sources', {}))
+    compteur = {'octets': 0}
+
+    # Annuaire : upserts et suppressions
+    annuaire, resume_annuaire = rafraichir_annuaire(
+        compteur, lire_snapshot('annuaire', dossier=dossier_ancien), etat['annuaire_date_maj'],
+    )
+    etat['annuaire_date_maj'] = resume_annuaire['date_maj']
+
+    # Carte scolaire : départements modifiés d'après les métadonnées puis les comptages
+    modifiee = metadonnees(compteur, JEU_CARTE_SCOLAIRE)['metas']['default'].get('modified')
+    a_reconstruire, departements, comptages_distants = set(), set(manifeste_ancien['departements']), None
+    if modifiee != etat.get('carte_scolaire_modifiee'):
+        comptages = lire_snapshot('comptages_carte_scolaire', dossier=dossier_ancien)
+        a_reconstruire, departements, comptages_distants = departements_modifies(compteur, comptages)
+        if not a_reconstruire and etat.get('carte_scolaire_modifiee') is not None:
+            # Modification sans effet sur les comptages (ex. renumérotation) : tout est relu
+            a_reconstruire = departements
+    etat['carte_scolaire_modifiee'] = modifiee
+
+    if annuaire is None and not a_reconstruire:
+        print(f"Version {ancienne} à jour ({compteur['octets'] / 1e3:.1f} ko téléchargés)")
+        return None
+
+    empreinte = hashlib.sha256(json.dumps([ancienne, etat, sorted(a_reconstruire)]).encode()).hexdigest()
+    version = f"{datetime.now():%Y%m%d-%H%M%S}-{empreinte[:8]}"
+    dossier_version = os.path.join(DOSSIER_VERSIONS, version)
+    dossier_partitions = os.path.join(dossier_version, 'partitions')
+    for departement in departements - a_reconstruire:
+        nom = f"dep={departement}.arrow"
+        _lier_ou_copier(os.path.join(dossier_ancien, 'partitions', nom), os.path.join(dossier_partitions, nom))
+
+    if a_reconstruire:
+        # Seuls les départements modifiés sont téléchargés (sans geo_shape) et recompactés
+        dossier_brut = os.path.join(dossier_version, '_brut')
+        partitions_brutes = {}
+        for departement in sorted(a_reconstruire & departements):
+            chemin_csv = os.path.join(dossier_brut, f"dep={departement}.csv")
+            os.makedirs(dossier_brut, exist_ok=True)
+            with open(chemin_csv, 'w', encoding='utf-8') as f:
+                f.write(export_csv(
+                    compteur, JEU_CARTE_SCOLAIRE, select=', '.join(COLONNES_BRUTES), where=f'code_departement="{departement}"',
+                ))
+            partitions_brutes.update(decouper_par_departement(chemin_csv, os.path.join(dossier_brut, 'partitions')))
+        resultats = traiter_partitions(partitions_brutes, dossier_partitions, processus)
+        shutil.rmtree(dossier_brut, ignore_errors=True)
+        comptages = pd.concat(
+            [comptages_distants[~comptages_distants['code_departement'].astype(str).isin(partitions_brutes)]]
+            + [comptage for _, comptage, _ in resultats], ignore_index=True,
+        )
+        df = assembler_carte_scolaire(dossier_version, comptages[['code_departement', 'code_rne', 'lignes']])
+        lignes_compactes = len(df)
+    else:
+        _reprendre_artefacts(dossier_ancien, dossier_version, ARTEFACTS_CARTE_SCOLAIRE)
+        lignes_compactes = manifeste_ancien['lignes_compactes']
+
+    if annuaire is None:
+        _reprendre_artefacts(dossier_ancien, dossier_version, ['annuaire'])
+    else:
+        ecrire_snapshot(annuaire, 'annuaire', dossier_version)
+    # Les géométries et leurs polygones simplifiés, l'IPS (publié une fois par an), la table des communes (positions
+    # issues de l'annuaire complet, dont seul l'extrait filtré est rafraîchi) et les aires de recrutement
+    # (géocodage par lot : python -m pipeline.enveloppes pour les recalculer) sont reprises de la version active
+    _reprendre_artefacts(dossier_ancien, dossier_version, ['geometries', 'polygones', 'ips_etablissements', 'communes_geo', 'enveloppes'])
+    # Les tuiles de la carte des secteurs sont produites pour la nouvelle version
+    tuiler_version(version)
+    # Les distances, la grille, la synthèse par établissement, les ratios par habitant et la copie Parquet dépendent
+    # de la carte scolaire et de l'annuaire : ils sont recalculés
+    ecrire_tables_distances(dossier_version)
+    ecrire_hexagones(dossier_version)
+    ecrire_resume_etablissements(dossier_version)
+    ecrire_tables_populations(dossier_version, etat.get('populations'))
+    ecrire_carte_parquet(dossier_version)
+    ecrire_graphe(dossier_version)
+    # L'audit des règles, s'il a été produit, suit la carte scolaire (voies déjà géocodées reprises du cache)
+    if os.path.exists(os.path.join(dossier_ancien, 'audit_etablissements.arrow')):
+        auditer_version(dossier_version)
+
+    comptages = lire_snapshot('comptages_carte_scolaire', dossier=dossier_version)
+    manifeste = ecrire_manifeste(dossier_version, version, [], {
+        'parent': ancienne,
+        'lignes_brutes': int(comptages['lignes'].sum()),
+        'lignes_compactes': lignes_compactes,
+        'departements': sorted(comptages['code_departement'].astype(str).unique()),
+        'departements_reconstruits': sorted(a_reconstruire & departements),
+        'annuaire': resume_annuaire,
+        'octets_telecharges': compteur['octets'],
+        'duree_secondes': round(time.perf_counter() - debut, 2),
+        'etat_sources': etat,
+    })
+    if activer:
+        definir_version_courante(version)
+    return manifeste
+
+def main():
+    parser = argparse.ArgumentParser(description="Rafraîchissement incrémental de la version active")
+    parser.add_argument('--processus', type=int, default=None, help="Nombre de processus de travail")
+    parser.add_argument('--sans-activer', action='store_true', help="Ne pas activer la nouvelle version")
+    args = parser.parse_args()
+
+    manifeste = rafraichir(args.processus, activer=not args.sans_activer)
+    if manifeste:
+        print(f"Version {manifeste['version']} (depuis {manifeste['parent']}) : "
+              f"{manifeste['annuaire']['lignes_modifiees']} lignes d'annuaire modifiées, "
+              f"{manifeste['annuaire']['suppressions']} supprimées, "
+              f"départements reconstruits : {', '.join(manifeste['departements_reconstruits']) or 'aucun'}, "
+              f"{manifeste['octets_telecharges'] / 1e3:.1f} ko téléchargés, {manifeste['duree_secondes']} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Découpage hors ligne des polygones de secteurs en tuiles GeoJSON z/x/y.
+
+Les polygones fusionnés par établissement (instantané polygones, voir
+utils.polygones) sont découpés selon la grille des tuiles Web Mercator, pour
+chaque zoom de ZOOMS_TUILES, au niveau de détail adapté à ce zoom. Une pyramide
+est écrite par type d'établissement dans static/tuiles/<version>/<type>/z/x/y.geojson,
+servie par Streamlit (server.enableStaticServing) : la carte ne charge que les
+tuiles visibles, sans service de tuiles ou de fond de carte externe.
+
+index.json décrit la pyramide : zooms, types et emprise de chaque département.
+
+Usage : python -m pipeline.tuiles [--version <version>]
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+from utils.polygones import DOSSIER_TUILES, decoder, niveau_pour_zoom
+from utils.snapshot import chemin_snapshot, dossier_version, lire_snapshot, version_courante
+
+ZOOMS_TUILES = range(6, 13)
+TYPES_TUILES = {'COLLEGE': 'college', 'LYCEE': 'lycee'}
+# Palette qualitative : couleur stable d'un établissement d'une version à l'autre
+PALETTE = [
+    '#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b',
+    '#e377c2', '#7f7f7f', '#bcbd22', '#17becf', '#393b79', '#637939',
+]
+
+def couleur(code_rne):
+    return PALETTE[int(hashlib.md5(code_rne.encode()).hexdigest(), 16) % len(PALETTE)]
+
+def tuile(longitude, latitude, zoom):
+    """Indices (x, y) des tuiles Web Mercator contenant les points"""
+    n = 2 ** zoom
+    lat = np.radians(np.clip(np.asarray(latitude, dtype='float64'), -85.0511, 85.0511))
+    x = np.floor((np.asarray(longitude, dtype='float64') + 180) / 360 * n)
+    y = np.floor((1 - np.arcsinh(np.tan(lat)) / np.pi) / 2 * n)
+    return np.clip(x, 0, n - 1).astype(int), np.clip(y, 0, n - 1).astype(int)
+
+def emprise_tuile(x, y, zoom):
+    """(lon_min, lat_min, lon_max, lat_max) d'une tuile"""
+    n = 2 ** zoom
+    def latitude(y):
+        return np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y / n))))
+    return x / n * 360 - 180, latitude(y + 1), (x + 1) / n * 360 - 180, latitude(y)
+
+def decouper(entites, zoom):
+    """
+    entites : liste de (propriétés, géométrie shapely). Renvoie {(x, y): [features GeoJSON]}
+    avec la partie de chaque géométrie qui tombe dans la tuile.
+    """
+    import shapely
+
+    tuiles = {}
+    for proprietes, geometrie in entites:
+        lon_min, lat_min, lon_max, lat_max = geometrie.bounds
+        x_min, y_max = tuile(lon_min, lat_min, zoom)
+        x_max, y_min = tuile(lon_max, lat_max, zoom)
+        for x in range(int(x_min), int(x_max) + 1):
+            for y in range(int(y_min), int(y_max) + 1):
+                emprise = emprise_tuile(x, y, zoom)
+                # Légère marge : pas de liseré visible entre deux tuiles voisines
+                marge = (emprise[2] - emprise[0]) / 256
+                morceau = shapely.clip_by_rect(geometrie, emprise[0] - marge, emprise[1] - marge,
+                                               emprise[2] + marge, emprise[3] + marge)
+                if morceau.is_empty:
+                    continue
+                morceau = shapely.transform(morceau, lambda coordonnees: np.round(coordonnees, 5))
+                tuiles.setdefault((x, y), []).append({
+                    'type': 'Feature',
+                    'geometry': json.loads(shapely.to_geojson(morceau)),
+                    'properties': proprietes,
+                })
+    return tuiles
+
+def generer_tuiles(polygones, etablissements, noms, dossier):
+    """
+    Écrit les pyramides de tuiles (une par type d'établissement) dans dossier et
+    index.json ; renvoie l'index. noms : dictionnaire code_rne -> nom de l'établissement.
+    """
+    from shapely.geometry import shape
+
+    types = dict(zip(etablissements['code_rne'].astype(str), etablissements['type_etablissement'].astype(str)))
+    dossier_tmp = f"{dossier}.{os.getpid()}.tmp"
+    shutil.rmtree(dossier_tmp, ignore_errors=True)
+    emprises, nombre = {}, 0
+    for zoom in ZOOMS_TUILES:
+        niveau = niveau_pour_zoom(zoom)
+        selection = polygones[polygones['niveau'] == niveau]
+        entites = {type_: [] for type_ in TYPES_TUILES.values()}
+        for code_rne, structure, coordonnees in zip(selection['code_rne'], selection['structure'], selection['coordonnees']):
+            type_ = TYPES_TUILES.get(types.get(code_rne))
+            if type_ is None:
+                continue
+            departement = code_rne[:3].lstrip('0')
+            geometrie = shape(decoder(structure, coordonnees))
+            entites[type_].append(({
+                'code_rne': code_rne, 'nom': noms.get(code_rne, code_rne),
+                'departement': departement, 'couleur': couleur(code_rne),
+            }, geometrie))
+            if zoom == ZOOMS_TUILES[0]:
+                lon_min, lat_min, lon_max, lat_max = geometrie.bounds
+                emprise = emprises.get(departement, [lon_min, lat_min, lon_max, lat_max])
+                emprises[departement] = [min(emprise[0], lon_min), min(emprise[1], lat_min),
+                                         max(emprise[2], lon_max), max(emprise[3], lat_max)]
+        for type_, liste in entites.items():
+            for (x, y), features in decouper(liste, zoom).items():
+                chemin = os.path.join(dossier_tmp, type_, str(zoom), str(x), f"{y}.geojson")
+                os.makedirs(os.path.dirname(chemin), exist_ok=True)
+                with open(chemin, 'w', encoding='utf-8') as f:
+                    json.dump({'type': 'FeatureCollection', 'features': features}, f, ensure_ascii=False, separators=(',', ':'))
+                nombre += 1
+    index = {
+        'zooms': [ZOOMS_TUILES[0], ZOOMS_TUILES[-1]],
+        'types': list(TYPES_TUILES.values()),
+        'departements': dict(sorted(emprises.items())),
+        'tuiles': nombre,
+    }
+    os.makedirs(dossier_tmp, exist_ok=True)
+    with open(os.path.join(dossier_tmp, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    # Remplacement en bloc : le navigateur ne voit jamais une pyramide incomplète
+    shutil.rmtree(dossier, ignore_errors=True)
+    os.replace(dossier_tmp, dossier)
+    return index
+
+def tuiler_version(version):
+    """Produit les tuiles d'une version du pipeline ; renvoie l'index, ou None sans polygones"""
+    dossier = dossier_version(version)
+    if not os.path.exists(chemin_snapshot('polygones', dossier)):
+        return None
+    annuaire = lire_snapshot('annuaire', columns=['Identifiant_de_l_etablissement', 'Nom_etablissement'], dossier=dossier)
+    return generer_tuiles(
+        lire_snapshot('polygones', dossier=dossier),
+        lire_snapshot('etablissements', dossier=dossier),
+        dict(zip(annuaire['Identifiant_de_l_etablissement'].astype(str), annuaire['Nom_etablissement'].astype(str))),
+        os.path.join(DOSSIER_TUILES, version),
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Découpage des polygones de secteurs en tuiles GeoJSON")
+    parser.add_argument('--version', default=None, help="Version à découper (par défaut : la version active)")
+    args = parser.parse_args()
+
+    version = args.version or version_courante()
+    if version is None:
+        raise SystemExit("Aucune version active : lancer d'abord python -m pipeline.ingestion --geometries")
+    index = tuiler_version(version)
+    if index is None:
+        raise SystemExit(f"La version {version} n'a pas de polygones (ingestion sans --geometries)")
+    print(f"Version {version} : {index['tuiles']} tuiles (zooms {index['zooms'][0]} à {index['zooms'][1]})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Résolution d'adresse saisie (utils.adresses) sur un extrait de carte scolaire de l'Ariège,
+dont les codes postaux commencent par 0.
+
+Usage : python -m pytest tests
+"""
+import pandas as pd
+import pytest
+
+from utils.adresses import analyser_adresse, construire_index_adresses, resoudre_adresse
+
+@pytest.fixture(scope='module')
+def index():
+    carte = pd.DataFrame({
+        'code_insee': pd.array([9032, 9122, 9122, 9122], dtype='Int32'),
+        'code_postal': pd.array([9110, 9000, 9000, 9000], dtype='Int32'),
+        'com_name_upper': ['AX-LES-THERMES', 'FOIX', 'FOIX', 'FOIX'],
+        'ville_recherche': ['AX-LES-THERMES (ARIEGE)', 'FOIX (ARIEGE)', 'FOIX (ARIEGE)', 'FOIX (ARIEGE)'],
+        'type_et_libelle': [None, 'RUE DE LA PAIX', 'RUE JEAN JAURES', None],
+    }).astype({'com_name_upper': 'category', 'ville_recherche': 'category', 'type_et_libelle': 'category'})
+    return construire_index_adresses(carte)
+
+def test_code_postal_zero_initial(index):
+    assert index['codes_postaux']['09000'] == {9122}
+    resultat = resoudre_adresse(index, "12 rue de la Paix 09000")
+    assert resultat['statut'] == 'trouvee'
+    assert (resultat['code_insee'], resultat['voie']) == (9122, 'RUE DE LA PAIX')
+
+def test_commune_sans_voie_par_code_postal(index):
+    resultat = resoudre_adresse(index, "3 avenue du Lauzeron 09110")
+    assert resultat['statut'] == 'trouvee'
+    assert resultat['ville'] == 'AX-LES-THERMES (ARIEGE)'
+
+@pytest.mark.parametrize('adresse', ["12 R. de la Paix, Foix", "12 R de la Paix, Foix"])
+def test_type_abrege_pas_indice(index, adresse):
+    """« R » : type de voie abrégé, pas un indice de répétition"""
+    assert analyser_adresse(adresse)['rep'] == ''
+    assert analyser_adresse(adresse)['type_voie'] == 'RUE'
+    resultat = resoudre_adresse(index, adresse)
+    assert (resultat['voie'], resultat['score']) == ('RUE DE LA PAIX', 1.0)
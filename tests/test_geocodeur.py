@@ -0,0 +1,105 @@
+"""
+Géocodeur local (utils.geocodeur) sur l'extrait BAN fourni, datasets/echantillon-ban-adresses.csv :
+4 communes, 6 voies chacune, numéros 1 à 24 (3 bis et 12 bis).
+
+Usage : python -m pytest tests
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.geocodeur import charger_geocodeur, geocoder_tableau, rechercher
+
+CHEMIN_ECHANTILLON = 'datasets/echantillon-ban-adresses.csv'
+
+@pytest.fixture(scope='module')
+def ban():
+    return pd.read_csv(CHEMIN_ECHANTILLON, sep=';', dtype={'code_insee': str, 'rep': str})
+
+@pytest.fixture(scope='module')
+def geocodeur():
+    return charger_geocodeur([CHEMIN_ECHANTILLON])
+
+def _position(ban, code_insee, nom_voie, numero, rep=None):
+    ligne = ban[
+        (ban['code_insee'] == code_insee) & (ban['nom_voie'] == nom_voie) & (ban['numero'] == numero)
+        & (ban['rep'].isna() if rep is None else ban['rep'] == rep)
+    ]
+    assert len(ligne) == 1
+    return [ligne['lon'].iloc[0], ligne['lat'].iloc[0]]
+
+def _resultat(reponse):
+    assert len(reponse['features']) == 1
+    feature = reponse['features'][0]
+    return feature['geometry']['coordinates'], feature['properties']
+
+@pytest.mark.parametrize('adresse, rep', [
+    ("12 bis rue de la Paix", 'bis'), ("12 BIS R. DE LA PAIX", 'bis'), ("12bis rue Paix", 'bis'),
+    # « R » : type de voie abrégé, pas un indice de répétition
+    ("12 R. de la Paix", None), ("12 R de la Paix", None),
+])
+def test_numero_trouve(ban, geocodeur, adresse, rep):
+    coordonnees, proprietes = _resultat(rechercher(geocodeur, adresse, '31555'))
+    assert proprietes['type'] == 'housenumber'
+    assert proprietes['label'] == f"12{' ' + rep if rep else ''} Rue de la Paix Toulouse"
+    assert proprietes['score'] == 1.0
+    assert coordonnees == pytest.approx(_position(ban, '31555', 'Rue de la Paix', 12, rep))
+
+def test_numero_sans_indice(ban, geocodeur):
+    coordonnees, proprietes = _resultat(rechercher(geocodeur, "7 avenue de la gare", 30189))
+    assert proprietes['type'] == 'housenumber'
+    assert coordonnees == pytest.approx(_position(ban, '30189', 'Avenue de la Gare', 7))
+
+@pytest.mark.parametrize('numero, attendu', [(30, 24), (31, 23)])
+def test_numero_absent_meme_parite(ban, geocodeur, numero, attendu):
+    """Numéro hors de la voie : position du numéro de même parité le plus proche"""
+    coordonnees, proprietes = _resultat(rechercher(geocodeur, f"{numero} rue des Lilas", '11069'))
+    assert proprietes['type'] == 'street'
+    assert proprietes['label'] == "Rue des Lilas Carcassonne"
+    assert coordonnees == pytest.approx(_position(ban, '11069', 'Rue des Lilas', attendu))
+
+def test_voie_seule(ban, geocodeur):
+    coordonnees, proprietes = _resultat(rechercher(geocodeur, "boulevard Victor Hugo", '34172'))
+    voie = ban[(ban['code_insee'] == '34172') & (ban['nom_voie'] == 'Boulevard Victor Hugo')]
+    assert proprietes['type'] == 'street'
+    assert coordonnees == pytest.approx([voie['lon'].mean(), voie['lat'].mean()], abs=1e-6)
+
+def test_voie_approchee(geocodeur):
+    """« rue J. Jaures » : voie trouvée par indice de Jaccard, score inférieur à 1"""
+    _, proprietes = _resultat(rechercher(geocodeur, "5 rue J. Jaures", '31555'))
+    assert proprietes['label'] == "5 Rue Jean Jaurès Toulouse"
+    assert 0.5 <= proprietes['score'] < 1
+
+def test_commune(ban, geocodeur):
+    coordonnees, proprietes = _resultat(rechercher(geocodeur, "", '31555'))
+    commune = ban[ban['code_insee'] == '31555']
+    assert proprietes['type'] == 'municipality'
+    assert proprietes['label'] == "Toulouse"
+    assert coordonnees == pytest.approx([commune['lon'].mean(), commune['lat'].mean()], abs=1e-6)
+
+@pytest.mark.parametrize('adresse, citycode', [
+    ("12 rue de la Paix", '75056'),  # commune absente de l'extrait
+    ("12 rue de la Paix", None),
+    ("12 rue de la Paix", '2A004'),  # code corse non numérique
+    ("3 chemin inconnu", '31555'),
+])
+def test_sans_resultat(geocodeur, adresse, citycode):
+    assert rechercher(geocodeur, adresse, citycode)['features'] == []
+
+def test_tableau_identique_a_rechercher(geocodeur):
+    df = pd.DataFrame({
+        'adresse': ["12 bis rue de la Paix", "30 rue des Lilas", "boulevard Victor Hugo", "", "3 chemin inconnu",
+                    "12 bis rue de la Paix", "5 rue J. Jaures", "12 rue de la Paix", None],
+        'citycode': ['31555', '11069', '34172', '31555', '31555', '30189', '31555', '75056', '11069'],
+    })
+    resultats = geocoder_tableau(geocodeur, df)
+    for ligne in resultats.itertuples():
+        features = rechercher(geocodeur, ligne.adresse, ligne.citycode)['features']
+        if not features:
+            assert np.isnan(ligne.latitude) and pd.isna(ligne.result_type)
+            continue
+        (longitude, latitude), proprietes = features[0]['geometry']['coordinates'], features[0]['properties']
+        assert (ligne.longitude, ligne.latitude) == (longitude, latitude)
+        assert (ligne.result_label, ligne.result_score, ligne.result_type) == (
+            proprietes['label'], proprietes['score'], proprietes['type'],
+        )
@@ -0,0 +1,202 @@
+"""
+Résolution d'une adresse saisie librement (« 12 bis rue de la Paix, Toulouse ») en
+règles de la carte scolaire, sans passer par les listes ville / voie / numéro.
+
+L'adresse est découpée en numéro, indice de répétition, type et nom de voie, commune
+et code postal (analyser_adresse). La commune est cherchée par nom normalisé ou par
+code postal, la voie dans l'index des libellés type_et_libelle normalisés de la
+commune (correspondance exacte, sinon indice de Jaccard des jetons), puis les règles
+de la voie sont filtrées par plage de numéros et parité (filtrer_numero).
+
+Les libellés sont normalisés comme par le géocodeur local (utils.geocodeur) :
+majuscules sans accents, types de voie abrégés développés, mots vides retirés.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from utils.geocodeur import SCORE_MINIMAL, TYPES_VOIE, normaliser, separer_numero
+
+TYPES = (frozenset(TYPES_VOIE.values()) - {'SAINT', 'SAINTE'}) | {
+    'CITE', 'CLOS', 'DOMAINE', 'ENCLOS', 'MONTEE', 'PARC', 'RUELLE', 'SENTE', 'SENTIER', 'VOIE',
+}
+CODE_POSTAL = re.compile(r"\b(\d{5})\b")
+
+def _cle(jetons):
+    return ' '.join(jetons)
+
+def construire_index_adresses(df):
+    """
+    df : carte scolaire (code_insee, code_postal, com_name_upper, ville_recherche,
+    type_et_libelle). Renvoie l'index :
+    - lignes : (code_insee, libellé normalisé) -> positions des règles dans df
+      (libellé vide : règles sans voie, commune entière) ;
+    - voies : code_insee -> [(jetons, libellé normalisé, libellé d'origine)] ;
+    - libelles : (code_insee, libellé normalisé) -> libellés d'origine de la voie ;
+    - noms, codes_postaux : nom de commune normalisé / code postal -> codes INSEE ;
+    - villes : code_insee -> ville_recherche.
+    """
+    libelles = df['type_et_libelle'].astype(object)
+    uniques = pd.Series(libelles.dropna().astype(str).unique())
+    cles = dict(zip(uniques, uniques.map(lambda libelle: _cle(normaliser(libelle)))))
+    lignes = pd.DataFrame({
+        'code_insee': pd.to_numeric(df['code_insee'], errors='coerce').fillna(-1).astype('int64').to_numpy(),
+        'cle': libelles.map(cles).fillna('').to_numpy(),
+        'libelle': libelles.fillna('').astype(str).to_numpy(),
+    })
+    voies = {}
+    distinctes = lignes[lignes['cle'] != ''].drop_duplicates(['code_insee', 'cle'])
+    for code, cle, libelle in zip(distinctes['code_insee'], distinctes['cle'], distinctes['libelle']):
+        voies.setdefault(code, []).append((frozenset(cle.split()), cle, libelle))
+    variantes = lignes[lignes['cle'] != ''].drop_duplicates(['code_insee', 'cle', 'libelle'])
+    libelles_voies = {}
+    for code, cle, libelle in zip(variantes['code_insee'], variantes['cle'], variantes['libelle']):
+        libelles_voies.setdefault((code, cle), []).append(libelle)
+
+    communes = pd.DataFrame({
+        'code_insee': lignes['code_insee'],
+        'nom': df['com_name_upper'].astype(str).to_numpy(),
+        # Codes postaux lus comme entiers : zéro initial rétabli (09000), comme dans l'adresse saisie
+        'code_postal': df['code_postal'].astype('Int64').astype(str).str.zfill(5).to_numpy(),
+        'ville': df['ville_recherche'].astype(str).to_numpy(),
+    }).drop_duplicates()
+    noms, codes_postaux = {}, {}
+    for code, nom, code_postal in zip(communes['code_insee'], communes['nom'], communes['code_postal']):
+        noms.setdefault(_cle(normaliser(nom)), set()).add(code)
+        codes_postaux.setdefault(code_postal, set()).add(code)
+    return {
+        'lignes': {cle: positions for cle, positions in lignes.groupby(['code_insee', 'cle'], sort=False).indices.items()},
+        'voies': voies,
+        'libelles': {cle: tuple(libelles) for cle, libelles in libelles_voies.items()},
+        'noms': noms,
+        'codes_postaux': codes_postaux,
+        'villes': dict(zip(communes['code_insee'], communes['ville'])),
+    }
+
+def analyser_adresse(texte):
+    """
+    '12 bis rue de la Paix, 31000 Toulouse' -> numero 12, rep 'BIS', type_voie 'RUE',
+    voie ('RUE', 'PAIX'), commune ('TOULOUSE',), code_postal '31000'.
+    Sans virgule, la commune est reconnue plus tard dans les derniers jetons (voir resoudre_adresse).
+    """
+    texte = str(texte)
+    code_postal = CODE_POSTAL.search(texte)
+    if code_postal is not None:
+        texte = texte[:code_postal.start()] + ' ' + texte[code_postal.end():]
+    partie_voie, _, commune = texte.partition(',')
+    numero, rep, voie = separer_numero(partie_voie)
+    jetons = normaliser(voie)
+    return {
+        'numero': numero,
+        'rep': rep,
+        'type_voie': jetons[0] if jetons and jetons[0] in TYPES else '',
+        'voie': jetons,
+        'commune': normaliser(commune),
+        'code_postal': code_postal.group(1) if code_postal else None,
+    }
+
+def _jaccard(jetons, autres):
+    return len(jetons & autres) / len(jetons | autres)
+
+def _trouver_communes(index, commune, code_postal):
+    """Codes INSEE candidats : nom exact, sinon nom le plus proche ; restreints au code postal s'il en retient"""
+    codes = set()
+    if commune:
+        codes = index['noms'].get(_cle(commune), set())
+        if not codes:
+            jetons = frozenset(commune)
+            scores = {nom: _jaccard(jetons, frozenset(nom.split())) for nom in index['noms']}
+            meilleur = max(scores, key=scores.get, default=None)
+            if meilleur is not None and scores[meilleur] >= SCORE_MINIMAL:
+                codes = index['noms'][meilleur]
+    if code_postal:
+        postaux = index['codes_postaux'].get(code_postal, set())
+        codes = (codes & postaux or codes) if codes else postaux
+    return codes
+
+def _separer_commune(index, jetons):
+    """Adresse sans virgule : la commune est la plus longue suite de derniers jetons qui nomme une commune"""
+    for longueur in range(len(jetons), 0, -1):
+        if _cle(jetons[-longueur:]) in index['noms']:
+            return jetons[:-longueur], jetons[-longueur:]
+    return jetons, ()
+
+def _trouver_voie(index, code_insee, jetons, type_voie):
+    """
+    (libellé normalisé, libellé d'origine, score) de la voie de la commune, ou None.
+    Si un type de voie est saisi, seules les voies de ce type (ou sans type reconnu) sont candidates.
+    """
+    voies = index['voies'].get(code_insee, [])
+    cle = _cle(jetons)
+    for _, candidate, libelle in voies:
+        if candidate == cle:
+            return candidate, libelle, 1.0
+    jetons = frozenset(jetons)
+    meilleure, score = None, 0.0
+    for autres, candidate, libelle in voies:
+        type_candidate = candidate.split(' ', 1)[0]
+        if type_candidate in TYPES:
+            # Type saisi différent (« avenue » pour une rue) : autre voie, jamais retenue
+            if type_voie and type_candidate != type_voie:
+                continue
+            # Sans type saisi (« 12 Jean Jaurès »), le type de la voie candidate est ignoré
+            if not type_voie:
+                autres = autres - {type_candidate}
+        indice = _jaccard(jetons, autres) if autres else 0.0
+        if indice > score:
+            meilleure, score = (candidate, libelle), indice
+    return (*meilleure, score) if score >= SCORE_MINIMAL else None
+
+def filtrer_numero(etablissements, numero):
+    """Garde les lignes dont l'intervalle de numéros et la parité contiennent le numéro"""
+    parites = ["PI", "P"] if numero % 2 == 0 else ["PI", "I"]
+    return etablissements[
+        (etablissements['no_de_voie_debut'].fillna(-1) <= numero) &
+        (etablissements['no_de_voie_fin'].fillna(numero) >= numero) &
+        (etablissements['parite'].isin(parites))
+    ]
+
+def resoudre_adresse(index, texte):
+    """
+    Renvoie un dictionnaire : adresse (analyse), code_insee, ville, voie (libellé d'origine,
+    None pour une commune sans voie), libelles (libellés d'origine de la voie, None pour une
+    commune sans voie), score et positions des règles dans la carte scolaire.
+    statut : 'trouvee', 'commune_inconnue' (aucune commune reconnue), 'voie_manquante'
+    (commune seule, alors que ses règles dépendent de la voie) ou 'voie_inconnue'.
+    Le filtrage par numéro est laissé à l'appelant (filtrer_numero), qui a les plages.
+    """
+    adresse = analyser_adresse(texte)
+    voie, commune = adresse['voie'], adresse['commune']
+    if not commune:
+        voie, commune = _separer_commune(index, voie)
+        adresse = {**adresse, 'voie': voie, 'commune': commune}
+    resultat = {
+        'adresse': adresse, 'code_insee': None, 'ville': None, 'voie': None, 'libelles': None, 'score': 0.0,
+        'positions': np.array([], dtype='int64'),
+    }
+    codes = _trouver_communes(index, commune, adresse['code_postal'])
+    if not codes:
+        return {**resultat, 'statut': 'commune_inconnue'}
+
+    meilleur = None
+    for code in sorted(codes):
+        if not index['voies'].get(code):
+            # Commune sans voie : toutes ses règles s'appliquent, quelle que soit l'adresse
+            trouve = ('', None, 1.0)
+        elif not voie:
+            trouve = None
+        else:
+            trouve = _trouver_voie(index, code, voie, adresse['type_voie'])
+        if trouve is not None and (meilleur is None or trouve[2] > meilleur[3]):
+            meilleur = (code, *trouve)
+    if meilleur is None:
+        code = min(codes)
+        statut = 'voie_inconnue' if voie else 'voie_manquante'
+        return {**resultat, 'code_insee': code, 'ville': index['villes'][code], 'statut': statut}
+    code, cle, libelle, score = meilleur
+    return {
+        **resultat, 'code_insee': code, 'ville': index['villes'][code], 'voie': libelle, 'score': score,
+        'libelles': index['libelles'][(code, cle)] if cle else None,
+        'positions': index['lignes'].get((code, cle), resultat['positions']), 'statut': 'trouvee',
+    }
@@ -0,0 +1,165 @@
+import glob
+import os
+
+import streamlit as st
+import pandas as pd
+import requests
+from io import StringIO
+
+from utils.geocodeur import charger_geocodeur, couvre, geocoder_tableau, rechercher
+
+# Extraits départementaux de la Base Adresse Nationale (adresses-<département>.csv[.gz]) :
+# les communes qu'ils couvrent sont géocodées localement, les autres par l'API
+DOSSIER_BAN = 'datasets/ban'
+
+@st.cache_resource(show_spinner=False)
+def geocodeur_local():
+    """Géocodeur local (voir utils.geocodeur) construit à partir des extraits de DOSSIER_BAN, ou None"""
+    chemins = sorted(glob.glob(os.path.join(DOSSIER_BAN, 'adresses-*.csv*')))
+    if not chemins:
+        return None
+    try:
+        return charger_geocodeur(chemins)
+    except Exception as e:
+        print(f"Géocodeur local indisponible : {str(e)}")
+        return None
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def get_etablissements_api(codes_rne):
+    """Récupère les informations détaillées des établissements via l'API"""
+    retour = []
+    for code in codes_rne:
+        try:
+            url = "https://data.occitanie.education.gouv.fr/api/explore/v2.1/catalog/datasets/fr-en-annuaire-education/records"
+            params = {
+                "limit": 20,
+                "refine": f"identifiant_de_l_etablissement:{code}"
+            }
+            response = requests.get(url, params=params)
+            response.raise_for_status()
+            data = response.json()
+            if data["results"]:  # Vérifier si des résultats existent
+                retour.extend(data["results"])  # Ajouter directement le résultat sans le wrapper dans une liste
+        except Exception as e:
+            st.error(f"Erreur lors de la récupération des données pour {code}: {str(e)}")
+            continue
+    
+    return {
+        "total_count": len(retour),  # Nombre réel d'établissements trouvés
+        "results": retour
+    }  
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def get_coordinates(code_insee, type_et_libelle, com_name_upper):
+    """
+    Récupère les coordonnées à partir des informations de l'adresse
+    
+    Args:
+        code_insee (str): Code INSEE de la commune
+        type_et_libelle (str): Libellé de la voie
+        com_name_upper (str): Nom de la commune en majuscules
+    
+    Returns:
+        tuple: (longitude, latitude) ou None si non trouvé
+    """
+    try:
+        geocodeur = geocodeur_local()
+        if geocodeur is not None and couvre(geocodeur, code_insee):
+            # Même forme de réponse que l'API ; sans voie : position de la commune
+            data = rechercher(geocodeur, type_et_libelle or '', code_insee)
+            if data['features']:
+                coordinates = data['features'][0]['geometry']['coordinates']
+                return [coordinates[1], coordinates[0]]
+            return None
+
+        # Construction de l'URL en fonction de la présence de type_et_libelle
+        base_url = "https://api-adresse.data.gouv.fr/search/"
+        
+        if type_et_libelle:
+            params = {
+                'q': type_et_libelle,
+                'type': 'street',
+                'citycode': int(code_insee)
+            }
+        else:
+            params = {
+                'q': com_name_upper
+            }
+        
+        # Appel à l'API
+        response = requests.get(base_url, params=params)
+        response.raise_for_status()
+        data = response.json()
+        
+        # Vérification et extraction des coordonnées
+        if data.get('features') and len(data['features']) > 0:
+            coordinates = data['features'][0]['geometry']['coordinates']
+            return [coordinates[1], coordinates[0]]
+        
+        return None
+        
+    except Exception as e:
+        print(f"Erreur lors de la géolocalisation : {str(e)}")
+        return None
+
+def geocode_addresses(df_code_rne):
+    """
+    Géocode les adresses selon le format exact de l'API
+    """
+    # S'assurer que les valeurs numériques sont converties en entiers sans décimales
+    df_code_rne = df_code_rne.reset_index(drop=True)
+    
+    # Gérer les NaN avant la conversion
+    df_code_rne['postcode'] = df_code_rne['postcode'].fillna(0).astype(int).astype(str)
+    df_code_rne['citycode'] = df_code_rne['citycode'].fillna(0).astype(int).astype(str)
+    
+    # Remplacer les '0' par une chaîne vide pour les valeurs qui étaient NaN
+    df_code_rne['postcode'] = df_code_rne['postcode'].replace('0', '')
+    df_code_rne['citycode'] = df_code_rne['citycode'].replace('0', '')
+
+    # Communes couvertes par les extraits BAN : géocodage local, le reste par l'API
+    geocodeur = geocodeur_local()
+    if geocodeur is not None:
+        couvertes = {code: bool(code) and couvre(geocodeur, code) for code in df_code_rne['citycode'].unique()}
+        locales = df_code_rne['citycode'].map(couvertes).to_numpy(dtype=bool)
+        if locales.any():
+            resultats = geocoder_tableau(geocodeur, df_code_rne[locales])
+            if locales.all():
+                return resultats
+            distants = geocode_addresses_api(df_code_rne[~locales])
+            if distants is None:
+                return None
+            distants.index = df_code_rne.index[~locales]
+            return pd.concat([resultats, distants]).sort_index()
+    return geocode_addresses_api(df_code_rne)
+
+def geocode_addresses_api(df_code_rne):
+    """Recherche CSV de l'API BAN (codes postaux et INSEE déjà convertis en texte)"""
+    # Conversion du DataFrame en CSV
+    csv_buffer = StringIO()
+    df_code_rne.to_csv(csv_buffer, index=False, encoding='utf-8')
+    csv_string = csv_buffer.getvalue()
+
+    # Construction de la requête multipart/form-data
+    url = "https://api-adresse.data.gouv.fr/search/csv/"
+    
+    # Création des données multipart selon la documentation
+    multi = {
+        'data': ('addresses.csv', csv_string, 'text/csv'),
+    }
+    
+    # Paramètres additionnels
+    data = {
+        'columns': ['adresse', 'city'],
+        'citycode': 'citycode',
+        'result_columns': ['latitude', 'longitude']
+    }
+
+    try:
+        response = requests.post(url, files=multi, data=data)
+        response.raise_for_status()
+        
+        return pd.read_csv(StringIO(response.text))
+    except Exception as e:
+        print(f"Erreur lors du géocodage : {str(e)}")
+        return None
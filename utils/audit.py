@@ -0,0 +1,89 @@
+"""
+Audit de cohérence entre les deux descriptions des secteurs : règles de la carte
+scolaire (voie et plage de numéros) et polygones geo_shape.
+
+Chaque règle est placée à la position de sa voie (géocodage par lot) ou, pour une
+commune entière, au centroïde de la commune. Toutes les règles sont jointes aux
+polygones en une seule requête groupée sur un STRtree des polygones (projection plane
+en km), puis classées :
+- conforme : la position tombe dans le polygone de son établissement ;
+- hors_secteur : elle tombe hors de ce polygone (ecart_km : distance au polygone) ;
+- sans_polygone : l'établissement n'a pas de polygone ;
+- non_geocodee : la voie n'a pas été trouvée.
+dans_autre_secteur signale une position contenue dans le polygone d'un autre
+établissement du même type.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.hexagones import vers_km
+
+STATUTS_AUDIT = {
+    'conforme': "Conformes",
+    'hors_secteur': "Hors du polygone",
+    'sans_polygone': "Sans polygone",
+    'non_geocodee': "Voie non géocodée",
+}
+
+def _projeter(geometrie):
+    import shapely
+
+    return shapely.transform(geometrie, lambda xy: np.stack(vers_km(xy[:, 1], xy[:, 0]), axis=1))
+
+def auditer_regles(regles, polygones, types):
+    """
+    regles : code_rne, latitude, longitude, geocodee (faux si la voie n'a pas été trouvée).
+    polygones : code_rne -> géométrie shapely (lon, lat) ; types : code_rne -> type.
+    Ajoute statut, dans_autre_secteur et ecart_km (NaN sauf hors_secteur).
+    """
+    import shapely
+
+    codes = np.array(sorted(polygones), dtype=str)
+    geometries = np.array([_projeter(polygones[c]) for c in codes], dtype=object)
+    x, y = vers_km(regles['latitude'].to_numpy(dtype='float64'), regles['longitude'].to_numpy(dtype='float64'))
+    points = shapely.points(x, y)
+    code_regle = regles['code_rne'].astype(str).to_numpy()
+
+    dans_secteur = np.zeros(len(regles), dtype=bool)
+    dans_autre = np.zeros(len(regles), dtype=bool)
+    if len(codes):
+        # Une seule requête pour toutes les règles : couples (règle, polygone) qui se touchent
+        regle, polygone = shapely.STRtree(geometries).query(points, predicate='intersects')
+        propre = codes[polygone] == code_regle[regle]
+        dans_secteur[regle[propre]] = True
+        type_regle = pd.Series(code_regle).map(types).to_numpy()
+        type_polygone = pd.Series(codes).map(types).to_numpy()
+        dans_autre[regle[~propre & (type_polygone[polygone] == type_regle[regle])]] = True
+
+    a_polygone = np.isin(code_regle, codes)
+    geocodee = regles['geocodee'].to_numpy(dtype=bool) & ~np.isnan(x)
+    statut = np.select(
+        [~a_polygone, ~geocodee, dans_secteur],
+        ['sans_polygone', 'non_geocodee', 'conforme'],
+        'hors_secteur',
+    )
+    ecart = np.full(len(regles), np.nan)
+    hors = statut == 'hors_secteur'
+    ecart[hors] = shapely.distance(points[hors], geometries[np.searchsorted(codes, code_regle[hors])])
+    return regles.assign(statut=statut, dans_autre_secteur=dans_autre & geocodee, ecart_km=ecart)
+
+def _resumer(audit, cles):
+    """Nombre de règles par statut, part de désaccord parmi les règles vérifiables et écart médian"""
+    comptes = pd.crosstab([audit[c] for c in cles], audit['statut']).reindex(columns=list(STATUTS_AUDIT), fill_value=0)
+    groupes = audit.groupby(cles, observed=True)
+    resume = comptes.assign(
+        regles=comptes.sum(axis=1),
+        dans_autre_secteur=groupes['dans_autre_secteur'].sum(),
+        ecart_median_km=groupes['ecart_km'].median(),
+    )
+    verifiables = resume['conforme'] + resume['hors_secteur']
+    resume['part_desaccord'] = (resume['hors_secteur'] / verifiables.where(verifiables > 0)).astype('float32')
+    resume.columns.name = None
+    return resume.reset_index().astype({'ecart_median_km': 'float32'})
+
+def resumer_audit(audit):
+    """(etablissements, departements) : résumés par code_rne et par département de résidence et type"""
+    return (
+        _resumer(audit, ['code_rne', 'type_etablissement']),
+        _resumer(audit, ['libelle_departement_eleve', 'type_etablissement']),
+    )
@@ -0,0 +1,316 @@
+import json
+
+import folium
+import pandas as pd
+from branca.element import MacroElement
+from jinja2 import Template
+
+from utils.api import get_coordinates
+
+def create_map(etablissements, loc, code_insee, type_et_libelle, com_name_upper, commune=None):
+    """
+    commune : centroïde et emprise de la commune (table des communes). Sans voie
+    sélectionnée, la commune est placée et cadrée avec cette table, sans appel à la BAN.
+    """
+    coord_ville = None
+    if loc :
+        if type_et_libelle or commune is None:
+            coord_ville = get_coordinates(code_insee, type_et_libelle, com_name_upper)
+        else:
+            coord_ville = [float(commune['latitude']), float(commune['longitude'])]
+    lats, lons = [], []
+    if commune is not None and not type_et_libelle:
+        lats += [float(commune['lat_min']), float(commune['lat_max'])]
+        lons += [float(commune['lon_min']), float(commune['lon_max'])]
+    if coord_ville != None:
+        lats += [float(coord_ville[0])]
+        lons += [float(coord_ville[1])]
+    if etablissements:
+        # Calculer le centre moyen de tous les établissements
+        lats += [float(etab['latitude']) for etab in etablissements if 'latitude' in etab]
+        lons += [float(etab['longitude']) for etab in etablissements if 'longitude' in etab]
+        center = [sum(lats) / len(lats), sum(lons) / len(lons)]
+        zoom_start = 11
+    else:
+        center = [43.6, 3.8]
+        zoom_start = 12
+    
+    m = folium.Map(location=center, zoom_start=zoom_start)
+    
+    # Ajouter les marqueurs avec des couleurs différentes
+    for etab in etablissements:
+        if 'latitude' in etab and 'longitude' in etab:
+            if etab['nom_etablissement'].startswith('Lycée'):
+                icon_color = 'red'
+            elif etab['nom_etablissement'].startswith('Collège'):
+                icon_color = 'blue'
+            else:
+                icon_color = 'gray'
+            
+            folium.Marker(
+                [etab['latitude'], etab['longitude']],
+                popup=f"<strong>{etab['nom_etablissement']}</strong><br>{etab['adresse_1']}",
+                tooltip=etab['nom_etablissement'],
+                icon=folium.Icon(color=icon_color, icon='info-sign')
+            ).add_to(m)
+    if coord_ville != None:
+        if type_et_libelle != None:
+            survol = type_et_libelle
+        else:
+            survol = com_name_upper
+            type_et_libelle = ""
+        folium.Marker(
+            coord_ville,
+            popup=f"<strong>{com_name_upper}</strong><br>{type_et_libelle}",
+            tooltip=survol,
+            icon=folium.Icon(color='green', icon='home')
+        ).add_to(m)
+    
+    if etablissements:
+        m.fit_bounds([[min(lats), min(lons)], [max(lats), max(lons)]], padding=[50, 50])
+    return m
+
+def create_address_map(results, etablissement_data, polygones=None, enveloppe=None):
+    """
+    Creates a map with all the addresses (in gray) and the establishment (in red).
+    
+    Args:
+        results (pd.DataFrame): DataFrame with the geocoding results (x, y).
+        etablissement_data (pd.DataFrame): DataFrame with the data for the establishment, including latitude and longitude.
+        polygones (list): sector polygon at each level of detail (GeoJSON geometries, see utils.polygones), or None.
+        enveloppe (dict): computed recruitment area (GeoJSON geometry, see utils.enveloppes), or None.
+    """
+    # Get all valid latitude and longitude values from the results
+    lats = [float(row['latitude']) for _, row in results.iterrows() if pd.notna(row['latitude'])]
+    lons = [float(row['longitude']) for _, row in results.iterrows() if pd.notna(row['longitude'])]
+    if polygones:
+        # Emprise du polygone le plus simplifié
+        points = _points_geojson(polygones[0])
+        lats += [min(p[1] for p in points), max(p[1] for p in points)]
+        lons += [min(p[0] for p in points), max(p[0] for p in points)]
+    if enveloppe:
+        points = _points_geojson(enveloppe)
+        lats += [min(p[1] for p in points), max(p[1] for p in points)]
+        lons += [min(p[0] for p in points), max(p[0] for p in points)]
+    
+    if not etablissement_data.empty:
+        lats.append(float(etablissement_data['latitude'].iloc[0]))
+        lons.append(float(etablissement_data['longitude'].iloc[0]))
+
+    if lats and lons:
+        center = [sum(lats) / len(lats), sum(lons) / len(lons)]
+        zoom_start = 11
+    else:
+        center = [43.6, 3.8]  # Default center
+        zoom_start = 12
+
+    # Create the map
+    m = folium.Map(location=center, zoom_start=zoom_start)
+    
+    # Add a marker for the establishment in red, if provided
+    if not etablissement_data.empty:
+        folium.Marker(
+            [float(etablissement_data['latitude'].iloc[0]), float(etablissement_data['longitude'].iloc[0])],
+            popup=f"<strong>{etablissement_data['Nom_etablissement'].iloc[0]}</strong><br>{etablissement_data['Adresse_1'].iloc[0]}",
+            tooltip=etablissement_data['Nom_etablissement'].iloc[0],
+            icon=folium.Icon(color='red', icon='info-sign')
+        ).add_to(m)
+
+    if polygones:
+        ajouter_polygones(m, polygones)
+    if enveloppe:
+        folium.GeoJson(
+            {'type': 'Feature', 'geometry': enveloppe, 'properties': {}},
+            style_function=lambda feature: {'color': '#1f77b4', 'weight': 1, 'fillOpacity': 0.08, 'dashArray': '4'},
+            tooltip="Aire de recrutement calculée",
+        ).add_to(m)
+
+    # Add markers for the addresses in gray
+    for _, row in results.iterrows():
+        if pd.notna(row['longitude']) and pd.notna(row['latitude']):
+            if pd.isna(row['adresse']):
+                row['adresse'] = ""
+            folium.Marker(
+                [float(row['latitude']), float(row['longitude'])],
+                popup=f"<strong>{row['adresse']}</strong> <br>{row['city']}",
+                tooltip=f"<strong>{row['adresse']}</strong> <br>{row['city']}",
+                icon=folium.Icon(color='lightgray', icon='info-sign')
+            ).add_to(m)
+
+    # Adjust the view to fit all the markers
+    if lats and lons:
+        m.fit_bounds([[min(lats), min(lons)], [max(lats), max(lons)]], padding=[50, 50])
+    return m
+
+def _points_geojson(geometrie):
+    anneaux = geometrie['coordinates'] if geometrie['type'] == 'Polygon' else [a for p in geometrie['coordinates'] for a in p]
+    return [point for anneau in anneaux for point in anneau]
+
+def ajouter_polygones(m, polygones):
+    """
+    Ajoute le polygone du secteur à chaque niveau de détail ; un script n'affiche
+    que le niveau qui correspond au zoom courant (voir utils.polygones.NIVEAUX_DETAIL).
+    """
+    from utils.polygones import NIVEAUX_DETAIL
+
+    couches = []
+    for geometrie in polygones:
+        couche = folium.GeoJson(
+            {'type': 'Feature', 'geometry': geometrie, 'properties': {}},
+            style_function=lambda feature: {'color': '#d62728', 'weight': 2, 'fillOpacity': 0.1},
+        )
+        couche.add_to(m)
+        couches.append(couche.get_name())
+    zooms = [zoom_min for zoom_min, _ in NIVEAUX_DETAIL[:len(couches)]]
+    # Élément rendu après les couches (enfant de la carte) : leurs variables JS existent déjà
+    script = MacroElement()
+    script._template = Template(f"""
+    {{% macro script(this, kwargs) %}}
+    (function() {{
+        var carte = {m.get_name()}, couches = [{', '.join(couches)}], zooms = {zooms};
+        function niveau() {{
+            var z = carte.getZoom(), choisi = 0;
+            zooms.forEach(function(zoom_min, i) {{ if (z >= zoom_min) {{ choisi = i; }} }});
+            couches.forEach(function(couche, i) {{
+                if (i === choisi) {{ carte.addLayer(couche); }} else {{ carte.removeLayer(couche); }}
+            }});
+        }}
+        carte.on('zoomend', niveau);
+        niveau();
+    }})();
+    {{% endmacro %}}
+    """)
+    m.add_child(script)
+
+def create_proximite_map(position, etablissements, rayon_km=None):
+    """
+    Carte des établissements proches d'un point (maison en vert), avec le cercle de
+    recherche si un rayon est donné.
+
+    Args:
+        position (list): [latitude, longitude] du point de départ.
+        etablissements (pd.DataFrame): établissements de l'annuaire avec une colonne distance_km.
+        rayon_km (float): rayon de recherche, ou None pour une recherche des k plus proches.
+    """
+    m = folium.Map(location=position, zoom_start=12)
+    folium.Marker(
+        position,
+        tooltip="Point de départ",
+        icon=folium.Icon(color='green', icon='home')
+    ).add_to(m)
+    if rayon_km:
+        folium.Circle(position, radius=rayon_km * 1000, color='#4F4F4F', fill=False).add_to(m)
+
+    lats, lons = [position[0]], [position[1]]
+    for _, etab in etablissements.iterrows():
+        icon_color = 'red' if etab['Type_etablissement'] == 'Lycée' else 'blue'
+        folium.Marker(
+            [float(etab['latitude']), float(etab['longitude'])],
+            popup=f"<strong>{etab['Nom_etablissement']}</strong><br>{etab['Adresse_1']}<br>{etab['distance_km']:.1f} km",
+            tooltip=etab['Nom_etablissement'],
+            icon=folium.Icon(color=icon_color, icon='info-sign')
+        ).add_to(m)
+        lats.append(float(etab['latitude']))
+        lons.append(float(etab['longitude']))
+
+    if len(lats) > 1:
+        m.fit_bounds([[min(lats), min(lons)], [max(lats), max(lons)]], padding=[50, 50])
+    return m
+
+def create_hexagones_map(geojson, seuils, libelle, zoom_start=7):
+    """
+    Carte régionale : une seule couche GeoJSON d'hexagones colorés par classe de valeur.
+
+    Args:
+        geojson (dict): FeatureCollection produite par utils.hexagones.geojson_hexagones.
+        seuils (list): bornes des classes de couleur, pour la légende.
+        libelle (str): nom de l'indicateur affiché au survol.
+        zoom_start (int): zoom initial de l'échelle choisie.
+    """
+    m = folium.Map(location=[43.7, 2.2], zoom_start=zoom_start, tiles='cartodbpositron')
+    folium.GeoJson(
+        geojson,
+        style_function=lambda feature: {
+            'fillColor': feature['properties']['couleur'],
+            'fillOpacity': 0.7,
+            'color': '#4F4F4F',
+            'weight': 0.3,
+        },
+        tooltip=folium.GeoJsonTooltip(fields=['valeur'], aliases=[libelle]),
+    ).add_to(m)
+    if len(seuils) > 1:
+        # Légende : une couleur par classe, de la plus claire à la plus foncée
+        from utils.hexagones import COULEURS
+        lignes = ''.join(
+            f"<div><span style='background:{couleur};display:inline-block;width:14px;height:14px;margin-right:6px'></span>"
+            f"{debut:.1f} - {fin:.1f}</div>"
+            for couleur, debut, fin in zip(COULEURS, seuils[:-1], seuils[1:])
+        )
+        legende = (f"<div style='position:fixed;bottom:30px;left:30px;z-index:1000;background:white;"
+                   f"padding:8px;border-radius:5px;font-size:12px'><strong>{libelle}</strong>{lignes}</div>")
+        m.get_root().html.add_child(folium.Element(legende))
+    return m
+
+def create_secteurs_map(url, index, departement=None):
+    """
+    Carte des secteurs servie par tuiles GeoJSON (voir pipeline.tuiles) : un script ne
+    charge que les tuiles visibles, au zoom courant borné par la pyramide, et libère
+    les autres. Aucun fond de carte externe.
+
+    Args:
+        url (str): chemin des tuiles d'un type d'établissement, sans /z/x/y.geojson.
+        index (dict): index.json de la pyramide (zooms, emprises des départements).
+        departement (str): code du département à afficher, ou None pour toute la région.
+    """
+    emprises = [index['departements'][departement]] if departement else list(index['departements'].values())
+    lon_min, lat_min = min(e[0] for e in emprises), min(e[1] for e in emprises)
+    lon_max, lat_max = max(e[2] for e in emprises), max(e[3] for e in emprises)
+    m = folium.Map(location=[(lat_min + lat_max) / 2, (lon_min + lon_max) / 2], zoom_start=index['zooms'][0], tiles=None)
+    m.fit_bounds([[lat_min, lon_min], [lat_max, lon_max]])
+
+    chargeur = MacroElement()
+    chargeur._template = Template(f"""
+    {{% macro script(this, kwargs) %}}
+    (function() {{
+        var carte = {m.get_name()}, base = {json.dumps(url)}, departement = {json.dumps(departement)};
+        var zoom_min = {index['zooms'][0]}, zoom_max = {index['zooms'][1]}, couches = {{}};
+        function style(feature) {{
+            return {{color: '#4F4F4F', weight: 0.5, fillColor: feature.properties.couleur, fillOpacity: 0.6}};
+        }}
+        function charger() {{
+            var z = Math.max(zoom_min, Math.min(zoom_max, Math.round(carte.getZoom())));
+            var n = Math.pow(2, z), emprise = carte.getBounds(), visibles = {{}};
+            function tx(lon) {{ return Math.max(0, Math.min(n - 1, Math.floor((lon + 180) / 360 * n))); }}
+            function ty(lat) {{
+                var r = lat * Math.PI / 180;
+                return Math.max(0, Math.min(n - 1, Math.floor((1 - Math.log(Math.tan(r) + 1 / Math.cos(r)) / Math.PI) / 2 * n)));
+            }}
+            for (var x = tx(emprise.getWest()); x <= tx(emprise.getEast()); x++) {{
+                for (var y = ty(emprise.getNorth()); y <= ty(emprise.getSouth()); y++) {{
+                    var cle = z + '/' + x + '/' + y;
+                    visibles[cle] = true;
+                    if (couches[cle]) {{ continue; }}
+                    var couche = L.geoJSON(null, {{
+                        style: style,
+                        filter: function(feature) {{ return !departement || feature.properties.departement === departement; }},
+                        onEachFeature: function(feature, layer) {{ layer.bindTooltip(feature.properties.nom); }}
+                    }}).addTo(carte);
+                    couches[cle] = couche;
+                    // Tuile absente (404) : aucune géométrie à cet endroit
+                    fetch(base + '/' + cle + '.geojson')
+                        .then(function(reponse) {{ return reponse.ok ? reponse.json() : null; }})
+                        .then((function(couche) {{ return function(donnees) {{ if (donnees) {{ couche.addData(donnees); }} }}; }})(couche))
+                        .catch(function() {{}});
+                }}
+            }}
+            Object.keys(couches).forEach(function(cle) {{
+                if (!visibles[cle]) {{ carte.removeLayer(couches[cle]); delete couches[cle]; }}
+            }});
+        }}
+        carte.on('moveend', charger);
+        charger();
+    }})();
+    {{% endmacro %}}
+    """)
+    m.add_child(chargeur)
+    return m
@@ -0,0 +1,67 @@
+"""
+Table des communes : centroïde et emprise (bounding box) par code INSEE.
+
+Sources, par ordre de préférence :
+1. un fichier de contours des communes (GeoJSON, facultatif) : centroïde du polygone
+   (calculé en Lambert 93) et emprise du polygone ;
+2. sinon, les positions des établissements de l'annuaire situés dans la commune
+   (écoles comprises) : position médiane et emprise des établissements.
+
+Les communes sans contour ni établissement sont absentes de la table.
+"""
+import os
+
+import pandas as pd
+
+CHEMIN_CONTOURS_COMMUNES = 'datasets/communes-contours.geojson'
+# Noms possibles du code INSEE dans les propriétés des contours (geo.api.gouv.fr, ADMIN EXPRESS)
+CHAMPS_CODE_COMMUNE = ['code', 'INSEE_COM', 'code_insee', 'insee']
+COLONNES_COMMUNES_GEO = ['code_insee', 'latitude', 'longitude', 'lat_min', 'lat_max', 'lon_min', 'lon_max', 'source']
+
+def _depuis_etablissements(annuaire):
+    positions = annuaire[['Code_commune', 'latitude', 'longitude']].copy()
+    positions['code_insee'] = pd.to_numeric(positions['Code_commune'], errors='coerce')
+    positions = positions.dropna(subset=['code_insee', 'latitude', 'longitude'])
+    communes = positions.groupby('code_insee').agg(
+        latitude=('latitude', 'median'),
+        longitude=('longitude', 'median'),
+        lat_min=('latitude', 'min'),
+        lat_max=('latitude', 'max'),
+        lon_min=('longitude', 'min'),
+        lon_max=('longitude', 'max'),
+    ).reset_index()
+    communes['source'] = 'etablissements'
+    return communes
+
+def _depuis_contours(chemin):
+    import geopandas as gpd
+
+    contours = gpd.read_file(chemin)
+    champ = next(c for c in CHAMPS_CODE_COMMUNE if c in contours.columns)
+    # Centroïde calculé dans une projection métrique, puis ramené en WGS84
+    centroides = contours.to_crs(2154).centroid.to_crs(4326)
+    emprises = contours.to_crs(4326).bounds
+    return pd.DataFrame({
+        'code_insee': pd.to_numeric(contours[champ], errors='coerce'),
+        'latitude': centroides.y,
+        'longitude': centroides.x,
+        'lat_min': emprises['miny'],
+        'lat_max': emprises['maxy'],
+        'lon_min': emprises['minx'],
+        'lon_max': emprises['maxx'],
+        'source': 'contour',
+    }).dropna(subset=['code_insee'])
+
+def construire_table_communes(annuaire, chemin_contours=CHEMIN_CONTOURS_COMMUNES):
+    """Table des communes à partir de l'annuaire complet (non filtré) et des contours s'ils existent"""
+    communes = _depuis_etablissements(annuaire)
+    if chemin_contours and os.path.exists(chemin_contours):
+        contours = _depuis_contours(chemin_contours)
+        communes = pd.concat([contours, communes[~communes['code_insee'].isin(contours['code_insee'])]])
+    communes = communes[COLONNES_COMMUNES_GEO].sort_values('code_insee').reset_index(drop=True)
+    return communes.astype({
+        'code_insee': 'int32',
+        'latitude': 'float32', 'longitude': 'float32',
+        'lat_min': 'float32', 'lat_max': 'float32', 'lon_min': 'float32', 'lon_max': 'float32',
+        'source': 'category',
+    })
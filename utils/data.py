@@ -0,0 +1,661 @@
+import os
+import threading
+import time
+
+import streamlit as st
+import pandas as pd
+
+from utils.communes import CHEMIN_CONTOURS_COMMUNES, construire_table_communes
+from utils.regles import compacter, developper, verifier_aller_retour
+from utils.requetes import MOTEUR
+from utils.schema import (
+    COLONNES_ANNUAIRE_PROXIMITE, COLONNES_SEARCH, SCHEMA_ANNUAIRE, SCHEMA_CARTE_SCOLAIRE, appliquer_schema, memoire,
+)
+from utils.snapshot import (
+    DOSSIER_SNAPSHOT, chemin_snapshot, dossier_courant, dossier_version, ecrire_snapshot, lire_snapshot, snapshot_a_jour, version_courante,
+)
+
+CHEMIN_CARTE_SCOLAIRE = 'datasets/data_carte_scolaire_nettoye.csv'
+CHEMIN_ANNUAIRE = 'datasets/fr-en-annuaire-education.csv'
+# Instantanés écrits par ecrire_tables_carte_scolaire
+TABLES_CARTE_SCOLAIRE = [
+    'regles', 'communes', 'etablissements', 'index_villes', 'carte_scolaire',
+    'adresses_etablissements', 'index_etablissements',
+    'matrice_liens', 'matrice_communes', 'matrice_etablissements',
+]
+# Distances domicile-établissement (voir utils.distances), écrites par ecrire_tables_distances
+TABLES_DISTANCES = ['distances_secteurs', 'distances_etablissements', 'distances_departements']
+# Populations et ratios établissements / habitants (voir utils.populations), écrits par ecrire_tables_populations
+TABLES_POPULATIONS = ['populations_communes', 'populations_departements']
+# Charge utile du géocodage des adresses d'un secteur (colonnes renommées pour l'API BAN)
+COLONNES_GEOCODAGE = {'code_postal': 'postcode', 'code_insee': 'citycode', 'com_name_upper': 'city', 'type_et_libelle': 'adresse'}
+
+def preparer_carte_scolaire():
+    """Lit le CSV nettoyé et ajoute les colonnes dérivées utilisées par les pages"""
+    return completer_carte_scolaire(pd.read_csv(CHEMIN_CARTE_SCOLAIRE, low_memory=False))
+
+def completer_carte_scolaire(df):
+    """Ajoute les colonnes dérivées à une carte scolaire nettoyée et applique le schéma compact"""
+    if 'ville_recherche' not in df.columns:
+        df['ville_recherche'] = df['com_name_upper'].astype(str) + ' (' + df['libelle_departement_eleve'].astype(str) + ')'
+    df['type_etablissement'] = df['type_etablissement'].fillna('').astype(str)
+    df['libelle_departement_eleve'] = df['libelle_departement_eleve'].fillna('').astype(str)
+    return appliquer_schema(df, SCHEMA_CARTE_SCOLAIRE)
+
+def construire_index_villes(df):
+    """Index ville_recherche -> [debut, fin[ des lignes de la ville dans le DataFrame trié"""
+    bornes = df.groupby('ville_recherche', sort=True, observed=True).indices
+    return pd.DataFrame({
+        'ville_recherche': list(bornes.keys()),
+        'debut': [int(positions[0]) for positions in bornes.values()],
+        'fin': [int(positions[-1]) + 1 for positions in bornes.values()],
+    })
+
+def construire_index_etablissements(df):
+    """
+    Index inversé code_rne -> adresses du secteur. Renvoie (adresses, index) :
+    - adresses : charge utile du géocodage, lignes triées par établissement ;
+    - index : pour chaque code_rne, les bornes [debut, fin[ de ses lignes dans adresses
+      et le nombre de villes, de voies et de lignes hors région de son secteur.
+    """
+    trie = df[df['code_rne'].notna()].sort_values('code_rne', kind='stable').reset_index(drop=True)
+    adresses = trie[list(COLONNES_GEOCODAGE)].rename(columns=COLONNES_GEOCODAGE)
+    groupes = trie.assign(hors_region=trie['libelle_region'] == 'HORS REGION').groupby('code_rne', observed=True, sort=True)
+    index = groupes.agg(
+        nb_villes=('com_name_upper', 'nunique'),
+        nb_voies=('type_et_libelle', 'nunique'),
+        nb_hors_region=('hors_region', 'sum'),
+    )
+    bornes = groupes.indices
+    index['debut'] = [int(bornes[code][0]) for code in index.index]
+    index['fin'] = [int(bornes[code][-1]) + 1 for code in index.index]
+    index = index.reset_index().astype({'code_rne': str, 'nb_villes': 'int32', 'nb_voies': 'int32', 'nb_hors_region': 'int32'})
+    return adresses, index
+
+def preparer_annuaire(chemin=CHEMIN_ANNUAIRE):
+    """Lit l'annuaire et ne garde que les collèges et lycées publics ouverts"""
+    return filtrer_annuaire(pd.read_csv(chemin, sep=';', low_memory=False))
+
+def filtrer_annuaire(df):
+    """Garde les collèges et lycées publics ouverts d'un extrait de l'annuaire et applique le schéma compact"""
+    df = df[(df['Type_etablissement'].isin(['Lycée', 'Collège'])) 
+            & (df['Statut_public_prive'] == 'Public') 
+            & (df['etat'] == 'OUVERT')]
+    df = df[~df['Nom_etablissement'].str.contains('professionnel', case=False)]
+    df = df[~df['Nom_etablissement'].str.contains('Cité scolaire', case=False)]
+    df = df.copy()
+    df['etab_recherche'] = df['Nom_etablissement'].astype(str) + ' (' + df['Nom_commune'].astype(str) + ')'
+    return appliquer_schema(df, SCHEMA_ANNUAIRE)
+
+def ecrire_tables_carte_scolaire(df, dossier=None):
+    """Écrit les instantanés dérivés d'une carte scolaire complétée (règles, dimensions, index, matrice)"""
+    from utils.matrice import construire_matrice
+
+    # Table de règles compacte + dimensions, vérifiée par aller-retour avant écriture
+    regles, communes, etablissements = compacter(df)
+    verifier_aller_retour(df, regles, communes, etablissements)
+    ecrire_snapshot(regles, 'regles', dossier)
+    ecrire_snapshot(communes, 'communes', dossier)
+    ecrire_snapshot(etablissements, 'etablissements', dossier)
+    # Les pages lisent la table compacte dépliée, triée par ville : les lignes d'une
+    # même ville sont contiguës (voir construire_index_villes)
+    df = developper(regles, communes, etablissements)
+    df = df.sort_values('ville_recherche', kind='stable').reset_index(drop=True)
+    ecrire_snapshot(construire_index_villes(df), 'index_villes', dossier)
+    adresses, index_etablissements = construire_index_etablissements(df)
+    ecrire_snapshot(adresses, 'adresses_etablissements', dossier)
+    ecrire_snapshot(index_etablissements, 'index_etablissements', dossier)
+    # Matrice origine-destination communes x établissements (voir utils.matrice)
+    liens, communes_matrice, etablissements_matrice = construire_matrice(df)
+    ecrire_snapshot(liens, 'matrice_liens', dossier)
+    ecrire_snapshot(communes_matrice, 'matrice_communes', dossier)
+    ecrire_snapshot(etablissements_matrice, 'matrice_etablissements', dossier)
+    ecrire_snapshot(df, 'carte_scolaire', dossier)
+    return df
+
+def construire_snapshot_carte_scolaire(force=False):
+    """Écrit l'instantané Arrow de la carte scolaire s'il est absent ou plus ancien que le CSV"""
+    if force or not all(snapshot_a_jour(nom, [CHEMIN_CARTE_SCOLAIRE]) for nom in TABLES_CARTE_SCOLAIRE):
+        ecrire_tables_carte_scolaire(preparer_carte_scolaire(), DOSSIER_SNAPSHOT)
+
+def construire_snapshot_annuaire(force=False):
+    """Écrit l'instantané Arrow de l'annuaire s'il est absent ou plus ancien que le CSV"""
+    if force or not snapshot_a_jour('annuaire', [CHEMIN_ANNUAIRE]):
+        ecrire_snapshot(preparer_annuaire(), 'annuaire', DOSSIER_SNAPSHOT)
+
+def construire_snapshot_communes(force=False):
+    """Écrit la table des communes (centroïde, emprise) si elle est absente ou plus ancienne que ses sources"""
+    if force or not snapshot_a_jour('communes_geo', [CHEMIN_ANNUAIRE, CHEMIN_CONTOURS_COMMUNES]):
+        annuaire = pd.read_csv(CHEMIN_ANNUAIRE, sep=';', low_memory=False)
+        ecrire_snapshot(construire_table_communes(annuaire), 'communes_geo', DOSSIER_SNAPSHOT)
+
+def ecrire_tables_distances(dossier=None):
+    """Écrit les distances domicile-établissement à partir des instantanés déjà écrits dans dossier"""
+    from utils.distances import COLONNES_CARTE_DISTANCES, construire_tables_distances
+
+    tables = construire_tables_distances(
+        lire_snapshot('carte_scolaire', columns=COLONNES_CARTE_DISTANCES, dossier=dossier),
+        lire_snapshot('communes_geo', dossier=dossier).set_index('code_insee'),
+        lire_snapshot('annuaire', columns=COLONNES_ANNUAIRE_PROXIMITE, dossier=dossier),
+    )
+    for nom, table in tables.items():
+        ecrire_snapshot(table, nom, dossier)
+
+def ecrire_hexagones(dossier=None):
+    """Écrit la grille hexagonale multi-échelle (voir utils.hexagones) à partir des instantanés de dossier"""
+    from utils.hexagones import construire_hexagones
+
+    ips = None
+    if os.path.exists(chemin_snapshot('ips_etablissements', dossier)):
+        ips = lire_snapshot('ips_etablissements', dossier=dossier).set_index('code_rne')['ips_etablissement']
+    hexagones = construire_hexagones(
+        lire_snapshot('carte_scolaire', columns=['code_insee', 'code_rne', 'type_etablissement'], dossier=dossier),
+        lire_snapshot('communes_geo', dossier=dossier).set_index('code_insee'),
+        lire_snapshot('annuaire', columns=COLONNES_ANNUAIRE_PROXIMITE, dossier=dossier),
+        ips,
+    )
+    ecrire_snapshot(hexagones, 'hexagones', dossier)
+
+def ecrire_graphe(dossier=None):
+    """Écrit le graphe de voisinage des secteurs (voir utils.graphe) à partir des instantanés de dossier"""
+    from utils.graphe import construire_graphe
+
+    polygones = None
+    if os.path.exists(chemin_snapshot('polygones', dossier)):
+        from utils.polygones import geometries_detaillees
+
+        # Niveau le plus détaillé : les frontières communes sont mesurées sur les contours d'origine
+        polygones = geometries_detaillees(lire_snapshot('polygones', dossier=dossier))
+    graphe = construire_graphe(
+        lire_snapshot('carte_scolaire', columns=['code_insee', 'com_name_upper', 'type_et_libelle', 'code_rne', 'type_etablissement'], dossier=dossier),
+        lire_snapshot('etablissements', dossier=dossier),
+        polygones,
+    )
+    ecrire_snapshot(graphe, 'graphe_secteurs', dossier)
+
+def ecrire_tables_populations(dossier=None, chemin_populations=None):
+    """Écrit les populations et les ratios par commune et par département à partir des instantanés de dossier"""
+    from utils.populations import CHEMIN_POPULATIONS, COLONNES_CARTE_POPULATIONS, construire_tables_populations, lire_populations
+
+    tables = construire_tables_populations(
+        lire_snapshot('carte_scolaire', columns=COLONNES_CARTE_POPULATIONS, dossier=dossier),
+        lire_populations(chemin_populations or CHEMIN_POPULATIONS),
+    )
+    for nom, table in tables.items():
+        ecrire_snapshot(table, nom, dossier)
+
+def ecrire_resume_etablissements(dossier=None):
+    """Écrit la table de synthèse par établissement (voir utils.resume) à partir des instantanés de dossier"""
+    from utils.resume import COLONNES_ANNUAIRE_RESUME, COLONNES_CARTE_RESUME, construire_resume
+
+    ips = None
+    if os.path.exists(chemin_snapshot('ips_etablissements', dossier)):
+        ips = lire_snapshot('ips_etablissements', dossier=dossier).set_index('code_rne')['ips_etablissement']
+    resume = construire_resume(
+        lire_snapshot('carte_scolaire', columns=COLONNES_CARTE_RESUME, dossier=dossier),
+        lire_snapshot('annuaire', columns=COLONNES_ANNUAIRE_RESUME, dossier=dossier),
+        ips,
+    )
+    ecrire_snapshot(resume, 'resume_etablissements', dossier)
+
+def ecrire_carte_parquet(dossier=None):
+    """Écrit la copie Parquet de la carte scolaire interrogée par le moteur duckdb (voir utils.requetes)"""
+    from utils.requetes import COLONNES_PARQUET, FICHIER_PARQUET, ecrire_parquet
+
+    dossier = dossier or dossier_courant()
+    carte = lire_snapshot('carte_scolaire', columns=COLONNES_PARQUET, dossier=dossier)
+    return ecrire_parquet(carte, os.path.join(dossier, FICHIER_PARQUET))
+
+def construire_snapshot_distances(force=False):
+    """Écrit les distances domicile-établissement si elles sont absentes ou plus anciennes que leurs sources"""
+    sources = [CHEMIN_CARTE_SCOLAIRE, CHEMIN_ANNUAIRE, CHEMIN_CONTOURS_COMMUNES]
+    if force or not all(snapshot_a_jour(nom, sources) for nom in TABLES_DISTANCES):
+        construire_snapshot_carte_scolaire()
+        construire_snapshot_annuaire()
+        construire_snapshot_communes()
+        ecrire_tables_distances(DOSSIER_SNAPSHOT)
+
+def construire_snapshot_hexagones(force=False):
+    """Écrit la grille hexagonale si elle est absente ou plus ancienne que ses sources"""
+    if force or not snapshot_a_jour('hexagones', [CHEMIN_CARTE_SCOLAIRE, CHEMIN_ANNUAIRE, CHEMIN_CONTOURS_COMMUNES]):
+        construire_snapshot_carte_scolaire()
+        construire_snapshot_annuaire()
+        construire_snapshot_communes()
+        ecrire_hexagones(DOSSIER_SNAPSHOT)
+
+def construire_snapshot_graphe(force=False):
+    """Écrit le graphe de voisinage des secteurs s'il est absent ou plus ancien que la carte scolaire"""
+    if force or not snapshot_a_jour('graphe_secteurs', [CHEMIN_CARTE_SCOLAIRE]):
+        construire_snapshot_carte_scolaire()
+        ecrire_graphe(DOSSIER_SNAPSHOT)
+
+def construire_snapshot_populations(force=False):
+    """Écrit les tables de populations si elles sont absentes ou plus anciennes que leurs sources"""
+    from utils.populations import CHEMIN_POPULATIONS
+
+    if force or not all(snapshot_a_jour(nom, [CHEMIN_CARTE_SCOLAIRE, CHEMIN_POPULATIONS]) for nom in TABLES_POPULATIONS):
+        construire_snapshot_carte_scolaire()
+        ecrire_tables_populations(DOSSIER_SNAPSHOT)
+
+def construire_snapshot_resume(force=False):
+    """Écrit la table de synthèse par établissement si elle est absente ou plus ancienne que ses sources"""
+    if force or not snapshot_a_jour('resume_etablissements', [CHEMIN_CARTE_SCOLAIRE, CHEMIN_ANNUAIRE]):
+        construire_snapshot_carte_scolaire()
+        construire_snapshot_annuaire()
+        ecrire_resume_etablissements(DOSSIER_SNAPSHOT)
+
+# Registre des versions servies par le processus. Un thread de fond surveille le
+# pointeur COURANTE du pipeline ; lorsqu'une nouvelle version est activée, il charge
+# ses DataFrames (mêmes projections que la version active) hors des requêtes, puis
+# bascule 'active' en une seule affectation. Chaque session reste sur la version
+# avec laquelle elle a commencé tant que le processus la conserve.
+INTERVALLE_SURVEILLANCE = 30  # secondes
+VERSIONS_CONSERVEES = 2
+
+@st.cache_resource(show_spinner=False)
+def _registre():
+    version = version_courante()
+    registre = {'active': version, 'disponibles': [version], 'projections': set(), 'echecs': set()}
+    threading.Thread(target=_surveiller_versions, args=(registre,), name='versions-donnees', daemon=True).start()
+    return registre
+
+def _surveiller_versions(registre):
+    while True:
+        time.sleep(INTERVALLE_SURVEILLANCE)
+        nouvelle = version_courante()
+        if nouvelle == registre['active'] or nouvelle in registre['echecs']:
+            continue
+        debut = time.perf_counter()
+        try:
+            precharger_version(nouvelle, registre['projections'])
+        except Exception as e:
+            registre['echecs'].add(nouvelle)
+            print(f"Préchargement de la version {nouvelle} impossible : {str(e)}")
+            continue
+        registre['disponibles'] = [nouvelle] + registre['disponibles'][:VERSIONS_CONSERVEES - 1]
+        registre['active'] = nouvelle
+        print(f"Version {nouvelle} active ({(time.perf_counter() - debut) * 1000:.0f} ms de préchargement)")
+
+def precharger_version(version, projections):
+    """Charge en cache les DataFrames et les index d'une version, pour chaque projection déjà demandée"""
+    _charger_index_villes(version)
+    _charger_index_etablissements(version)
+    _charger_communes_geo(version)
+    _charger_index_spatial(version)
+    _charger_index_adresses(version)
+    _charger_distances(version)
+    _charger_hexagones(version)
+    _charger_matrice(version)
+    _charger_polygones(version)
+    _charger_graphe(version)
+    _charger_enveloppes(version)
+    _charger_audit(version)
+    _charger_resume(version)
+    _charger_populations(version)
+    if MOTEUR == 'duckdb':
+        _charger_connexion(version)
+    for nom, colonnes in list(projections):
+        if nom == 'carte_scolaire':
+            _charger_carte_scolaire(version, colonnes)
+        else:
+            _charger_annuaire(version, colonnes)
+
+def version_session():
+    """Version des données de la session (fixée à son ouverture)"""
+    registre = _registre()
+    version = st.session_state.get('version_donnees', registre['active'])
+    if version not in registre['disponibles']:
+        version = registre['active']
+    st.session_state['version_donnees'] = version
+    return version
+
+def nouvelle_version_disponible():
+    """Version active du processus si elle est plus récente que celle de la session, sinon None"""
+    active = _registre()['active']
+    return active if active != version_session() else None
+
+# Les DataFrames sont partagés par toutes les sessions du processus (cache_resource,
+# pas de copie par appel) : les pages ne doivent jamais les modifier en place.
+# Un DataFrame est mis en cache par version et par liste de colonnes demandée
+# (colonnes=None : toutes) ; max_entries borne le nombre de versions gardées en mémoire.
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _charger_carte_scolaire(version, colonnes=None):
+    if version is None:
+        construire_snapshot_carte_scolaire()
+    return lire_snapshot('carte_scolaire', columns=list(colonnes) if colonnes else None, dossier=dossier_version(version))
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_CONSERVEES)
+def _charger_index_villes(version):
+    if version is None:
+        construire_snapshot_carte_scolaire()
+    index = lire_snapshot('index_villes', dossier=dossier_version(version))
+    return dict(zip(index['ville_recherche'], zip(index['debut'], index['fin'])))
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_CONSERVEES)
+def _charger_index_etablissements(version):
+    if version is None:
+        construire_snapshot_carte_scolaire()
+    dossier = dossier_version(version)
+    index = lire_snapshot('index_etablissements', dossier=dossier)
+    return index.set_index('code_rne'), lire_snapshot('adresses_etablissements', dossier=dossier)
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_CONSERVEES)
+def _charger_communes_geo(version):
+    if version is None:
+        construire_snapshot_communes()
+    return lire_snapshot('communes_geo', dossier=dossier_version(version)).set_index('code_insee')
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_CONSERVEES)
+def _charger_index_spatial(version):
+    # Import local : scipy n'est chargé que par les pages qui utilisent l'index spatial
+    from utils.spatial import construire_index_spatial
+
+    annuaire = _charger_annuaire(version, tuple(COLONNES_ANNUAIRE_PROXIMITE))
+    return construire_index_spatial(annuaire), annuaire
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_CONSERVEES)
+def _charger_index_adresses(version):
+    from utils.adresses import construire_index_adresses
+
+    return construire_index_adresses(_charger_carte_scolaire(version, tuple(COLONNES_SEARCH)))
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_CONSERVEES)
+def _charger_distances(version):
+    if version is None:
+        construire_snapshot_distances()
+    dossier = dossier_version(version)
+    return lire_snapshot('distances_etablissements', dossier=dossier), lire_snapshot('distances_departements', dossier=dossier)
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_CONSERVEES)
+def _charger_hexagones(version):
+    if version is None:
+        construire_snapshot_hexagones()
+    return lire_snapshot('hexagones', dossier=dossier_version(version))
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_CONSERVEES)
+def _charger_matrice(version):
+    # Import local : scipy n'est chargé que par les pages qui utilisent la matrice
+    from utils.matrice import charger_matrice
+
+    if version is None:
+        construire_snapshot_carte_scolaire()
+    dossier = dossier_version(version)
+    return charger_matrice(*(lire_snapshot(nom, dossier=dossier) for nom in ['matrice_liens', 'matrice_communes', 'matrice_etablissements']))
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_CONSERVEES)
+def _charger_polygones(version):
+    # Les polygones ne sont produits que par le pipeline d'ingestion (option --geometries)
+    dossier = dossier_version(version)
+    if not os.path.exists(chemin_snapshot('polygones', dossier)):
+        return None
+    return lire_snapshot('polygones', dossier=dossier).set_index('code_rne').sort_values('niveau', kind='stable')
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_CONSERVEES)
+def _charger_graphe(version):
+    from utils.graphe import indexer_graphe
+
+    if version is None:
+        construire_snapshot_graphe()
+    graphe = lire_snapshot('graphe_secteurs', dossier=dossier_version(version))
+    return graphe, indexer_graphe(graphe)
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_CONSERVEES)
+def _charger_enveloppes(version):
+    # Les enveloppes ne sont produites que par le calcul par lot (python -m pipeline.enveloppes)
+    dossier = dossier_version(version)
+    if not os.path.exists(chemin_snapshot('enveloppes', dossier)):
+        return None
+    return lire_snapshot('enveloppes', dossier=dossier).set_index('code_rne')
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_CONSERVEES)
+def _charger_audit(version):
+    # L'audit n'est produit que par le calcul par lot (python -m pipeline.audit)
+    dossier = dossier_version(version)
+    if not os.path.exists(chemin_snapshot('audit_etablissements', dossier)):
+        return None
+    return lire_snapshot('audit_etablissements', dossier=dossier), lire_snapshot('audit_departements', dossier=dossier)
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_CONSERVEES)
+def _charger_resume(version):
+    if version is None:
+        construire_snapshot_resume()
+    return lire_snapshot('resume_etablissements', dossier=dossier_version(version))
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_CONSERVEES)
+def _charger_populations(version):
+    if version is None:
+        construire_snapshot_populations()
+    dossier = dossier_version(version)
+    return tuple(lire_snapshot(nom, dossier=dossier) for nom in TABLES_POPULATIONS)
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_CONSERVEES)
+def _charger_connexion(version):
+    from utils.requetes import FICHIER_PARQUET, connecter
+
+    if version is None:
+        construire_snapshot_carte_scolaire()
+    dossier = dossier_version(version)
+    chemin = os.path.join(dossier, FICHIER_PARQUET)
+    # Versions antérieures au moteur duckdb : copie Parquet écrite à la première requête
+    if not os.path.exists(chemin) or os.path.getmtime(chemin) < os.path.getmtime(chemin_snapshot('carte_scolaire', dossier)):
+        ecrire_carte_parquet(dossier)
+    return connecter(chemin)
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _charger_annuaire(version, colonnes=None):
+    if version is None:
+        construire_snapshot_annuaire()
+    return lire_snapshot('annuaire', columns=list(colonnes) if colonnes else None, dossier=dossier_version(version))
+
+def load_data(colonnes=None):
+    """Carte scolaire préparée ; colonnes limite la lecture aux colonnes utiles à la page"""
+    colonnes = tuple(colonnes) if colonnes else None
+    try:
+        _registre()['projections'].add(('carte_scolaire', colonnes))
+        return _charger_carte_scolaire(version_session(), colonnes)
+    except Exception as e:
+        st.error(f"Erreur lors du chargement du fichier : {str(e)}")
+        return None
+
+def get_index_villes():
+    """Dictionnaire ville_recherche -> (debut, fin) des lignes de la ville dans load_data()"""
+    try:
+        return _charger_index_villes(version_session())
+    except Exception as e:
+        st.error(f"Erreur lors du chargement du fichier : {str(e)}")
+        return None
+    
+def get_index_etablissements():
+    """
+    (index, adresses) : index indexé par code_rne (debut, fin, nb_villes, nb_voies, nb_hors_region),
+    adresses[debut:fin] est la charge utile de géocodage du secteur de l'établissement
+    """
+    try:
+        return _charger_index_etablissements(version_session())
+    except Exception as e:
+        st.error(f"Erreur lors du chargement du fichier : {str(e)}")
+        return None
+
+def get_index_spatial():
+    """
+    (index, annuaire) : index spatial des établissements (voir utils.spatial), dont les
+    positions renvoyées sont des numéros de ligne de annuaire
+    """
+    try:
+        return _charger_index_spatial(version_session())
+    except Exception as e:
+        st.error(f"Erreur lors du chargement du fichier : {str(e)}")
+        return None
+
+def get_index_adresses():
+    """Index de résolution des adresses saisies (voir utils.adresses), dont les positions sont des numéros de ligne de load_data(COLONNES_SEARCH)"""
+    try:
+        return _charger_index_adresses(version_session())
+    except Exception as e:
+        st.error(f"Erreur lors du chargement du fichier : {str(e)}")
+        return None
+
+def get_distances():
+    """
+    (etablissements, departements) : distributions des distances domicile-établissement
+    par établissement et par département de résidence (voir utils.distances)
+    """
+    try:
+        return _charger_distances(version_session())
+    except Exception as e:
+        st.error(f"Erreur lors du chargement du fichier : {str(e)}")
+        return None
+
+def get_hexagones():
+    """Cellules de la grille hexagonale, toutes échelles (colonne niveau, voir utils.hexagones)"""
+    try:
+        return _charger_hexagones(version_session())
+    except Exception as e:
+        st.error(f"Erreur lors du chargement du fichier : {str(e)}")
+        return None
+
+def get_matrice():
+    """Matrice origine-destination communes x établissements (voir utils.matrice.charger_matrice)"""
+    try:
+        return _charger_matrice(version_session())
+    except Exception as e:
+        st.error(f"Erreur lors du chargement du fichier : {str(e)}")
+        return None
+
+def get_polygones(code_rne):
+    """
+    Polygone du secteur de l'établissement à chaque niveau de détail (liste de géométries
+    GeoJSON, voir utils.polygones), ou None s'il n'est pas disponible
+    """
+    from utils.polygones import decoder
+
+    try:
+        polygones = _charger_polygones(version_session())
+    except Exception as e:
+        print(f"Polygones des secteurs indisponibles : {str(e)}")
+        return None
+    if polygones is None or code_rne not in polygones.index:
+        return None
+    niveaux = polygones.loc[[code_rne]]
+    return [decoder(structure, coordonnees) for structure, coordonnees in zip(niveaux['structure'], niveaux['coordonnees'])]
+
+def get_voisins(code_rne):
+    """
+    Secteurs voisins de l'établissement (arêtes du graphe de voisinage, voir utils.graphe) :
+    DataFrame éventuellement vide, ou None si le graphe n'est pas disponible
+    """
+    try:
+        graphe, index = _charger_graphe(version_session())
+    except Exception as e:
+        print(f"Graphe de voisinage indisponible : {str(e)}")
+        return None
+    debut, fin = index.get(str(code_rne), (0, 0))
+    return graphe.iloc[debut:fin]
+
+def get_enveloppe(code_rne):
+    """
+    Aire de recrutement calculée de l'établissement (voir utils.enveloppes) : dictionnaire
+    geometrie (GeoJSON), surface_km2, compacite, points, points_retenus ; None si indisponible
+    """
+    from utils.polygones import decoder
+
+    try:
+        enveloppes = _charger_enveloppes(version_session())
+    except Exception as e:
+        print(f"Aires de recrutement indisponibles : {str(e)}")
+        return None
+    if enveloppes is None or code_rne not in enveloppes.index:
+        return None
+    enveloppe = enveloppes.loc[code_rne]
+    return {
+        'geometrie': decoder(enveloppe['structure'], enveloppe['coordonnees']),
+        **{colonne: enveloppe[colonne].item() for colonne in ['surface_km2', 'compacite', 'points', 'points_retenus']},
+    }
+
+def get_enveloppes():
+    """Surface et compacité de l'aire de recrutement de chaque établissement (sans les géométries), ou None"""
+    try:
+        enveloppes = _charger_enveloppes(version_session())
+    except Exception as e:
+        st.error(f"Erreur lors du chargement du fichier : {str(e)}")
+        return None
+    return None if enveloppes is None else enveloppes.drop(columns=['structure', 'coordonnees']).reset_index()
+
+def get_audit():
+    """
+    (etablissements, departements) : résumés de l'audit des règles contre les polygones
+    (voir utils.audit), ou None si la version n'a pas été auditée
+    """
+    try:
+        return _charger_audit(version_session())
+    except Exception as e:
+        st.error(f"Erreur lors du chargement du fichier : {str(e)}")
+        return None
+
+def get_resume_etablissements():
+    """Table de synthèse par établissement (voir utils.resume), une ligne par code_rne"""
+    try:
+        return _charger_resume(version_session())
+    except Exception as e:
+        st.error(f"Erreur lors du chargement du fichier : {str(e)}")
+        return None
+
+def get_populations():
+    """
+    (communes, departements) : établissements, population et ratio pour 100 000 habitants par
+    commune et par département de résidence, pour chaque type d'établissement (voir utils.populations)
+    """
+    try:
+        return _charger_populations(version_session())
+    except Exception as e:
+        st.error(f"Erreur lors du chargement du fichier : {str(e)}")
+        return None
+
+def get_requete(nom, df, *args):
+    """
+    Résultat de la requête nom de utils.requetes : sur df (moteur pandas) ou sur la copie
+    Parquet de la version de la session (moteur duckdb, variable CARTE_SCOLAIRE_MOTEUR)
+    """
+    from utils.requetes import executer
+
+    try:
+        source = _charger_connexion(version_session()) if MOTEUR == 'duckdb' else df
+        return executer(nom, source, *args)
+    except Exception as e:
+        st.error(f"Erreur lors du chargement du fichier : {str(e)}")
+        return None
+
+def get_commune_geo(code_insee):
+    """Centroïde et emprise de la commune (dictionnaire), ou None si elle n'est pas dans la table"""
+    try:
+        communes = _charger_communes_geo(version_session())
+    except Exception as e:
+        print(f"Table des communes indisponible : {str(e)}")
+        return None
+    if code_insee is None or pd.isna(code_insee) or int(code_insee) not in communes.index:
+        return None
+    return communes.loc[int(code_insee)].to_dict()
+
+def load_data_annuaire(colonnes=None):
+    """Annuaire filtré ; colonnes limite la lecture aux colonnes utiles à la page"""
+    colonnes = tuple(colonnes) if colonnes else None
+    try:
+        _registre()['projections'].add(('annuaire', colonnes))
+        return _charger_annuaire(version_session(), colonnes)
+    except Exception as e:
+        st.error(f"Erreur lors du chargement du fichier : {str(e)}")
+        return None
+
+if __name__ == "__main__":
+    # Préparation des instantanés avant le démarrage des processus Streamlit
+    construire_snapshot_carte_scolaire(force=True)
+    construire_snapshot_annuaire(force=True)
+    construire_snapshot_communes(force=True)
+    construire_snapshot_distances(force=True)
+    construire_snapshot_hexagones(force=True)
+    construire_snapshot_populations(force=True)
+    brut = pd.read_csv(CHEMIN_CARTE_SCOLAIRE, low_memory=False)
+    print(f"Carte scolaire : {len(brut)} lignes, {memoire(brut):.1f} Mo (CSV) -> "
+          f"{len(lire_snapshot('regles', dossier=DOSSIER_SNAPSHOT))} règles, "
+          f"{memoire(lire_snapshot('carte_scolaire', dossier=DOSSIER_SNAPSHOT)):.1f} Mo (instantané)")
+    print(f"Annuaire filtré : {memoire(lire_snapshot('annuaire', dossier=DOSSIER_SNAPSHOT)):.1f} Mo (instantané)")
@@ -0,0 +1,88 @@
+"""
+Distances domicile-établissement par secteur.
+
+Les adresses des secteurs ne sont pas géocodées : chaque commune rattachée à un
+établissement est placée en son centroïde (table communes_geo) et l'établissement
+en sa position dans l'annuaire (code_rne = Identifiant_de_l_etablissement).
+L'unité de mesure est le couple (commune, établissement) : une grande ville
+découpée en nombreuses voies compte une fois par établissement de rattachement.
+
+Les distances orthodromiques (haversine) sont calculées en une passe NumPy sur
+toute la table ; les distributions (médiane, 90e centile, maximum, part au-delà
+de chaque seuil) sont produites par établissement et par département, une fois
+par version des données.
+"""
+import numpy as np
+import pandas as pd
+
+RAYON_TERRE_KM = 6371.0088
+SEUILS_KM = [5, 10, 20]
+COLONNES_CARTE_DISTANCES = ['libelle_departement_eleve', 'code_insee', 'com_name_upper', 'code_rne', 'type_etablissement']
+# Ligne « tous types » du résumé par département
+TOUS_TYPES = 'Tous'
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Distance orthodromique en km, élément par élément (tableaux NumPy de même forme)"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype='float64')) for x in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RAYON_TERRE_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+def calculer_distances(carte, communes_geo, annuaire):
+    """
+    Un couple (commune, établissement) par ligne, avec le nombre de lignes de la carte
+    scolaire correspondantes et la distance en km (NaN si une des positions manque).
+    communes_geo est indexée par code_insee.
+    """
+    carte = carte[carte['code_rne'].notna() & carte['code_insee'].notna()]
+    couples = (
+        carte.astype({c: object for c in COLONNES_CARTE_DISTANCES if isinstance(carte[c].dtype, pd.CategoricalDtype)})
+        .groupby(COLONNES_CARTE_DISTANCES, dropna=False)
+        .size().rename('lignes').reset_index()
+    )
+    code_insee = couples['code_insee'].to_numpy(dtype='int64')
+    communes = communes_geo.reindex(code_insee)
+    positions = annuaire.dropna(subset=['latitude', 'longitude']).drop_duplicates('Identifiant_de_l_etablissement')
+    positions = positions.set_index(positions['Identifiant_de_l_etablissement'].astype(str)).reindex(couples['code_rne'].astype(str))
+    couples['distance_km'] = haversine_km(
+        communes['latitude'].to_numpy(dtype='float64'), communes['longitude'].to_numpy(dtype='float64'),
+        positions['latitude'].to_numpy(dtype='float64'), positions['longitude'].to_numpy(dtype='float64'),
+    ).astype('float32')
+    couples['Nom_etablissement'] = positions['Nom_etablissement'].to_numpy()
+    return couples
+
+def distributions(distances, cles):
+    """Médiane, 90e centile, maximum et part des couples au-delà de chaque seuil, par groupe de clés"""
+    distances = distances[distances['distance_km'].notna()]
+    groupes = distances.groupby(cles, observed=True, sort=True)['distance_km']
+    resume = groupes.agg(communes='size', mediane_km='median', max_km='max')
+    resume.insert(2, 'p90_km', groupes.quantile(0.9))
+    for seuil in SEUILS_KM:
+        au_dela = (distances['distance_km'] > seuil).astype('float64')
+        resume[f"part_plus_{seuil}_km"] = au_dela.groupby([distances[c] for c in cles], observed=True, sort=True).mean()
+    return resume.reset_index()
+
+def distributions_etablissements(distances):
+    """Distribution par établissement ; département de rattachement : celui du plus grand nombre de communes"""
+    resume = distributions(distances, ['code_rne', 'Nom_etablissement', 'type_etablissement'])
+    departements = (
+        distances.groupby(['code_rne', 'libelle_departement_eleve'], observed=True).size()
+        .rename('n').reset_index().sort_values('n', ascending=False, kind='stable')
+        .drop_duplicates('code_rne').set_index('code_rne')['libelle_departement_eleve']
+    )
+    resume.insert(3, 'libelle_departement_eleve', resume['code_rne'].map(departements))
+    return resume.sort_values('mediane_km', ascending=False, kind='stable').reset_index(drop=True)
+
+def distributions_departements(distances):
+    """Distribution par département de résidence et type d'établissement, plus une ligne tous types"""
+    par_type = distributions(distances, ['libelle_departement_eleve', 'type_etablissement'])
+    tous = distributions(distances, ['libelle_departement_eleve']).assign(type_etablissement=TOUS_TYPES)
+    return pd.concat([par_type, tous[par_type.columns]], ignore_index=True)
+
+def construire_tables_distances(carte, communes_geo, annuaire):
+    """Tables écrites dans chaque version : {nom de l'instantané: DataFrame}"""
+    distances = calculer_distances(carte, communes_geo, annuaire)
+    return {
+        'distances_secteurs': distances,
+        'distances_etablissements': distributions_etablissements(distances),
+        'distances_departements': distributions_departements(distances),
+    }
@@ -0,0 +1,81 @@
+"""
+Aire de recrutement calculée de chaque établissement : enveloppe concave des points
+géocodés de son secteur.
+
+Pour chaque code_rne, les points trop éloignés du point médian du secteur (voies
+homonymes géocodées dans une autre commune, par exemple) sont écartés, puis
+l'enveloppe concave (shapely.concave_hull) des points retenus est calculée pour tous
+les établissements en une seule passe vectorisée, dans une projection plane en km.
+Un secteur de moins de trois points distincts (une seule commune entière) est
+représenté par un disque de RAYON_MINIMAL_KM autour de ses points.
+
+Chaque enveloppe est stockée comme les polygones des secteurs (utils.polygones :
+structure et coordonnées codées), avec sa surface et sa compacité (indice de
+Polsby-Popper, 4πA/P² : 1 pour un disque, proche de 0 pour un secteur étiré).
+"""
+import numpy as np
+import pandas as pd
+
+from utils.distances import haversine_km
+from utils.hexagones import depuis_km, vers_km
+from utils.polygones import encoder
+
+# 0 : enveloppe la plus concave, 1 : enveloppe convexe
+RATIO_CONCAVITE = 0.3
+# Un point est écarté au-delà de max(SEUIL_MINIMAL_KM, Q3 + ECART_INTERQUARTILE * (Q3 - Q1))
+SEUIL_MINIMAL_KM = 5.0
+ECART_INTERQUARTILE = 3.0
+RAYON_MINIMAL_KM = 1.0
+COLONNES_ENVELOPPES = ['code_rne', 'points', 'points_retenus', 'surface_km2', 'compacite', 'structure', 'coordonnees']
+
+def filtrer_aberrants(points):
+    """
+    points : code_rne, latitude, longitude. Renvoie le masque des points retenus
+    (distance au point médian du secteur sous le seuil de l'établissement).
+    """
+    groupes = points.groupby('code_rne', sort=False)
+    latitude = groupes['latitude'].transform('median').to_numpy()
+    longitude = groupes['longitude'].transform('median').to_numpy()
+    distance = pd.Series(
+        haversine_km(points['latitude'].to_numpy(), points['longitude'].to_numpy(), latitude, longitude),
+        index=points.index,
+    )
+    quartiles = distance.groupby(points['code_rne'], sort=False)
+    q1, q3 = quartiles.transform(lambda d: d.quantile(0.25)), quartiles.transform(lambda d: d.quantile(0.75))
+    seuil = np.maximum(SEUIL_MINIMAL_KM, q3 + ECART_INTERQUARTILE * (q3 - q1))
+    return (distance <= seuil).to_numpy()
+
+def construire_enveloppes(points):
+    """
+    points : code_rne, latitude, longitude (un point par adresse géocodée, NaN écartés).
+    Renvoie une ligne par établissement (COLONNES_ENVELOPPES).
+    """
+    import shapely
+
+    points = points.dropna(subset=['latitude', 'longitude'])
+    nombres = points.groupby('code_rne').size()
+    points = points[filtrer_aberrants(points)]
+    x, y = vers_km(points['latitude'].to_numpy(), points['longitude'].to_numpy())
+    plans = pd.DataFrame({'code_rne': points['code_rne'].to_numpy(), 'x': np.round(x, 3), 'y': np.round(y, 3)})
+    plans = plans.drop_duplicates().sort_values('code_rne', kind='stable')
+    codes, groupe = np.unique(plans['code_rne'].to_numpy(dtype=str), return_inverse=True)
+    retenus = points.groupby('code_rne').size().reindex(codes).to_numpy()
+
+    nuages = shapely.multipoints(plans[['x', 'y']].to_numpy(), indices=groupe.ravel())
+    enveloppes = shapely.concave_hull(nuages, ratio=RATIO_CONCAVITE)
+    # Point ou segment (moins de trois points distincts) : disque autour des points
+    degenerees = shapely.get_type_id(enveloppes) != 3
+    enveloppes[degenerees] = shapely.buffer(enveloppes[degenerees], RAYON_MINIMAL_KM)
+    surfaces = shapely.area(enveloppes)
+    compacites = 4 * np.pi * surfaces / shapely.length(enveloppes) ** 2
+
+    def vers_degres(xy):
+        latitude, longitude = depuis_km(xy[:, 0], xy[:, 1])
+        return np.stack([longitude, latitude], axis=1)
+
+    lignes = []
+    for code_rne, enveloppe, retenu, surface, compacite in zip(codes, enveloppes, retenus, surfaces, compacites):
+        structure, coordonnees, _ = encoder(shapely.transform(enveloppe, vers_degres))
+        lignes.append((code_rne, int(nombres[code_rne]), int(retenu), surface, compacite, structure, coordonnees))
+    enveloppes = pd.DataFrame(lignes, columns=COLONNES_ENVELOPPES)
+    return enveloppes.astype({'points': 'int32', 'points_retenus': 'int32', 'surface_km2': 'float32', 'compacite': 'float32'})
@@ -0,0 +1,116 @@
+"""
+Évolution de la sectorisation entre deux versions de la carte scolaire.
+
+Chaque règle est résumée par deux empreintes 64 bits (pd.util.hash_pandas_object) :
+- la clé de l'adresse : commune, voie, plage de numéros, parité et type d'établissement ;
+- la clé complète : la même, plus l'établissement (code_rne).
+
+Les règles dont la clé complète n'existe que dans une version ont changé : si leur
+clé d'adresse existe dans les deux versions, l'adresse a été réaffectée à un autre
+établissement ; sinon elle a été ajoutée ou supprimée. Dans un secteur à plusieurs
+établissements, les règles sortantes et entrantes d'une même adresse sont appariées une
+à une, le surplus étant compté en ajouts ou suppressions. Les comparaisons se font sur
+des tableaux d'entiers triés (np.isin), sans jointure sur les libellés.
+
+Usage : python -m utils.evolution <version avant> <version après> [--rapport changements.csv]
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from utils.snapshot import dossier_version, lire_snapshot
+
+COLONNES_ADRESSE = [
+    'code_insee', 'com_name_upper', 'type_et_libelle', 'no_de_voie_debut', 'no_de_voie_fin',
+    'parite', 'type_etablissement',
+]
+COLONNES_EVOLUTION = ['code_departement', 'libelle_departement_eleve'] + COLONNES_ADRESSE + ['code_rne']
+CHANGEMENTS = ['ajout', 'suppression', 'réaffectation']
+
+def charger_version(version):
+    """Carte scolaire d'une version, limitée aux colonnes comparées"""
+    return lire_snapshot('carte_scolaire', columns=COLONNES_EVOLUTION, dossier=dossier_version(version))
+
+def _empreintes(df):
+    """(clé d'adresse, clé complète) de chaque règle"""
+    adresse = pd.util.hash_pandas_object(df[COLONNES_ADRESSE], index=False).to_numpy()
+    complete = pd.util.hash_pandas_object(df[COLONNES_ADRESSE + ['code_rne']], index=False).to_numpy()
+    return adresse, complete
+
+def _en_texte(df):
+    return df.astype({c: object for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+
+def comparer(avant, apres):
+    """
+    Rapport des changements entre deux cartes scolaires : une ligne par règle ajoutée,
+    supprimée ou réaffectée (code_rne_avant -> code_rne_apres).
+    """
+    adresse_avant, complete_avant = _empreintes(avant)
+    adresse_apres, complete_apres = _empreintes(apres)
+
+    sortants = np.flatnonzero(~np.isin(complete_avant, complete_apres))
+    entrants = np.flatnonzero(~np.isin(complete_apres, complete_avant))
+    lignes_sortantes = _en_texte(avant.iloc[sortants]).assign(adresse=adresse_avant[sortants])
+    lignes_entrantes = _en_texte(apres.iloc[entrants]).assign(adresse=adresse_apres[entrants])
+    # Rang de la règle parmi celles de son adresse : appariement un à un, sans produit croisé
+    lignes_sortantes['rang'] = lignes_sortantes.groupby('adresse').cumcount()
+    lignes_entrantes['rang'] = lignes_entrantes.groupby('adresse').cumcount()
+
+    # Adresse présente dans les deux versions mais avec un autre établissement
+    reaffectees = lignes_sortantes[['adresse', 'rang', 'code_rne']].merge(
+        lignes_entrantes, on=['adresse', 'rang'], suffixes=('_avant', '_apres'),
+    )
+    reaffectees['changement'] = 'réaffectation'
+
+    cles_sortantes = pd.MultiIndex.from_frame(lignes_sortantes[['adresse', 'rang']])
+    cles_entrantes = pd.MultiIndex.from_frame(lignes_entrantes[['adresse', 'rang']])
+    ajouts = lignes_entrantes[~cles_entrantes.isin(cles_sortantes)]
+    ajouts = ajouts.rename(columns={'code_rne': 'code_rne_apres'}).assign(changement='ajout', code_rne_avant=None)
+    suppressions = lignes_sortantes[~cles_sortantes.isin(cles_entrantes)]
+    suppressions = suppressions.rename(columns={'code_rne': 'code_rne_avant'}).assign(changement='suppression', code_rne_apres=None)
+
+    colonnes = ['changement'] + COLONNES_EVOLUTION[:-1] + ['code_rne_avant', 'code_rne_apres']
+    rapport = pd.concat([ajouts[colonnes], suppressions[colonnes], reaffectees[colonnes]], ignore_index=True)
+    return rapport.sort_values(['code_departement', 'com_name_upper', 'type_et_libelle', 'changement'], kind='stable').reset_index(drop=True)
+
+def resume_par_departement(rapport):
+    """Nombre de changements par département et par nature"""
+    return pd.crosstab(rapport['libelle_departement_eleve'], rapport['changement']).reindex(columns=CHANGEMENTS, fill_value=0)
+
+def resume_par_etablissement(rapport):
+    """Adresses gagnées et perdues par établissement"""
+    gagnees = rapport['code_rne_apres'].dropna().value_counts().rename('adresses_gagnees')
+    perdues = rapport['code_rne_avant'].dropna().value_counts().rename('adresses_perdues')
+    resume = pd.concat([gagnees, perdues], axis=1).fillna(0).astype(int)
+    resume.index.name = 'code_rne'
+    resume['solde'] = resume['adresses_gagnees'] - resume['adresses_perdues']
+    return resume.sort_values('solde', key=abs, ascending=False).reset_index()
+
+def etablissements_ouverts_fermes(avant, apres):
+    """Établissements présents dans une seule des deux versions"""
+    codes_avant = set(avant['code_rne'].dropna().astype(str))
+    codes_apres = set(apres['code_rne'].dropna().astype(str))
+    return pd.DataFrame(
+        [(code, 'ouvert') for code in sorted(codes_apres - codes_avant)]
+        + [(code, 'fermé') for code in sorted(codes_avant - codes_apres)],
+        columns=['code_rne', 'statut'],
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Changements de sectorisation entre deux versions")
+    parser.add_argument('avant', help="Version de référence (nom du dossier dans datasets/versions)")
+    parser.add_argument('apres', help="Version comparée")
+    parser.add_argument('--rapport', help="Fichier CSV du rapport détaillé")
+    args = parser.parse_args()
+
+    avant, apres = charger_version(args.avant), charger_version(args.apres)
+    rapport = comparer(avant, apres)
+    print(resume_par_departement(rapport).to_string())
+    print(etablissements_ouverts_fermes(avant, apres).to_string(index=False))
+    if args.rapport:
+        rapport.to_csv(args.rapport, index=False)
+        print(f"Rapport écrit dans {args.rapport} ({len(rapport)} lignes)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Géocodeur local, construit à partir d'extraits départementaux de la Base Adresse
+Nationale (fichiers adresses-<département>.csv[.gz] de adresse.data.gouv.fr).
+
+Index (un dictionnaire, construit une fois par processus) :
+- voies : une par (code_insee, libellé normalisé), avec la position moyenne de ses
+  adresses et les bornes [debut, fin[ de ses numéros ; cle_voie : (code_insee, libellé) -> voie ;
+- numéros de chaque voie, triés (numéro, indice de répétition), avec leur position ;
+- communes : code_insee -> bornes de ses voies (recherche approchée par jetons) et
+  position moyenne de ses adresses.
+
+Les libellés sont normalisés (majuscules sans accents, types de voie abrégés
+développés, mots vides retirés) : « av. J. Jaurès » et « AVENUE JEAN JAURES » ne
+diffèrent que par le jeton J / JEAN, résolu par la recherche approchée.
+
+Les réponses ont la forme de celles de l'API BAN : rechercher() renvoie un
+FeatureCollection (features[0].geometry.coordinates = [longitude, latitude]),
+geocoder_tableau() ajoute latitude, longitude, result_label, result_score et
+result_type à un DataFrame, comme la recherche CSV.
+
+Usage : python -m utils.geocodeur --ban <adresses.csv> [--citycode 31555] "12 bis rue de la paix"
+        python -m utils.geocodeur --ban <adresses.csv> --csv <adresses à géocoder.csv>
+"""
+import argparse
+import re
+import time
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+COLONNES_BAN = ['numero', 'rep', 'nom_voie', 'code_insee', 'nom_commune', 'lon', 'lat']
+TYPES_VOIE = {
+    'ALL': 'ALLEE', 'AV': 'AVENUE', 'AVE': 'AVENUE', 'BD': 'BOULEVARD', 'BLD': 'BOULEVARD',
+    'BOUL': 'BOULEVARD', 'CHE': 'CHEMIN', 'CHEM': 'CHEMIN', 'CHS': 'CHAUSSEE', 'CRS': 'COURS',
+    'ESP': 'ESPLANADE', 'FBG': 'FAUBOURG', 'FG': 'FAUBOURG', 'HAM': 'HAMEAU', 'IMP': 'IMPASSE',
+    'LOT': 'LOTISSEMENT', 'PAS': 'PASSAGE', 'PL': 'PLACE', 'PROM': 'PROMENADE', 'QU': 'QUAI',
+    'R': 'RUE', 'RES': 'RESIDENCE', 'RTE': 'ROUTE', 'SQ': 'SQUARE', 'ST': 'SAINT', 'STE': 'SAINTE',
+    'TRAV': 'TRAVERSE',
+}
+MOTS_VIDES = {'A', 'AU', 'AUX', 'D', 'DE', 'DES', 'DU', 'ET', 'L', 'LA', 'LE', 'LES'}
+# Score minimal (indice de Jaccard des jetons) d'une voie trouvée par recherche approchée
+SCORE_MINIMAL = 0.5
+# Indice de répétition : BIS, TER..., ou une lettre seule qui n'est pas un type de voie abrégé (« 12 R. de la Paix »)
+LETTRES_TYPES = ''.join(sorted(cle for cle in TYPES_VOIE if len(cle) == 1))
+NUMERO = re.compile(rf"^\s*(\d+)\s*(BIS|TER|QUATER|QUINQUIES|(?![{LETTRES_TYPES}])[A-Z](?![A-Z]))?[\s,]*(.*)$")
+
+@lru_cache(maxsize=200_000)
+def normaliser(texte):
+    """Libellé -> tuple de jetons (majuscules sans accents, abréviations développées, sans mots vides)"""
+    texte = unicodedata.normalize('NFKD', str(texte)).encode('ascii', 'ignore').decode().upper()
+    jetons = (TYPES_VOIE.get(jeton, jeton) for jeton in re.split(r"[^A-Z0-9]+", texte) if jeton)
+    return tuple(jeton for jeton in jetons if jeton not in MOTS_VIDES)
+
+@lru_cache(maxsize=200_000)
+def separer_numero(adresse):
+    """'12 bis rue X' -> (12, 'BIS', 'rue X') ; sans numéro : (None, '', adresse)"""
+    correspondance = NUMERO.match(str(adresse).upper())
+    if correspondance is None:
+        return None, '', str(adresse)
+    numero, rep, voie = correspondance.groups()
+    return int(numero), rep or '', voie
+
+def _code_insee(valeurs):
+    return pd.to_numeric(pd.Series(valeurs), errors='coerce').fillna(-1).astype('int64').to_numpy()
+
+def _code_commune(code):
+    """Code INSEE unitaire -> entier (-1 si absent ou non numérique, comme _code_insee)"""
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        return -1
+
+def construire_geocodeur(ban):
+    """ban : DataFrame au format BAN (COLONNES_BAN). Renvoie l'index du géocodeur"""
+    ban = ban.dropna(subset=['nom_voie', 'lon', 'lat'])
+    libelles = pd.Series(ban['nom_voie'].astype(str).unique())
+    cles = dict(zip(libelles, libelles.map(lambda libelle: ' '.join(normaliser(libelle)))))
+    adresses = pd.DataFrame({
+        'code_insee': _code_insee(ban['code_insee']),
+        'nom_commune': ban['nom_commune'].astype(str).to_numpy(),
+        'cle': ban['nom_voie'].astype(str).map(cles).to_numpy(),
+        'nom_voie': ban['nom_voie'].astype(str).to_numpy(),
+        'numero': pd.to_numeric(ban['numero'], errors='coerce').fillna(0).astype('int32').to_numpy(),
+        'rep': ban['rep'].fillna('').astype(str).str.upper().to_numpy() if 'rep' in ban else '',
+        'longitude': ban['lon'].to_numpy(dtype='float64'),
+        'latitude': ban['lat'].to_numpy(dtype='float64'),
+    }).sort_values(['code_insee', 'cle', 'numero', 'rep'], kind='stable').reset_index(drop=True)
+
+    # Même ordre que adresses : les numéros d'une voie sont la tranche [debut, fin[
+    voies = adresses.groupby(['code_insee', 'cle'], sort=True).agg(
+        nom_voie=('nom_voie', 'first'), longitude=('longitude', 'mean'), latitude=('latitude', 'mean'),
+        nombre=('numero', 'size'),
+    ).reset_index()
+    fins = np.cumsum(voies['nombre'].to_numpy())
+    communes = adresses.groupby('code_insee', sort=True).agg(
+        nom=('nom_commune', 'first'), longitude=('longitude', 'mean'), latitude=('latitude', 'mean'),
+    )
+    codes, premieres = np.unique(voies['code_insee'].to_numpy(), return_index=True)
+    dernieres = np.append(premieres[1:], len(voies))
+    return {
+        'cle_voie': dict(zip(zip(voies['code_insee'].tolist(), voies['cle'].tolist()), range(len(voies)))),
+        'jetons': [frozenset(cle.split()) for cle in voies['cle']],
+        'noms_voies': voies['nom_voie'].tolist(),
+        'positions_voies': voies[['longitude', 'latitude']].to_numpy().round(6),
+        'debuts': (fins - voies['nombre'].to_numpy()).tolist(),
+        'fins': fins.tolist(),
+        'numeros': adresses['numero'].to_numpy(),
+        'reps': adresses['rep'].to_numpy(),
+        'positions': adresses[['longitude', 'latitude']].to_numpy(),
+        'communes': {
+            code: (premiere, derniere, round(communes.at[code, 'longitude'], 6), round(communes.at[code, 'latitude'], 6), communes.at[code, 'nom'])
+            for code, premiere, derniere in zip(codes.tolist(), premieres.tolist(), dernieres.tolist())
+        },
+    }
+
+def charger_geocodeur(chemins):
+    """Index du géocodeur à partir d'un ou plusieurs extraits BAN (CSV séparé par ';', éventuellement gzip)"""
+    ban = pd.concat([
+        pd.read_csv(chemin, sep=';', usecols=lambda c: c in COLONNES_BAN, dtype={'code_insee': str, 'rep': str}, low_memory=False)
+        for chemin in chemins
+    ], ignore_index=True)
+    return construire_geocodeur(ban)
+
+def couvre(geocodeur, code_insee):
+    """Vrai si la commune est dans les extraits chargés"""
+    return _code_commune(code_insee) in geocodeur['communes']
+
+def _trouver_voie(geocodeur, code_insee, jetons):
+    """(voie, score) : correspondance exacte du libellé normalisé, sinon meilleur indice de Jaccard dans la commune"""
+    voie = geocodeur['cle_voie'].get((code_insee, ' '.join(jetons)))
+    if voie is not None:
+        return voie, 1.0
+    commune = geocodeur['communes'].get(code_insee)
+    if commune is None or not jetons:
+        return None, 0.0
+    jetons = frozenset(jetons)
+    meilleure, score = None, 0.0
+    for candidate in range(commune[0], commune[1]):
+        autres = geocodeur['jetons'][candidate]
+        indice = len(jetons & autres) / len(jetons | autres)
+        if indice > score:
+            meilleure, score = candidate, indice
+    return (meilleure, score) if score >= SCORE_MINIMAL else (None, 0.0)
+
+def _numero(geocodeur, voie, numero, rep):
+    """(position, exact) du numéro dans la voie : numéro et indice de répétition, sinon numéro de même parité le plus proche"""
+    debut, fin = geocodeur['debuts'][voie], geocodeur['fins'][voie]
+    numeros = geocodeur['numeros'][debut:fin]
+    exacts = np.flatnonzero((numeros == numero) & (geocodeur['reps'][debut:fin] == rep))
+    if len(exacts):
+        return debut + exacts[0], True
+    parite = np.flatnonzero(numeros % 2 == numero % 2)
+    if not len(parite):
+        return None, False
+    return debut + parite[np.argmin(np.abs(numeros[parite] - numero))], False
+
+def localiser(geocodeur, adresse, code_insee):
+    """
+    (longitude, latitude, libellé, score, type) de l'adresse dans la commune (code_insee entier), ou None.
+    type : housenumber (numéro trouvé), street (voie seule, ou position du numéro de même
+    parité le plus proche), municipality (adresse vide : position moyenne de la commune).
+    """
+    commune = geocodeur['communes'].get(code_insee)
+    if commune is None:
+        return None
+    if adresse is None or (isinstance(adresse, float) and np.isnan(adresse)) or not str(adresse).strip():
+        return commune[2], commune[3], commune[4], 1.0, 'municipality'
+    numero, rep, libelle = separer_numero(adresse)
+    voie, score = _trouver_voie(geocodeur, code_insee, normaliser(libelle))
+    if voie is None:
+        return None
+    nom_voie = geocodeur['noms_voies'][voie]
+    if numero is not None:
+        position, exact = _numero(geocodeur, voie, numero, rep)
+        if exact:
+            libelle = f"{numero}{' ' + rep.lower() if rep else ''} {nom_voie} {commune[4]}"
+            return *geocodeur['positions'][position], libelle, score, 'housenumber'
+        if position is not None:
+            return *geocodeur['positions'][position], f"{nom_voie} {commune[4]}", score, 'street'
+    return *geocodeur['positions_voies'][voie], f"{nom_voie} {commune[4]}", score, 'street'
+
+def rechercher(geocodeur, q, citycode):
+    """Réponse de la forme de /search/ de l'API BAN (FeatureCollection, au plus un résultat)"""
+    resultat = localiser(geocodeur, q, _code_commune(citycode))
+    if resultat is None:
+        return {'type': 'FeatureCollection', 'features': []}
+    longitude, latitude, libelle, score, type_ = resultat
+    return {'type': 'FeatureCollection', 'features': [{
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [float(longitude), float(latitude)]},
+        'properties': {'label': libelle, 'score': score, 'type': type_, 'citycode': str(citycode)},
+    }]}
+
+def geocoder_tableau(geocodeur, df, colonne_adresse='adresse', colonne_citycode='citycode'):
+    """Équivalent local de /search/csv/ : ajoute latitude, longitude, result_label, result_score, result_type"""
+    # Codes convertis une fois pour tout le tableau : localiser reçoit des entiers
+    cles = list(zip(df[colonne_adresse].tolist(), _code_insee(df[colonne_citycode]).tolist()))
+    resultats = {cle: localiser(geocodeur, *cle) for cle in set(cles)}
+    lignes = [resultats[cle] or (np.nan, np.nan, None, np.nan, None) for cle in cles]
+    colonnes = list(zip(*lignes)) if lignes else [[]] * 5
+    return df.assign(
+        latitude=np.asarray(colonnes[1], dtype='float64'),
+        longitude=np.asarray(colonnes[0], dtype='float64'),
+        result_label=list(colonnes[2]),
+        result_score=np.asarray(colonnes[3], dtype='float64'),
+        result_type=list(colonnes[4]),
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Géocodage local à partir d'un extrait de la Base Adresse Nationale")
+    parser.add_argument('--ban', nargs='+', required=True, help="Extrait(s) BAN adresses-<département>.csv[.gz]")
+    parser.add_argument('--citycode', default=None, help="Code INSEE de la commune (recherche unitaire)")
+    parser.add_argument('--csv', default=None, help="CSV à géocoder (colonnes adresse et citycode), résultat sur la sortie standard")
+    parser.add_argument('adresse', nargs='?', default=None)
+    args = parser.parse_args()
+
+    debut = time.perf_counter()
+    geocodeur = charger_geocodeur(args.ban)
+    print(f"{len(geocodeur['noms_voies'])} voies, {len(geocodeur['numeros'])} adresses, "
+          f"{len(geocodeur['communes'])} communes ({time.perf_counter() - debut:.2f} s)")
+    if args.csv:
+        df = pd.read_csv(args.csv, dtype={'citycode': str})
+        debut = time.perf_counter()
+        resultats = geocoder_tableau(geocodeur, df)
+        duree = time.perf_counter() - debut
+        print(resultats.to_csv(index=False), end='')
+        print(f"{len(df)} lignes en {duree:.3f} s ({len(df) / max(duree, 1e-9):,.0f} lignes/s), "
+              f"{resultats['latitude'].notna().mean():.1%} trouvées")
+    elif args.adresse is not None:
+        print(rechercher(geocodeur, args.adresse, args.citycode))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Graphe de voisinage des secteurs : un nœud par établissement, une arête entre deux
+établissements du même type (collège ou lycée) dont les secteurs :
+- se touchent : longueur de frontière commune (km) ;
+- se chevauchent : surface commune (km²) ;
+- partagent des voies : voies que la carte scolaire rattache aux deux établissements
+  (par exemple une voie découpée par plages de numéros).
+
+Les couples candidats sont donnés par un STRtree (requête groupée « à moins de
+TOLERANCE_KM »), puis vérifiés par des intersections exactes, dans une projection
+plane en km. Les voies partagées sont obtenues par un groupby sur la carte scolaire.
+
+Les arêtes sont stockées dans les deux sens, triées par établissement d'origine :
+les voisins d'un établissement sont une tranche de la table.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.hexagones import vers_km
+
+# Écart toléré entre deux contours numérisés séparément (20 m)
+TOLERANCE_KM = 0.02
+EXEMPLES_VOIES = 5
+COLONNES_GRAPHE = ['code_rne', 'voisin', 'type_etablissement', 'frontiere_km', 'chevauchement_km2', 'voies_partagees', 'exemples_voies']
+
+def aretes_geometriques(polygones, types):
+    """
+    polygones : code_rne -> géométrie shapely (lon, lat) ; types : code_rne -> type.
+    Renvoie une arête par couple (a < b) de secteurs voisins ou qui se chevauchent.
+    """
+    import shapely
+
+    codes = sorted(c for c in polygones if c in types)
+    geometries = np.array([shapely.transform(polygones[c], lambda xy: np.stack(vers_km(xy[:, 1], xy[:, 0]), axis=1)) for c in codes])
+    if len(geometries) < 2:
+        return pd.DataFrame(columns=['code_rne', 'voisin', 'frontiere_km', 'chevauchement_km2'])
+    arbre = shapely.STRtree(geometries)
+    gauche, droite = arbre.query(geometries, predicate='dwithin', distance=TOLERANCE_KM)
+    type_codes = np.array([types[c] for c in codes])
+    garder = (gauche < droite) & (type_codes[gauche] == type_codes[droite])
+    gauche, droite = gauche[garder], droite[garder]
+
+    # Tests exacts, vectorisés sur les couples candidats
+    contours = shapely.boundary(geometries)
+    frontiere = shapely.length(shapely.intersection(contours[gauche], shapely.buffer(contours[droite], TOLERANCE_KM)))
+    chevauchement = shapely.area(shapely.intersection(geometries[gauche], geometries[droite]))
+    codes = np.array(codes)
+    return pd.DataFrame({
+        'code_rne': codes[gauche], 'voisin': codes[droite],
+        'frontiere_km': frontiere, 'chevauchement_km2': chevauchement,
+    })
+
+def aretes_voies(carte):
+    """Une arête par couple (a < b) d'établissements du même type qui partagent au moins une voie"""
+    voies = carte[carte['type_et_libelle'].notna() & carte['code_rne'].notna()]
+    voies = pd.DataFrame({
+        'voie': voies['type_et_libelle'].astype(str).to_numpy() + ' (' + voies['com_name_upper'].astype(str).to_numpy() + ')',
+        'code_insee': voies['code_insee'].to_numpy(),
+        'type_etablissement': voies['type_etablissement'].astype(str).to_numpy(),
+        'code_rne': voies['code_rne'].astype(str).to_numpy(),
+    }).drop_duplicates()
+    cles = ['code_insee', 'voie', 'type_etablissement']
+    partagees = voies[voies.duplicated(cles, keep=False)]
+    couples = partagees.merge(partagees, on=cles, suffixes=('', '_voisin'))
+    couples = couples[couples['code_rne'] < couples['code_rne_voisin']]
+    return couples.groupby(['code_rne', 'code_rne_voisin'], sort=True).agg(
+        voies_partagees=('voie', 'size'),
+        exemples_voies=('voie', lambda v: ', '.join(sorted(v)[:EXEMPLES_VOIES])),
+    ).reset_index().rename(columns={'code_rne_voisin': 'voisin'})
+
+def construire_graphe(carte, etablissements, polygones=None):
+    """
+    Table des arêtes (COLONNES_GRAPHE), dans les deux sens, triée par code_rne.
+    polygones : code_rne -> géométrie shapely, ou None si la version n'a pas de géométries.
+    """
+    types = dict(zip(etablissements['code_rne'].astype(str), etablissements['type_etablissement'].astype(str)))
+    geometriques = aretes_geometriques(polygones, types) if polygones else pd.DataFrame(
+        columns=['code_rne', 'voisin', 'frontiere_km', 'chevauchement_km2'])
+    aretes = geometriques.merge(aretes_voies(carte), on=['code_rne', 'voisin'], how='outer')
+    aretes = aretes.fillna({'frontiere_km': 0.0, 'chevauchement_km2': 0.0, 'voies_partagees': 0, 'exemples_voies': ''})
+    aretes = aretes[(aretes['frontiere_km'] > 0) | (aretes['chevauchement_km2'] > 0) | (aretes['voies_partagees'] > 0)]
+    inverses = aretes.rename(columns={'code_rne': 'voisin', 'voisin': 'code_rne'})
+    graphe = pd.concat([aretes, inverses], ignore_index=True)
+    graphe['type_etablissement'] = graphe['code_rne'].map(types)
+    graphe = graphe[COLONNES_GRAPHE].sort_values(['code_rne', 'voisin'], kind='stable').reset_index(drop=True)
+    return graphe.astype({
+        'code_rne': str, 'voisin': str, 'frontiere_km': 'float32', 'chevauchement_km2': 'float32', 'voies_partagees': 'int32',
+    })
+
+def indexer_graphe(graphe):
+    """code_rne -> (debut, fin) de ses arêtes dans graphe (trié par code_rne)"""
+    codes, debuts = np.unique(graphe['code_rne'].to_numpy(dtype=str), return_index=True)
+    fins = np.append(debuts[1:], len(graphe))
+    return dict(zip(codes.tolist(), zip(debuts.tolist(), fins.tolist())))
@@ -0,0 +1,156 @@
+"""
+Agrégation régionale sur une grille hexagonale, à plusieurs échelles.
+
+Les points sont projetés en km (projection équirectangulaire centrée sur la
+région, suffisante à cette échelle) puis affectés à leur hexagone par arrondi des
+coordonnées cubiques, en une passe NumPy. Sources :
+- adresses des secteurs : lignes de la carte scolaire, placées au centroïde de
+  leur commune (table communes_geo), par type d'établissement ;
+- communes sans secteur de lycée (ou de collège) : trous de couverture ;
+- établissements de l'annuaire : nombre de collèges et de lycées, IPS moyen
+  (ips_etablissement de l'export brut, si la version le contient).
+
+Les cellules non vides de chaque échelle sont écrites une fois par version ; la page
+les convertit en une seule couche GeoJSON choroplèthe.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.distances import RAYON_TERRE_KM
+
+# Échelle -> (rayon de l'hexagone en km, zoom de la carte)
+NIVEAUX_HEXAGONES = {
+    'Région': (12.0, 7),
+    'Département': (5.0, 9),
+    'Bassin de vie': (2.0, 11),
+}
+LATITUDE_REFERENCE = 43.7  # Centre de l'Occitanie
+INDICATEURS_HEXAGONES = {
+    'lignes_college': "Adresses sectorisées (collèges)",
+    'lignes_lycee': "Adresses sectorisées (lycées)",
+    'communes_sans_lycee': "Communes sans secteur de lycée",
+    'communes_sans_college': "Communes sans secteur de collège",
+    'colleges': "Collèges",
+    'lycees': "Lycées",
+    'ips_moyen': "IPS moyen des établissements",
+}
+# Palette séquentielle (clair -> foncé) des cellules
+COULEURS = ['#f7fbff', '#c6dbef', '#6baed6', '#2171b5', '#08306b']
+
+def vers_km(latitude, longitude):
+    """Coordonnées planes (x, y) en km"""
+    lat = np.radians(np.asarray(latitude, dtype='float64'))
+    lon = np.radians(np.asarray(longitude, dtype='float64'))
+    return RAYON_TERRE_KM * np.cos(np.radians(LATITUDE_REFERENCE)) * lon, RAYON_TERRE_KM * lat
+
+def depuis_km(x, y):
+    """Inverse de vers_km : (latitude, longitude) en degrés"""
+    return np.degrees(y / RAYON_TERRE_KM), np.degrees(x / (RAYON_TERRE_KM * np.cos(np.radians(LATITUDE_REFERENCE))))
+
+def hexagone(latitude, longitude, rayon_km):
+    """Coordonnées axiales (q, r) de l'hexagone (pointe en haut) contenant chaque point"""
+    x, y = vers_km(latitude, longitude)
+    q = (np.sqrt(3) / 3 * x - y / 3) / rayon_km
+    r = (2 / 3 * y) / rayon_km
+    s = -q - r
+    q_arrondi, r_arrondi, s_arrondi = np.round(q), np.round(r), np.round(s)
+    # La coordonnée la plus éloignée de son arrondi est déduite des deux autres (q + r + s = 0)
+    ecart_q, ecart_r, ecart_s = np.abs(q_arrondi - q), np.abs(r_arrondi - r), np.abs(s_arrondi - s)
+    corriger_q = (ecart_q > ecart_r) & (ecart_q > ecart_s)
+    corriger_r = ~corriger_q & (ecart_r > ecart_s)
+    q_arrondi = np.where(corriger_q, -r_arrondi - s_arrondi, q_arrondi)
+    r_arrondi = np.where(corriger_r, -q_arrondi - s_arrondi, r_arrondi)
+    return q_arrondi.astype('int32'), r_arrondi.astype('int32')
+
+def centre(q, r, rayon_km):
+    """(latitude, longitude) du centre des hexagones"""
+    x = rayon_km * np.sqrt(3) * (np.asarray(q) + np.asarray(r) / 2)
+    y = rayon_km * 1.5 * np.asarray(r)
+    return depuis_km(x, y)
+
+def _points(carte, communes_geo, annuaire, ips):
+    """Une ligne par point pondéré : latitude, longitude et une colonne par indicateur additif"""
+    carte = carte[carte['code_rne'].notna() & carte['code_insee'].notna()]
+    types = carte['type_etablissement'].astype(str)
+    lignes = pd.DataFrame({
+        'code_insee': carte['code_insee'].to_numpy(dtype='int64'),
+        'lignes_college': (types == 'COLLEGE').to_numpy(dtype='int64'),
+        'lignes_lycee': types.str.startswith('LYCEE').to_numpy(dtype='int64'),
+    }).groupby('code_insee').sum()
+    lignes['communes_sans_lycee'] = ((lignes['lignes_college'] > 0) & (lignes['lignes_lycee'] == 0)).astype('int64')
+    lignes['communes_sans_college'] = ((lignes['lignes_lycee'] > 0) & (lignes['lignes_college'] == 0)).astype('int64')
+    communes = lignes.join(communes_geo[['latitude', 'longitude']], how='inner')
+
+    etablissements = annuaire.dropna(subset=['latitude', 'longitude'])
+    types = etablissements['Type_etablissement'].astype(str)
+    etablissements = pd.DataFrame({
+        'latitude': etablissements['latitude'].to_numpy(dtype='float64'),
+        'longitude': etablissements['longitude'].to_numpy(dtype='float64'),
+        'colleges': (types == 'Collège').to_numpy(dtype='int64'),
+        'lycees': (types == 'Lycée').to_numpy(dtype='int64'),
+        'ips': etablissements['Identifiant_de_l_etablissement'].astype(str).map(ips).to_numpy(dtype='float64'),
+    })
+    etablissements['etablissements_ips'] = etablissements['ips'].notna().astype('int64')
+    etablissements['somme_ips'] = etablissements['ips'].fillna(0)
+    return pd.concat([communes.reset_index(drop=True), etablissements.drop(columns='ips')], ignore_index=True).fillna(0)
+
+def construire_hexagones(carte, communes_geo, annuaire, ips=None):
+    """
+    Cellules non vides de chaque échelle de NIVEAUX_HEXAGONES : niveau, q, r, latitude et
+    longitude du centre, et une colonne par indicateur. ips : Series code_rne -> IPS.
+    communes_geo est indexée par code_insee.
+    """
+    points = _points(carte, communes_geo, annuaire, ips if ips is not None else pd.Series(dtype='float64'))
+    sommes = [c for c in points.columns if c not in ('latitude', 'longitude')]
+    valeurs = points[sommes].to_numpy(dtype='float64')
+    niveaux = []
+    for niveau, (rayon_km, _) in NIVEAUX_HEXAGONES.items():
+        q, r = hexagone(points['latitude'].to_numpy(), points['longitude'].to_numpy(), rayon_km)
+        cellules, cellule = np.unique(np.stack([q, r], axis=1), axis=0, return_inverse=True)
+        cellule = cellule.ravel()
+        totaux = np.stack([np.bincount(cellule, weights=valeurs[:, i], minlength=len(cellules)) for i in range(len(sommes))], axis=1)
+        latitude, longitude = centre(cellules[:, 0], cellules[:, 1], rayon_km)
+        table = pd.DataFrame(totaux, columns=sommes)
+        table.insert(0, 'niveau', niveau)
+        table.insert(1, 'q', cellules[:, 0])
+        table.insert(2, 'r', cellules[:, 1])
+        table.insert(3, 'latitude', latitude)
+        table.insert(4, 'longitude', longitude)
+        niveaux.append(table)
+    hexagones = pd.concat(niveaux, ignore_index=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        hexagones['ips_moyen'] = np.where(hexagones['etablissements_ips'] > 0, hexagones['somme_ips'] / hexagones['etablissements_ips'], np.nan)
+    hexagones = hexagones.drop(columns=['somme_ips', 'etablissements_ips'])
+    entiers = [c for c in INDICATEURS_HEXAGONES if c != 'ips_moyen']
+    return hexagones.astype({'niveau': 'category', 'latitude': 'float32', 'longitude': 'float32', 'ips_moyen': 'float32', **{c: 'int32' for c in entiers}})
+
+def geojson_hexagones(hexagones, niveau, indicateur):
+    """
+    FeatureCollection des cellules d'une échelle où l'indicateur est renseigné et non nul,
+    avec sa valeur et la couleur de sa classe (quantiles) dans les propriétés.
+    """
+    rayon_km, _ = NIVEAUX_HEXAGONES[niveau]
+    cellules = hexagones[(hexagones['niveau'] == niveau).to_numpy()]
+    cellules = cellules[cellules[indicateur].notna().to_numpy() & (cellules[indicateur] != 0).to_numpy()]
+    valeurs = cellules[indicateur].to_numpy(dtype='float64')
+    if len(cellules) == 0:
+        return {'type': 'FeatureCollection', 'features': []}, []
+
+    # Sommets des hexagones : (n, 7) pour fermer chaque anneau
+    x = RAYON_TERRE_KM * np.cos(np.radians(LATITUDE_REFERENCE)) * np.radians(cellules['longitude'].to_numpy(dtype='float64'))
+    y = RAYON_TERRE_KM * np.radians(cellules['latitude'].to_numpy(dtype='float64'))
+    angles = np.radians(30 + 60 * np.arange(7))
+    latitudes, longitudes = depuis_km(x[:, None] + rayon_km * np.cos(angles), y[:, None] + rayon_km * np.sin(angles))
+    anneaux = np.round(np.stack([longitudes, latitudes], axis=-1), 5).tolist()
+
+    seuils = np.unique(np.quantile(valeurs, np.linspace(0, 1, len(COULEURS) + 1)))
+    classes = np.clip(np.searchsorted(seuils, valeurs, side='right') - 1, 0, len(COULEURS) - 1)
+    features = [
+        {
+            'type': 'Feature',
+            'geometry': {'type': 'Polygon', 'coordinates': [anneau]},
+            'properties': {'valeur': round(float(valeur), 1), 'couleur': COULEURS[classe]},
+        }
+        for anneau, valeur, classe in zip(anneaux, valeurs, classes)
+    ]
+    return {'type': 'FeatureCollection', 'features': features}, seuils.tolist()
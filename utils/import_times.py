@@ -0,0 +1,56 @@
+"""
+Mesure du coût d'import de chaque page, à froid, dans un interpréteur neuf.
+
+Usage : python -m utils.import_times
+"""
+import json
+import os
+import subprocess
+import sys
+
+PAGES = {
+    'search': 'app_pages.search',
+    'perimetre': 'app_pages.perimetre',
+    'proximite': 'app_pages.proximite',
+    'densite': 'app_pages.densite',
+    'secteurs': 'app_pages.secteurs',
+    'stats': 'app_pages.stats',
+    'classement': 'app_pages.classement',
+    'about': 'app_pages.about',
+    'legal': 'app_pages.legal',
+}
+
+# Dépendances lourdes que l'on veut voir chargées uniquement par les pages qui en ont besoin
+DEPENDANCES_LOURDES = ['folium', 'plotly', 'streamlit_folium', 'requests', 'pandas', 'scipy']
+
+SCRIPT = """
+import json, sys, time
+import streamlit
+deja_charges = set(sys.modules)
+debut = time.perf_counter()
+import {module}
+duree = (time.perf_counter() - debut) * 1000
+print(json.dumps({{'ms': duree, 'modules': [m for m in {lourdes!r} if m in sys.modules and m not in deja_charges]}}))
+"""
+
+def mesurer_page(module, repetitions=3):
+    """Renvoie le temps d'import médian (ms) du module et les dépendances lourdes qu'il a chargées"""
+    racine = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    mesures = []
+    for _ in range(repetitions):
+        sortie = subprocess.run(
+            [sys.executable, '-c', SCRIPT.format(module=module, lourdes=DEPENDANCES_LOURDES)],
+            cwd=racine, capture_output=True, text=True, check=True
+        )
+        mesures.append(json.loads(sortie.stdout.strip().splitlines()[-1]))
+    mesures.sort(key=lambda m: m['ms'])
+    return mesures[len(mesures) // 2]
+
+def main():
+    print(f"{'Page':<12}{'Import (ms)':>12}  Dépendances lourdes chargées")
+    for page, module in PAGES.items():
+        mesure = mesurer_page(module)
+        print(f"{page:<12}{mesure['ms']:>12.0f}  {', '.join(mesure['modules']) or '-'}")
+
+if __name__ == "__main__":
+    main()
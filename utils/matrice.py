@@ -0,0 +1,145 @@
+"""
+Matrice origine-destination creuse : communes (code_insee) x établissements (code_rne).
+
+Construite à l'ingestion à partir de la carte scolaire dépliée, elle est stockée
+en triplets (ligne, colonne, poids) triés par commune puis par établissement,
+c'est-à-dire dans l'ordre CSR : le chargement ne fait aucun groupby. Poids :
+- lignes : nombre de règles de la carte scolaire ;
+- voies : nombre de voies distinctes (une commune entière compte pour une voie) ;
+- part : part des voies de la commune rattachées à l'établissement, par type
+  d'établissement (la somme vaut 1 par commune pour les collèges, de même pour
+  les lycées).
+Un établissement a une seule colonne, même s'il figure sous deux types dans la
+carte scolaire (collège et lycée) : ses règles des deux types sont réunies et son
+type est celui de la table etablissements (premier rencontré).
+
+Au chargement, chaque poids est disponible en CSR (tranches par commune) et en CSC
+(tranches par établissement) ; les agrégats (établissements par commune, plus
+grands secteurs, flux entre départements) sont des produits matriciels.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+POIDS = ['lignes', 'voies', 'part']
+
+def _departement_etablissement(code_rne):
+    """Département de l'établissement : trois premiers caractères du code RNE ('031' -> '31')"""
+    return code_rne.str[:3].str.lstrip('0')
+
+def construire_matrice(df):
+    """
+    Tables (liens, communes, etablissements) à écrire en instantanés.
+    liens : ligne (commune), colonne (établissement) et un poids par colonne de POIDS.
+    """
+    df = df[df['code_rne'].notna() & df['code_insee'].notna()]
+    colonnes = {
+        'code_insee': df['code_insee'].to_numpy(dtype='int64'),
+        'code_rne': df['code_rne'].astype(str).to_numpy(),
+        'type_etablissement': df['type_etablissement'].astype(str).to_numpy(),
+        # Une règle sans voie rattache la commune entière
+        'voie': df['type_et_libelle'].astype(object).fillna('').astype(str).to_numpy(),
+    }
+    regles = pd.DataFrame(colonnes)
+
+    communes = (
+        pd.DataFrame({
+            'code_insee': colonnes['code_insee'],
+            'com_name_upper': df['com_name_upper'].astype(str).to_numpy(),
+            'code_departement': df['code_departement'].astype(str).to_numpy(),
+            'libelle_departement_eleve': df['libelle_departement_eleve'].astype(str).to_numpy(),
+        })
+        .drop_duplicates('code_insee').sort_values('code_insee').reset_index(drop=True)
+    )
+    etablissements = regles[['code_rne', 'type_etablissement']].drop_duplicates('code_rne').sort_values('code_rne').reset_index(drop=True)
+    etablissements['code_departement'] = _departement_etablissement(etablissements['code_rne'])
+
+    regles['ligne'] = np.searchsorted(communes['code_insee'].to_numpy(), regles['code_insee'].to_numpy())
+    regles['colonne'] = np.searchsorted(etablissements['code_rne'].to_numpy(), regles['code_rne'].to_numpy())
+    # Un lien par (commune, établissement) : le type vient de la colonne, pas de la règle
+    liens = regles.groupby(['ligne', 'colonne'], sort=True).agg(
+        lignes=('voie', 'size'), voies=('voie', 'nunique'),
+    ).reset_index()
+    type_colonne = etablissements['type_etablissement'].to_numpy()[liens['colonne'].to_numpy()]
+    total = liens['voies'].groupby([liens['ligne'], type_colonne]).transform('sum')
+    liens['part'] = liens['voies'] / total
+    liens = liens.astype({
+        'ligne': 'int32', 'colonne': 'int32', 'lignes': 'int32', 'voies': 'int32', 'part': 'float32',
+    })
+    return liens, communes, etablissements
+
+def charger_matrice(liens, communes, etablissements):
+    """
+    Matrice prête à interroger : {'csr': {poids: csr_matrix}, 'csc': {poids: csc_matrix},
+    'communes', 'etablissements' (DataFrames dans l'ordre des lignes et des colonnes),
+    'ligne' (code_insee -> ligne), 'colonne' (code_rne -> colonne)}
+    """
+    forme = (len(communes), len(etablissements))
+    lignes, colonnes = liens['ligne'].to_numpy(), liens['colonne'].to_numpy()
+    # Triplets déjà triés par ligne : indptr est un cumul du nombre de liens par commune
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(lignes, minlength=forme[0]))])
+    csr = {poids: sparse.csr_matrix((liens[poids].to_numpy(), colonnes, indptr), shape=forme) for poids in POIDS}
+    return {
+        'csr': csr,
+        'csc': {poids: matrice.tocsc() for poids, matrice in csr.items()},
+        'communes': communes,
+        'etablissements': etablissements,
+        'ligne': dict(zip(communes['code_insee'].tolist(), range(forme[0]))),
+        'colonne': dict(zip(etablissements['code_rne'].tolist(), range(forme[1]))),
+    }
+
+def etablissements_de_commune(matrice, code_insee, poids='voies'):
+    """Établissements qui accueillent les élèves d'une commune, avec le poids du lien"""
+    ligne = matrice['ligne'].get(int(code_insee))
+    if ligne is None:
+        return matrice['etablissements'].iloc[:0].assign(**{poids: []})
+    csr = matrice['csr'][poids]
+    debut, fin = csr.indptr[ligne], csr.indptr[ligne + 1]
+    return matrice['etablissements'].iloc[csr.indices[debut:fin]].assign(**{poids: csr.data[debut:fin]})
+
+def communes_de_etablissement(matrice, code_rne, poids='voies'):
+    """Communes du secteur d'un établissement, avec le poids du lien"""
+    colonne = matrice['colonne'].get(str(code_rne))
+    if colonne is None:
+        return matrice['communes'].iloc[:0].assign(**{poids: []})
+    csc = matrice['csc'][poids]
+    debut, fin = csc.indptr[colonne], csc.indptr[colonne + 1]
+    return matrice['communes'].iloc[csc.indices[debut:fin]].assign(**{poids: csc.data[debut:fin]})
+
+def _colonnes(matrice, type_etablissement):
+    """Colonnes des établissements du type demandé (toutes si None)"""
+    if type_etablissement is None:
+        return np.arange(len(matrice['etablissements']))
+    return np.flatnonzero(matrice['etablissements']['type_etablissement'].to_numpy() == type_etablissement)
+
+def etablissements_par_commune(matrice, type_etablissement=None):
+    """Nombre d'établissements de rattachement de chaque commune (ordre des lignes)"""
+    return np.diff(matrice['csc']['lignes'][:, _colonnes(matrice, type_etablissement)].tocsr().indptr)
+
+def plus_grands_secteurs(matrice, nombre=10, poids='voies', type_etablissement=None):
+    """Établissements dont le secteur est le plus étendu : nombre de communes et somme des poids"""
+    colonnes = _colonnes(matrice, type_etablissement)
+    csc = matrice['csc'][poids][:, colonnes]
+    totaux = np.asarray(csc.sum(axis=0)).ravel()
+    ordre = np.argsort(-totaux, kind='stable')[:nombre]
+    return matrice['etablissements'].iloc[colonnes[ordre]].assign(
+        communes=np.diff(csc.indptr)[ordre], **{poids: totaux[ordre]},
+    )
+
+def _indicatrice(codes):
+    """Matrice creuse (éléments x modalités) et liste des modalités"""
+    modalites, positions = np.unique(np.asarray(codes, dtype=str), return_inverse=True)
+    return sparse.csr_matrix((np.ones(len(positions)), (np.arange(len(positions)), positions.ravel())),
+                             shape=(len(positions), len(modalites))), modalites
+
+def flux_departements(matrice, poids='voies', type_etablissement=None):
+    """
+    Flux entre département de résidence (lignes) et département de l'établissement
+    (colonnes) : D_communes^T . M . D_etablissements, sans groupby.
+    """
+    colonnes = _colonnes(matrice, type_etablissement)
+    depart, origines = _indicatrice(matrice['communes']['code_departement'])
+    arrivee, destinations = _indicatrice(matrice['etablissements']['code_departement'].to_numpy()[colonnes])
+    flux = (depart.T @ matrice['csc'][poids][:, colonnes] @ arrivee).toarray()
+    return pd.DataFrame(flux, index=pd.Index(origines, name='departement_residence'),
+                        columns=pd.Index(destinations, name='departement_etablissement'))
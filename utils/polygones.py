@@ -0,0 +1,123 @@
+"""
+Magasin de polygones des secteurs, à plusieurs niveaux de détail.
+
+Les geo_shape de l'export brut (un par ligne, souvent identiques) sont fusionnés en
+une seule géométrie par code_rne, puis simplifiés une fois pour chaque niveau de
+NIVEAUX_DETAIL. Chaque géométrie simplifiée est stockée sous forme binaire :
+- structure : entiers int32 [nombre de polygones, puis pour chacun le nombre
+  d'anneaux, puis pour chaque anneau le nombre de points] ;
+- coordonnees : coordonnées quantifiées (QUANTUM degré, ~1 m), codées en écarts
+  au point précédent (zigzag + entiers de longueur variable).
+
+La carte reçoit tous les niveaux d'un établissement (quelques ko) et n'affiche que
+celui qui correspond au zoom courant.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+# (zoom minimal, tolérance de simplification en degrés) de chaque niveau
+NIVEAUX_DETAIL = [(0, 0.002), (11, 0.0005), (14, 0.0001)]
+QUANTUM = 1e-5
+# Pyramide de tuiles des secteurs, écrite par pipeline.tuiles et lue par la page Secteurs
+DOSSIER_TUILES = 'static/tuiles'
+# Chemin des tuiles vu du navigateur (dossier static/ servi par Streamlit)
+URL_TUILES = 'app/static/tuiles'
+
+def _zigzag(valeurs):
+    return ((valeurs << 1) ^ (valeurs >> 63)).astype('uint64')
+
+def _dezigzag(valeurs):
+    return (valeurs >> 1).astype('int64') ^ -(valeurs & 1).astype('int64')
+
+def encoder_varint(valeurs):
+    """Entiers signés -> octets (zigzag puis 7 bits par octet, bit de poids fort = suite)"""
+    valeurs = _zigzag(np.asarray(valeurs, dtype='int64'))
+    decalages = 7 * np.arange(10, dtype='uint64')
+    groupes = (valeurs[:, None] >> decalages) & 0x7F
+    longueurs = 1 + ((valeurs[:, None] >> decalages[1:]) != 0).sum(axis=1)
+    positions = np.arange(10)[None, :]
+    octets = groupes | ((positions < longueurs[:, None] - 1) * 0x80).astype('uint64')
+    return octets[positions < longueurs[:, None]].astype('uint8').tobytes()
+
+def decoder_varint(octets):
+    """Inverse de encoder_varint"""
+    octets = np.frombuffer(octets, dtype='uint8')
+    fins = (octets & 0x80) == 0
+    valeur = np.concatenate([[0], np.cumsum(fins)[:-1]])
+    debuts = np.flatnonzero(np.concatenate([[True], fins[:-1]]))
+    rang = np.arange(len(octets)) - debuts[valeur]
+    morceaux = (octets & 0x7F).astype('uint64') << (7 * rang).astype('uint64')
+    valeurs = np.zeros(fins.sum(), dtype='uint64')
+    np.bitwise_or.at(valeurs, valeur, morceaux)
+    return _dezigzag(valeurs)
+
+def encoder(geometrie):
+    """Polygon ou MultiPolygon shapely -> (structure, coordonnees, nombre de points)"""
+    polygones = list(geometrie.geoms) if geometrie.geom_type == 'MultiPolygon' else [geometrie]
+    structure, anneaux = [len(polygones)], []
+    for polygone in polygones:
+        contours = [polygone.exterior] + list(polygone.interiors)
+        structure.append(len(contours))
+        for contour in contours:
+            points = np.asarray(contour.coords)[:, :2]
+            structure.append(len(points))
+            anneaux.append(points)
+    points = np.concatenate(anneaux)
+    quantifies = np.round(points / QUANTUM).astype('int64')
+    ecarts = np.diff(quantifies, axis=0, prepend=np.zeros((1, 2), dtype='int64'))
+    return np.asarray(structure, dtype='int32').tobytes(), encoder_varint(ecarts.ravel()), len(points)
+
+def decoder(structure, coordonnees):
+    """Inverse de encoder : géométrie GeoJSON (dictionnaire)"""
+    structure = np.frombuffer(structure, dtype='int32').tolist()
+    points = (np.cumsum(decoder_varint(coordonnees).reshape(-1, 2), axis=0) * QUANTUM).round(5).tolist()
+    polygones, curseur, debut = [], 1, 0
+    for _ in range(structure[0]):
+        anneaux = []
+        for _ in range(structure[curseur]):
+            curseur += 1
+            anneaux.append(points[debut:debut + structure[curseur]])
+            debut += structure[curseur]
+        curseur += 1
+        polygones.append(anneaux)
+    if len(polygones) == 1:
+        return {'type': 'Polygon', 'coordinates': polygones[0]}
+    return {'type': 'MultiPolygon', 'coordinates': polygones}
+
+def construire_polygones(geometries):
+    """
+    geometries : code_rne, geo_shape (GeoJSON, éventuellement plusieurs lignes par établissement).
+    Renvoie une ligne par (code_rne, niveau) : structure, coordonnees, points.
+    """
+    import shapely
+    from shapely.geometry import shape
+
+    lignes = []
+    for code_rne, formes in geometries.groupby('code_rne', sort=True)['geo_shape']:
+        formes = [shape(json.loads(forme)) for forme in formes.drop_duplicates()]
+        fusion = shapely.union_all([shapely.make_valid(forme) for forme in formes])
+        # Seules les surfaces sont conservées (make_valid peut produire des segments isolés)
+        surfaces = [g for g in getattr(fusion, 'geoms', [fusion]) if g.geom_type in ('Polygon', 'MultiPolygon')]
+        if not surfaces:
+            continue
+        fusion = shapely.union_all(surfaces)
+        for niveau, (_, tolerance) in enumerate(NIVEAUX_DETAIL):
+            simplifiee = fusion.simplify(tolerance, preserve_topology=True)
+            structure, coordonnees, points = encoder(simplifiee)
+            lignes.append((code_rne, niveau, structure, coordonnees, points))
+    polygones = pd.DataFrame(lignes, columns=['code_rne', 'niveau', 'structure', 'coordonnees', 'points'])
+    return polygones.astype({'niveau': 'int8', 'points': 'int32'})
+
+def niveau_pour_zoom(zoom):
+    """Niveau de détail à afficher pour un zoom de la carte"""
+    return max(niveau for niveau, (zoom_min, _) in enumerate(NIVEAUX_DETAIL) if zoom >= zoom_min)
+
+def geometries_detaillees(polygones):
+    """code_rne -> géométrie shapely du niveau le plus détaillé (contours d'origine, à la quantification près)"""
+    from shapely.geometry import shape
+
+    table = polygones[polygones['niveau'] == len(NIVEAUX_DETAIL) - 1]
+    return {code_rne: shape(decoder(structure, coordonnees))
+            for code_rne, structure, coordonnees in zip(table['code_rne'], table['structure'], table['coordonnees'])}
@@ -0,0 +1,109 @@
+"""
+Populations des communes et ratios établissements / habitants, calculés une fois par version.
+
+Source : fichier facultatif des populations légales de l'INSEE (CSV séparé par ';',
+code commune et population municipale, par exemple donnees_communes.csv du
+recensement). Il est joint à la carte scolaire par code_insee ; la population d'un
+département de résidence est la somme de celles de ses communes. Sans ce fichier, ou
+pour un département dont une commune manque, la population départementale de
+POPULATIONS_DEPARTEMENTS (Occitanie, 2020) est utilisée et le détail par commune
+n'est pas disponible.
+
+Tables écrites :
+- populations_communes : une ligne par commune et type d'établissement ;
+- populations_departements : une ligne par département de résidence et type.
+Chaque table a aussi une ligne tous types (type_etablissement = TOUS_TYPES) par commune
+ou département. etablissements compte les code_rne distincts dont le secteur couvre la
+commune (ou une commune du département) : un établissement à la fois collège et lycée
+n'est compté qu'une fois dans la ligne tous types. pour_100k = etablissements / population * 100 000.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.distances import TOUS_TYPES
+
+CHEMIN_POPULATIONS = 'datasets/populations-communes.csv'
+# Noms possibles des colonnes (populations légales INSEE, base comparateur de territoires)
+CHAMPS_CODE_COMMUNE = ['COM', 'CODGEO', 'code_insee', 'DEPCOM']
+CHAMPS_POPULATION = ['PMUN', 'PTOT', 'P21_POP', 'P20_POP', 'population']
+COLONNES_CARTE_POPULATIONS = ['code_insee', 'com_name_upper', 'libelle_departement_eleve', 'type_etablissement', 'code_rne']
+# Populations par département (2020) SOURCE INSEE, repli sans populations communales
+POPULATIONS_DEPARTEMENTS = {
+    'ARIEGE': 153287,
+    'AUDE': 370260,
+    'AVEYRON': 279595,
+    'GARD': 748437,
+    'HAUTE-GARONNE': 1400039,
+    'GERS': 191283,
+    'HERAULT': 1175623,
+    'LOT': 174208,
+    'LOZERE': 76601,
+    'HAUTES-PYRENEES': 229567,
+    'PYRENEES-ORIENTALES': 479000,
+    'TARN': 387890,
+    'TARN-ET-GARONNE': 259124
+}
+
+def lire_populations(chemin=CHEMIN_POPULATIONS):
+    """code_insee -> population municipale (Series), ou None sans fichier"""
+    if not chemin or not os.path.exists(chemin):
+        return None
+    brut = pd.read_csv(chemin, sep=';', dtype=str, low_memory=False)
+    code = next(c for c in CHAMPS_CODE_COMMUNE if c in brut.columns)
+    population = next(c for c in CHAMPS_POPULATION if c in brut.columns)
+    populations = pd.DataFrame({
+        # Codes corses (2A, 2B) non numériques : absents de la carte scolaire
+        'code_insee': pd.to_numeric(brut[code], errors='coerce'),
+        'population': pd.to_numeric(brut[population].str.replace(r'\s', '', regex=True), errors='coerce'),
+    }).dropna()
+    return populations.groupby(populations['code_insee'].astype('int64'))['population'].sum()
+
+def _ratio(etablissements, population):
+    return (etablissements / population.where(population > 0) * 100_000).astype('float32')
+
+def _par_type(carte, cles, **agregations):
+    """Agrégats par clés et type d'établissement, plus une ligne tous types (comptes distincts sur tous les types)"""
+    par_type = carte.groupby(cles + ['type_etablissement'], observed=True).agg(**agregations).reset_index()
+    tous = carte.groupby(cles, observed=True).agg(**agregations).reset_index().assign(type_etablissement=TOUS_TYPES)
+    return pd.concat([par_type, tous[par_type.columns]], ignore_index=True)
+
+def construire_tables_populations(carte, populations=None):
+    """carte : COLONNES_CARTE_POPULATIONS ; populations : sortie de lire_populations. Renvoie {nom: DataFrame}"""
+    carte = carte[carte['code_rne'].notna()]
+    carte = carte.assign(
+        code_insee=pd.to_numeric(carte['code_insee'], errors='coerce').fillna(-1).astype('int64'),
+        com_name_upper=carte['com_name_upper'].astype(str),
+        libelle_departement_eleve=carte['libelle_departement_eleve'].astype(str),
+        type_etablissement=carte['type_etablissement'].astype(str),
+        code_rne=carte['code_rne'].astype(str),
+    )
+    if populations is None:
+        populations = pd.Series(dtype='float64')
+
+    communes = _par_type(
+        carte, ['code_insee'],
+        com_name_upper=('com_name_upper', 'first'),
+        libelle_departement_eleve=('libelle_departement_eleve', 'first'),
+        etablissements=('code_rne', 'nunique'),
+    )
+    communes['population'] = communes['code_insee'].map(populations).astype('float64')
+    communes['pour_100k'] = _ratio(communes['etablissements'], communes['population'])
+
+    # Population d'un département : somme de ses communes si toutes sont connues, sinon valeur de repli
+    distinctes = carte.drop_duplicates(['libelle_departement_eleve', 'code_insee'])
+    somme = distinctes.assign(population=distinctes['code_insee'].map(populations)).groupby('libelle_departement_eleve')['population'].agg(
+        lambda valeurs: valeurs.sum() if valeurs.notna().all() else np.nan
+    )
+    departements = _par_type(carte, ['libelle_departement_eleve'], etablissements=('code_rne', 'nunique'))
+    par_communes = departements['libelle_departement_eleve'].map(somme)
+    repli = departements['libelle_departement_eleve'].str.strip().str.upper().map(POPULATIONS_DEPARTEMENTS)
+    departements['population'] = par_communes.fillna(repli).astype('float64')
+    departements['source'] = np.where(par_communes.notna(), 'communes', np.where(repli.notna(), 'departements', ''))
+    departements['pour_100k'] = _ratio(departements['etablissements'], departements['population'])
+
+    return {
+        'populations_communes': communes.astype({'code_insee': 'Int32', 'etablissements': 'int32', 'type_etablissement': 'category', 'libelle_departement_eleve': 'category'}),
+        'populations_departements': departements.astype({'etablissements': 'int32', 'type_etablissement': 'category', 'source': 'category'}),
+    }
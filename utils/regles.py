@@ -0,0 +1,180 @@
+"""
+Compaction de la carte scolaire en une table de règles de sectorisation.
+
+- Les libellés répétés sur chaque ligne (région, académie, département, commune)
+  et l'établissement sont déplacés dans deux petites tables de dimensions
+  (communes, etablissements) ; les règles ne gardent que leurs identifiants.
+- Pour une même voie, une même commune et un même établissement, les plages de
+  numéros contiguës ou qui se chevauchent sont fusionnées, par parité. Une plage
+  paire et une plage impaire complémentaires (ex. 2-50 P et 1-49 I) deviennent
+  une seule plage PI.
+
+La transformation est vérifiée par un aller-retour : l'ensemble des numéros
+(par parité) rattachés à chaque couple (adresse, établissement) est identique
+avant et après compaction.
+"""
+import numpy as np
+import pandas as pd
+
+COLONNES_COMMUNE = [
+    'code_region', 'libelle_region', 'code_academie', 'libelle_academie',
+    'code_departement', 'libelle_departement_eleve', 'code_postal', 'code_insee',
+    'com_name_upper', 'ville_recherche',
+]
+COLONNES_ETABLISSEMENT = ['code_rne', 'type_etablissement']
+COLONNES_REGLE = ['commune_id', 'etab_id', 'type_et_libelle', 'no_de_voie_debut', 'no_de_voie_fin', 'parite']
+
+# Reste de la division par 2 des numéros de chaque parité
+PARITES = {'P': 0, 'I': 1}
+
+def _dimension(df, colonnes, nom_id):
+    """Table des combinaisons distinctes de colonnes + identifiant de chaque ligne de df"""
+    colonnes = [c for c in colonnes if c in df.columns]
+    dimension = df[colonnes].drop_duplicates().reset_index(drop=True)
+    dimension.insert(0, nom_id, np.arange(len(dimension), dtype='int32'))
+    ids = df[colonnes].merge(dimension, on=colonnes, how='left')[nom_id].to_numpy()
+    return dimension, ids
+
+def _est_compressible(df):
+    """Lignes décrivant une plage de numéros sur une voie, avec une parité connue"""
+    return (
+        df['type_et_libelle'].notna()
+        & df['parite'].isin(['P', 'I', 'PI'])
+        & df['no_de_voie_debut'].notna()
+        & df['no_de_voie_fin'].notna()
+    ).to_numpy()
+
+def _intervalles_par_parite(df, cles):
+    """
+    Décompose chaque plage en plages par parité, bornes ramenées sur des numéros de la
+    parité (forme canonique : 1-49 en pair devient 2-48).
+    """
+    morceaux = []
+    for parite, reste in PARITES.items():
+        selection = df[df['parite'].isin([parite, 'PI']).to_numpy()]
+        debut = selection['no_de_voie_debut'].to_numpy(dtype='int64')
+        fin = selection['no_de_voie_fin'].to_numpy(dtype='int64')
+        debut = debut + (debut - reste) % 2
+        fin = fin - (fin - reste) % 2
+        morceau = pd.DataFrame({c: selection[c].to_numpy() for c in cles})
+        morceau['classe'] = parite
+        morceau['debut'] = debut
+        morceau['fin'] = fin
+        morceaux.append(morceau[debut <= fin])
+    return pd.concat(morceaux, ignore_index=True)
+
+def _fusionner_intervalles(intervalles, cles):
+    """Fusionne, par groupe de clés, les plages d'une même parité qui se chevauchent ou se suivent"""
+    cles = cles + ['classe']
+    if intervalles.empty:
+        return intervalles
+    intervalles = intervalles.sort_values(cles + ['debut'], kind='stable').reset_index(drop=True)
+    groupe = intervalles.groupby(cles, sort=False, observed=True).ngroup().to_numpy()
+    debut = intervalles['debut'].to_numpy()
+    fin_max = intervalles.groupby(groupe)['fin'].cummax().to_numpy()
+    # Nouvelle plage si on change de groupe ou s'il manque au moins un numéro de la parité
+    nouveau = np.ones(len(intervalles), dtype=bool)
+    nouveau[1:] = (groupe[1:] != groupe[:-1]) | (debut[1:] > fin_max[:-1] + 2)
+    bloc = np.cumsum(nouveau)
+    agregation = {c: 'first' for c in cles}
+    agregation.update(debut='min', fin='max')
+    return intervalles.groupby(bloc).agg(agregation).reset_index(drop=True)
+
+def _apparier_pair_impair(fusion, cles):
+    """Réunit en une plage PI chaque plage paire et la plage impaire qui la complète"""
+    pairs = fusion[fusion['classe'] == 'P'].reset_index(drop=True)
+    impairs = fusion[fusion['classe'] == 'I'].reset_index(drop=True)
+    pairs['id_p'] = np.arange(len(pairs))
+    impairs['id_i'] = np.arange(len(impairs))
+    couples = []
+    for decalage_debut in (-1, 1):
+        for decalage_fin in (-1, 1):
+            candidats = pairs[cles + ['id_p', 'debut', 'fin']].assign(
+                debut_i=pairs['debut'] + decalage_debut,
+                fin_i=pairs['fin'] + decalage_fin,
+            )
+            couples.append(candidats.merge(
+                impairs[cles + ['id_i', 'debut', 'fin']].rename(columns={'debut': 'debut_i', 'fin': 'fin_i'}),
+                on=cles + ['debut_i', 'fin_i'],
+            ))
+    couples = pd.concat(couples, ignore_index=True)
+    couples = couples.drop_duplicates('id_p').drop_duplicates('id_i')
+
+    plages_pi = couples[cles].copy()
+    plages_pi['parite'] = 'PI'
+    plages_pi['debut'] = np.minimum(couples['debut'], couples['debut_i'])
+    plages_pi['fin'] = np.maximum(couples['fin'], couples['fin_i'])
+    reste_pairs = pairs[~pairs['id_p'].isin(couples['id_p'])].assign(parite='P')
+    reste_impairs = impairs[~impairs['id_i'].isin(couples['id_i'])].assign(parite='I')
+    colonnes = cles + ['parite', 'debut', 'fin']
+    return pd.concat([plages_pi[colonnes], reste_pairs[colonnes], reste_impairs[colonnes]], ignore_index=True)
+
+def compacter(df):
+    """
+    Compacte la carte scolaire (schéma de load_data) en (regles, communes, etablissements).
+    Les lignes sans plage de numéros exploitable (commune entière, parité inconnue) sont
+    conservées telles quelles, doublons exacts exceptés.
+    """
+    communes, commune_id = _dimension(df, COLONNES_COMMUNE, 'commune_id')
+    etablissements, etab_id = _dimension(df, COLONNES_ETABLISSEMENT, 'etab_id')
+    lignes = pd.DataFrame({
+        'commune_id': commune_id,
+        'etab_id': etab_id,
+        'type_et_libelle': df['type_et_libelle'].to_numpy(),
+        'no_de_voie_debut': df['no_de_voie_debut'].to_numpy(),
+        'no_de_voie_fin': df['no_de_voie_fin'].to_numpy(),
+        'parite': df['parite'].to_numpy(),
+    })
+    compressible = _est_compressible(df)
+    cles = ['commune_id', 'type_et_libelle', 'etab_id']
+
+    fusion = _fusionner_intervalles(_intervalles_par_parite(lignes[compressible], cles), cles)
+    plages = _apparier_pair_impair(fusion, cles).rename(columns={'debut': 'no_de_voie_debut', 'fin': 'no_de_voie_fin'})
+    autres = lignes[~compressible].drop_duplicates()
+
+    regles = pd.concat([plages[COLONNES_REGLE], autres[COLONNES_REGLE]], ignore_index=True)
+    regles = regles.sort_values(['commune_id', 'type_et_libelle', 'no_de_voie_debut', 'etab_id'], kind='stable')
+    regles = regles.reset_index(drop=True).astype({
+        'commune_id': 'int32',
+        'etab_id': 'int32',
+        'type_et_libelle': df['type_et_libelle'].dtype,
+        'no_de_voie_debut': 'Int32',
+        'no_de_voie_fin': 'Int32',
+        'parite': df['parite'].dtype,
+    })
+    return regles, communes, etablissements
+
+def developper(regles, communes, etablissements):
+    """Reconstruit une ligne par règle avec les libellés des dimensions (schéma de load_data)"""
+    colonnes_commune = communes.drop(columns='commune_id').take(regles['commune_id'].to_numpy()).reset_index(drop=True)
+    colonnes_etab = etablissements.drop(columns='etab_id').take(regles['etab_id'].to_numpy()).reset_index(drop=True)
+    colonnes_regle = regles.drop(columns=['commune_id', 'etab_id']).reset_index(drop=True)
+    return pd.concat([colonnes_commune, colonnes_regle, colonnes_etab], axis=1)
+
+def _couverture(df):
+    """Numéros couverts (par parité) pour chaque adresse et établissement, sous forme canonique"""
+    colonnes = [c for c in COLONNES_COMMUNE + ['type_et_libelle'] + COLONNES_ETABLISSEMENT if c in df.columns]
+    # Empreinte 64 bits des libellés (adresse + établissement), indépendante des catégories
+    cle = pd.util.hash_pandas_object(df[colonnes], index=False)
+    lignes = pd.DataFrame({
+        'cle': cle.to_numpy(),
+        'no_de_voie_debut': df['no_de_voie_debut'].to_numpy(),
+        'no_de_voie_fin': df['no_de_voie_fin'].to_numpy(),
+        'parite': df['parite'].to_numpy(),
+    })
+    compressible = _est_compressible(df)
+    plages = _fusionner_intervalles(_intervalles_par_parite(lignes[compressible], ['cle']), ['cle'])
+    plages = plages.sort_values(['cle', 'classe', 'debut']).reset_index(drop=True)
+    autres = lignes[~compressible].astype(str).drop_duplicates()
+    autres = autres.sort_values(list(autres.columns)).reset_index(drop=True)
+    return plages, autres
+
+def verifier_aller_retour(df, regles, communes, etablissements):
+    """Lève une ValueError si la table compacte ne décrit pas exactement la même sectorisation que df"""
+    plages_origine, autres_origine = _couverture(df)
+    plages_compactes, autres_compactes = _couverture(developper(regles, communes, etablissements))
+    if not plages_origine.equals(plages_compactes):
+        raise ValueError("Compaction incorrecte : les plages de numéros diffèrent de la carte scolaire d'origine")
+    if not autres_origine.equals(autres_compactes):
+        raise ValueError("Compaction incorrecte : les lignes sans plage de numéros diffèrent de la carte scolaire d'origine")
+    return True
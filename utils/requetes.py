@@ -0,0 +1,303 @@
+"""
+Requêtes des pages Statistiques et Recherche, sur deux moteurs interchangeables.
+
+- pandas (par défaut) : filtres et agrégations sur le DataFrame de la page ;
+- duckdb (facultatif, pip install duckdb) : SQL paramétré sur une copie Parquet de la
+  carte scolaire (carte_scolaire.parquet, dans le dossier de la version). Le fichier est
+  trié par département de résidence puis code INSEE, par groupes de TAILLE_GROUPE_LIGNES
+  lignes : les filtres sur quelques départements ne lisent que les groupes concernés
+  (statistiques min / max du Parquet) ; ceux sur une commune en ignorent une partie
+  seulement, l'ordre des noms de départements ne suivant pas celui des codes INSEE. La
+  colonne ligne garde le numéro de ligne de l'instantané Arrow, pour rendre les règles
+  dans le même ordre.
+
+Le moteur est choisi par la variable d'environnement CARTE_SCOLAIRE_MOTEUR (pandas ou
+duckdb). Chaque requête a une implémentation par moteur, aux résultats identiques :
+python -m utils.requetes les compare, mesure leur durée et compte les groupes de lignes
+lus par DuckDB, à l'échelle de la région et à l'échelle nationale (carte répliquée
+jusqu'à --lignes lignes, sur une centaine de départements).
+
+Usage : python -m utils.requetes [--lignes 1000000] [--repetitions 5]
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+MOTEUR = os.environ.get('CARTE_SCOLAIRE_MOTEUR', 'pandas')
+FICHIER_PARQUET = 'carte_scolaire.parquet'
+TAILLE_GROUPE_LIGNES = 16_384
+DEPARTEMENTS_NATIONAUX = 101
+COLONNES_PARQUET = [
+    'libelle_region', 'libelle_departement_eleve', 'code_insee', 'code_postal', 'com_name_upper', 'ville_recherche',
+    'type_et_libelle', 'no_de_voie_debut', 'no_de_voie_fin', 'parite', 'code_rne', 'type_etablissement',
+]
+
+def ecrire_parquet(carte, chemin):
+    """Copie Parquet de la carte scolaire (triée pour les filtres, avec le numéro de ligne d'origine)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    copie = carte[[c for c in COLONNES_PARQUET if c in carte.columns]].assign(ligne=np.arange(len(carte), dtype='int64'))
+    copie = copie.sort_values(['libelle_departement_eleve', 'code_insee', 'ligne'], kind='stable')
+    chemin_tmp = f"{chemin}.{os.getpid()}.tmp"
+    pq.write_table(pa.Table.from_pandas(copie, preserve_index=False), chemin_tmp, row_group_size=TAILLE_GROUPE_LIGNES)
+    os.replace(chemin_tmp, chemin)
+    return chemin
+
+def connecter(chemin):
+    """Connexion DuckDB en mémoire, vue carte sur le fichier Parquet, fichiers locaux uniquement"""
+    import duckdb
+
+    connexion = duckdb.connect(config={
+        'threads': os.cpu_count() or 1,
+        # Pas de téléchargement d'extension : seul le lecteur Parquet intégré est utilisé
+        'autoinstall_known_extensions': False,
+        'autoload_known_extensions': False,
+    })
+    chemin = os.path.abspath(chemin).replace("'", "''")
+    connexion.execute(f"CREATE VIEW carte AS SELECT * FROM read_parquet('{chemin}')")
+    return connexion
+
+# Chaque requête : (implémentation pandas sur le DataFrame, implémentation SQL sur la vue carte)
+
+def _filtrer(df, departements, type_choisi):
+    masque = df['libelle_departement_eleve'].isin(departements).to_numpy()
+    if type_choisi != 'Tous':
+        masque = masque & (df['type_etablissement'] == type_choisi).to_numpy()
+    return df[masque]
+
+def _filtre_sql(departements, type_choisi):
+    clause, parametres = "libelle_departement_eleve IN (SELECT UNNEST(?))", [list(departements)]
+    if type_choisi != 'Tous':
+        clause += " AND type_etablissement = ?"
+        parametres.append(type_choisi)
+    return clause, parametres
+
+def chiffres_cles_pandas(df, departements, type_choisi):
+    """Établissements (tous, collèges, lycées), villes, villes à sectorisation unique (tous types, collèges)"""
+    df = _filtrer(df, departements, type_choisi)
+    sans_voie = df['type_et_libelle'].isna().groupby(df['com_name_upper'], observed=True).all()
+    colleges = df[(df['type_etablissement'] == 'COLLEGE').to_numpy()]
+    sans_voie_college = colleges['type_et_libelle'].isna().groupby(colleges['com_name_upper'], observed=True).all()
+    return {
+        'etablissements': int(df['code_rne'].nunique()),
+        'colleges': int(colleges['code_rne'].nunique()),
+        'lycees': int(df.loc[(df['type_etablissement'] == 'LYCEE').to_numpy(), 'code_rne'].nunique()),
+        'villes': int(df['com_name_upper'].nunique()),
+        'villes_unique': int(sans_voie.sum()),
+        'villes_unique_college': int(sans_voie_college.sum()),
+    }
+
+def chiffres_cles_sql(connexion, departements, type_choisi):
+    clause, parametres = _filtre_sql(departements, type_choisi)
+    ligne = connexion.execute(f"""
+        SELECT
+            count(DISTINCT code_rne),
+            count(DISTINCT code_rne) FILTER (WHERE type_etablissement = 'COLLEGE'),
+            count(DISTINCT code_rne) FILTER (WHERE type_etablissement = 'LYCEE'),
+            count(DISTINCT com_name_upper)
+        FROM carte WHERE {clause}
+    """, parametres).fetchall()[0] + connexion.execute(f"""
+        SELECT count(*) FILTER (WHERE sans_voie), count(*) FILTER (WHERE sans_voie_college)
+        FROM (
+            SELECT bool_and(type_et_libelle IS NULL) AS sans_voie,
+                   bool_and(type_et_libelle IS NULL) FILTER (WHERE type_etablissement = 'COLLEGE') AS sans_voie_college
+            FROM carte WHERE {clause} GROUP BY com_name_upper
+        )
+    """, parametres).fetchall()[0]
+    return dict(zip(['etablissements', 'colleges', 'lycees', 'villes', 'villes_unique', 'villes_unique_college'], map(int, ligne)))
+
+def etablissements_par_departement_pandas(df, departements, type_choisi):
+    """Nombre d'établissements distincts par département de résidence et par type"""
+    comptes = _filtrer(df, departements, type_choisi).groupby(
+        ['libelle_departement_eleve', 'type_etablissement'], observed=True,
+    )['code_rne'].nunique()
+    return comptes.rename('etablissements').reset_index().astype({
+        'libelle_departement_eleve': str, 'type_etablissement': str, 'etablissements': 'int64',
+    }).sort_values(['libelle_departement_eleve', 'type_etablissement'], ignore_index=True)
+
+def etablissements_par_departement_sql(connexion, departements, type_choisi):
+    clause, parametres = _filtre_sql(departements, type_choisi)
+    return connexion.execute(f"""
+        SELECT libelle_departement_eleve, type_etablissement, count(DISTINCT code_rne) AS etablissements
+        FROM carte WHERE {clause}
+        GROUP BY ALL ORDER BY libelle_departement_eleve, type_etablissement
+    """, parametres).df().astype({'libelle_departement_eleve': str, 'type_etablissement': str, 'etablissements': 'int64'})
+
+def villes_avec_voies_pandas(df, departements, type_choisi):
+    """Villes (triées, distinctes) dont la sectorisation dépend de la voie, par département"""
+    df = _filtrer(df, departements, type_choisi)
+    df = df[df['type_et_libelle'].notna().to_numpy()]
+    villes = df['com_name_upper'].astype(str).groupby(df['libelle_departement_eleve'].astype(str)).agg(lambda v: sorted(set(v)))
+    return villes.rename('villes').rename_axis('libelle_departement_eleve').reset_index()
+
+def villes_avec_voies_sql(connexion, departements, type_choisi):
+    clause, parametres = _filtre_sql(departements, type_choisi)
+    villes = connexion.execute(f"""
+        SELECT libelle_departement_eleve, list(DISTINCT com_name_upper ORDER BY com_name_upper) AS villes
+        FROM carte WHERE {clause} AND type_et_libelle IS NOT NULL
+        GROUP BY libelle_departement_eleve ORDER BY libelle_departement_eleve
+    """, parametres).df()
+    return villes.assign(libelle_departement_eleve=villes['libelle_departement_eleve'].astype(str), villes=villes['villes'].map(list))
+
+def regles_voie_pandas(df, code_insee, libelles):
+    """Règles d'une commune pour des libellés de voie (None : règles sans voie), dans l'ordre des lignes"""
+    masque = (df['code_insee'] == code_insee).fillna(False).to_numpy()
+    if libelles is None:
+        masque = masque & df['type_et_libelle'].isna().to_numpy()
+    else:
+        masque = masque & df['type_et_libelle'].isin(libelles).to_numpy()
+    return df[masque]
+
+def regles_voie_sql(connexion, code_insee, libelles):
+    condition, parametres = "type_et_libelle IS NULL", [int(code_insee)]
+    if libelles is not None:
+        condition = "type_et_libelle IN (SELECT UNNEST(?))"
+        parametres.append(list(libelles))
+    regles = connexion.execute(f"""
+        SELECT * FROM carte WHERE code_insee = ? AND {condition} ORDER BY ligne
+    """, parametres).df()
+    return regles.set_index('ligne').rename_axis(None)
+
+REQUETES = {
+    'chiffres_cles': (chiffres_cles_pandas, chiffres_cles_sql),
+    'etablissements_par_departement': (etablissements_par_departement_pandas, etablissements_par_departement_sql),
+    'villes_avec_voies': (villes_avec_voies_pandas, villes_avec_voies_sql),
+    'regles_voie': (regles_voie_pandas, regles_voie_sql),
+}
+
+def executer(nom, source, *args, moteur=MOTEUR):
+    """Exécute la requête nom : source est le DataFrame (pandas) ou la connexion (duckdb)"""
+    pandas_, sql = REQUETES[nom]
+    if moteur == 'duckdb':
+        # Un curseur par appel : la connexion est partagée par les sessions
+        with source.cursor() as curseur:
+            return sql(curseur, *args)
+    return pandas_(source, *args)
+
+def _identiques(a, b):
+    if isinstance(a, dict):
+        return a == b
+    a, b = a.reset_index(drop=True), b.reset_index(drop=True)
+    colonnes = [c for c in a.columns if c in b.columns]
+    return len(a) == len(b) and all(
+        a[c].astype(object).where(a[c].notna(), None).tolist() == b[c].astype(object).where(b[c].notna(), None).tolist()
+        for c in colonnes
+    )
+
+def repliquer(carte, lignes):
+    """
+    Carte répliquée jusqu'à lignes lignes, simulation de l'échelle nationale : chaque copie a
+    ses propres communes et établissements, et les copies sont réparties sur environ
+    DEPARTEMENTS_NATIONAUX départements (départements décalés). Comme les codes INSEE réels,
+    les codes d'un département restent dans une plage étroite, propre au département
+    """
+    echelle = -(-lignes // len(carte))
+    if echelle <= 1:
+        return carte
+    copie = np.repeat(np.arange(echelle), len(carte))
+    groupes = -(-DEPARTEMENTS_NATIONAUX // carte['libelle_departement_eleve'].nunique())
+    par_departement = -(-echelle // groupes)
+    suffixes = np.array([""] + [f" {i}" for i in range(1, echelle)], dtype=object)
+    suffixes_rne = np.array([""] + [f"-{i}" for i in range(1, echelle)], dtype=object)
+    df = carte.iloc[np.tile(np.arange(len(carte)), echelle)].reset_index(drop=True)
+    return df.assign(
+        libelle_departement_eleve=df['libelle_departement_eleve'].astype(str) + suffixes[copie % groupes],
+        com_name_upper=df['com_name_upper'].astype(str) + suffixes[copie],
+        code_rne=df['code_rne'].astype(str) + suffixes_rne[copie],
+        code_insee=(df['code_insee'] + 100_000 * (copie % groupes)) * par_departement + copie // groupes,
+    ).astype({
+        'libelle_departement_eleve': 'category', 'com_name_upper': 'category', 'code_rne': 'category', 'code_insee': 'Int32',
+    })
+
+def groupes_lus(chemin, profil, colonne, valeurs):
+    """
+    (groupes lus, groupes du fichier) pour une requête sur chemin, d'après son profil DuckDB
+    (JSON, comme EXPLAIN ANALYZE, qui ne compte pas les groupes) : si un filtre sur colonne est
+    poussé dans la lecture du Parquet, seuls les groupes dont les statistiques min / max
+    peuvent contenir une des valeurs sont lus, sinon tous
+    """
+    import json
+
+    import pyarrow.parquet as pq
+
+    def filtres(noeud):
+        infos = noeud.get('extra_info', {})
+        if noeud.get('operator_name') == 'READ_PARQUET':
+            yield f"{infos.get('Filters', '')} {infos.get('Dynamic Filters', '')}"
+        for enfant in noeud.get('children', []):
+            yield from filtres(enfant)
+
+    metadonnees = pq.ParquetFile(chemin).metadata
+    total = metadonnees.num_row_groups
+    if not any(colonne in filtre for filtre in filtres(json.loads(profil))):
+        return total, total
+    indice = metadonnees.schema.names.index(colonne)
+    lus = 0
+    for i in range(total):
+        statistiques = metadonnees.row_group(i).column(indice).statistics
+        lus += statistiques is None or not statistiques.has_min_max or any(
+            statistiques.min <= valeur <= statistiques.max for valeur in valeurs
+        )
+    return lus, total
+
+def _mesurer(fonction, repetitions):
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        resultat = fonction()
+        durees.append(time.perf_counter() - debut)
+    return resultat, float(np.median(durees)) * 1000
+
+def main():
+    import tempfile
+
+    from utils.data import construire_snapshot_carte_scolaire
+    from utils.snapshot import dossier_version, lire_snapshot, version_courante
+
+    parser = argparse.ArgumentParser(description="Comparaison des moteurs de requêtes (pandas, DuckDB sur Parquet)")
+    parser.add_argument('--lignes', type=int, nargs='+', default=[1_000_000],
+                        help="Tailles de la carte répliquée, en lignes (échelle nationale) ; la région est toujours mesurée")
+    parser.add_argument('--repetitions', type=int, default=5)
+    args = parser.parse_args()
+
+    version = version_courante()
+    if version is None:
+        construire_snapshot_carte_scolaire()
+    carte = lire_snapshot('carte_scolaire', columns=COLONNES_PARQUET, dossier=dossier_version(version))
+    for lignes in [len(carte)] + args.lignes:
+        df = repliquer(carte, lignes)
+        with tempfile.TemporaryDirectory() as dossier:
+            debut = time.perf_counter()
+            chemin = ecrire_parquet(df, os.path.join(dossier, FICHIER_PARQUET))
+            connexion = connecter(chemin)
+            print(f"{len(df):,} lignes, {df['libelle_departement_eleve'].nunique()} départements, "
+                  f"Parquet écrit en {time.perf_counter() - debut:.2f} s")
+            departements = sorted(df['libelle_departement_eleve'].unique())
+            rue = df[df['type_et_libelle'].notna()].iloc[len(df) // 2]
+            # Requête : (paramètres, colonne et valeurs du filtre, pour compter les groupes lus)
+            cas = {
+                'chiffres_cles': ((departements, 'Tous'), 'libelle_departement_eleve', departements),
+                'etablissements_par_departement': ((departements[:3], 'COLLEGE'), 'libelle_departement_eleve', departements[:3]),
+                'villes_avec_voies': ((departements, 'LYCEE'), 'libelle_departement_eleve', departements),
+                'regles_voie': ((int(rue['code_insee']), [rue['type_et_libelle']]), 'code_insee', [int(rue['code_insee'])]),
+            }
+            for nom, (parametres, colonne, valeurs) in cas.items():
+                attendu, ms_pandas = _mesurer(lambda: executer(nom, df, *parametres, moteur='pandas'), args.repetitions)
+                obtenu, ms_sql = _mesurer(lambda: executer(nom, connexion, *parametres, moteur='duckdb'), args.repetitions)
+                # Profil d'une exécution supplémentaire, hors mesure, sur la connexion elle-même (le
+                # profilage n'est pas hérité par les curseurs) : dernière requête de l'implémentation SQL
+                connexion.execute("PRAGMA enable_profiling='no_output'")
+                REQUETES[nom][1](connexion, *parametres)
+                profil = connexion.get_profiling_information(format='json')
+                connexion.execute("PRAGMA disable_profiling")
+                lus, total = groupes_lus(chemin, profil, colonne, valeurs)
+                print(f"  {nom:32s} pandas {ms_pandas:8.2f} ms   duckdb {ms_sql:8.2f} ms   "
+                      f"groupes lus {lus}/{total} ({total - lus} ignorés)   "
+                      f"{'identiques' if _identiques(attendu, obtenu) else 'DIFFÉRENTS'}")
+            connexion.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Table de synthèse par établissement (une ligne par code_rne), calculée une fois par
+version : la page de classement la trie et la filtre sans relire les règles.
+
+- secteur (carte scolaire) : nombre de communes, de voies et de départements de
+  résidence desservis, nombre de règles et part des règles hors région ;
+- annuaire : nom, commune, département, effectif (Nombre_d_eleves), éducation
+  prioritaire et caractéristiques (restauration, internat, sections...) ;
+- ips_etablissement de l'export brut, si la version le contient.
+"""
+import pandas as pd
+
+# Caractéristiques de l'annuaire (0 / 1) -> libellé
+CARACTERISTIQUES = {
+    'Restauration': "Restauration",
+    'Hebergement': "Internat",
+    'ULIS': "ULIS",
+    'Apprentissage': "Apprentissage",
+    'Segpa': "SEGPA",
+    'Section_arts': "Section arts",
+    'Section_cinema': "Section cinéma",
+    'Section_theatre': "Section théâtre",
+    'Section_sport': "Section sport",
+    'Section_internationale': "Section internationale",
+    'Section_europeenne': "Section européenne",
+    'Lycee_Agricole': "Lycée agricole",
+    'Lycee_militaire': "Lycée militaire",
+    'Lycee_des_metiers': "Lycée des métiers",
+    'Post_BAC': "Post-bac",
+}
+COLONNES_CARTE_RESUME = ['code_rne', 'type_etablissement', 'libelle_region', 'libelle_departement_eleve', 'code_insee', 'type_et_libelle']
+COLONNES_ANNUAIRE_RESUME = [
+    'Identifiant_de_l_etablissement', 'Nom_etablissement', 'Nom_commune', 'Libelle_departement',
+    'Nombre_d_eleves', 'Appartenance_Education_Prioritaire',
+] + list(CARACTERISTIQUES)
+# Indicateurs proposés au tri par la page de classement
+INDICATEURS_RESUME = {
+    'nb_communes': "Communes desservies",
+    'nb_voies': "Voies desservies",
+    'nb_departements': "Départements desservis",
+    'part_hors_region': "Part des règles hors région",
+    'nombre_d_eleves': "Effectif",
+    'ips_etablissement': "IPS",
+}
+
+def construire_resume(carte, annuaire, ips=None):
+    """
+    carte : COLONNES_CARTE_RESUME ; annuaire : COLONNES_ANNUAIRE_RESUME (caractéristiques absentes tolérées) ;
+    ips : Series code_rne -> ips_etablissement. Renvoie la table triée par code_rne.
+    """
+    carte = carte[carte['code_rne'].notna()]
+    groupes = carte.assign(
+        code_rne=carte['code_rne'].astype(str),
+        type_etablissement=carte['type_etablissement'].astype(str),
+        hors_region=carte['libelle_region'] == 'HORS REGION',
+    ).groupby('code_rne', sort=True, observed=True)
+    resume = groupes.agg(
+        type_etablissement=('type_etablissement', 'first'),
+        nb_communes=('code_insee', 'nunique'),
+        nb_voies=('type_et_libelle', 'nunique'),
+        nb_departements=('libelle_departement_eleve', 'nunique'),
+        nb_regles=('hors_region', 'size'),
+        part_hors_region=('hors_region', 'mean'),
+    )
+
+    annuaire = annuaire.drop_duplicates('Identifiant_de_l_etablissement').set_index('Identifiant_de_l_etablissement').reindex(resume.index)
+    caracteristiques = [colonne for colonne in CARACTERISTIQUES if colonne in annuaire.columns]
+    resume = resume.assign(
+        nom_etablissement=annuaire['Nom_etablissement'].astype(object),
+        nom_commune=annuaire['Nom_commune'].astype(object),
+        libelle_departement=annuaire['Libelle_departement'].astype(object),
+        nombre_d_eleves=pd.to_numeric(annuaire['Nombre_d_eleves'], errors='coerce'),
+        education_prioritaire=annuaire['Appartenance_Education_Prioritaire'].astype(object),
+        ips_etablissement=ips.reindex(resume.index) if ips is not None else float('nan'),
+        **{colonne.lower(): pd.to_numeric(annuaire[colonne], errors='coerce').fillna(0).astype(bool) for colonne in caracteristiques},
+    )
+    return resume.reset_index().astype({
+        'type_etablissement': 'category',
+        'nb_communes': 'int32', 'nb_voies': 'int32', 'nb_departements': 'int16', 'nb_regles': 'int32',
+        'part_hors_region': 'float32', 'nombre_d_eleves': 'Int32', 'ips_etablissement': 'float32',
+        'libelle_departement': 'category', 'education_prioritaire': 'category',
+    })
@@ -0,0 +1,84 @@
+"""
+Schéma compact des jeux de données préparés.
+
+- chaînes à faible cardinalité -> category (stockées en dictionnaire dans l'instantané Arrow)
+- numéros de voie et codes -> entiers nullables étroits (Int16 / Int32)
+- coordonnées -> float32 (précision ~1 m, largement suffisante pour l'affichage)
+
+Chaque page déclare la liste des colonnes dont elle a besoin : seules ces
+colonnes sont lues dans l'instantané (projection).
+"""
+import pandas as pd
+
+SCHEMA_CARTE_SCOLAIRE = {
+    'code_region': 'Int16',
+    'libelle_region': 'category',
+    'code_academie': 'Int16',
+    'libelle_academie': 'category',
+    'code_departement': 'category',
+    'libelle_departement_eleve': 'category',
+    'code_postal': 'Int32',
+    'code_insee': 'Int32',
+    'com_name_upper': 'category',
+    'type_et_libelle': 'category',
+    'no_de_voie_debut': 'Int32',
+    'no_de_voie_fin': 'Int32',
+    'parite': 'category',
+    'code_rne': 'category',
+    'type_etablissement': 'category',
+    'numero_voie_et_cote': 'category',
+    'ville_recherche': 'category',
+}
+
+SCHEMA_ANNUAIRE = {
+    'Type_etablissement': 'category',
+    'Statut_public_prive': 'category',
+    'Code_postal': 'Int32',
+    'Code_commune': 'Int32',
+    'Nom_commune': 'category',
+    'Code_departement': 'category',
+    'Code_academie': 'Int16',
+    'Code_region': 'Int16',
+    'Nombre_d_eleves': 'Int32',
+    'Libelle_departement': 'category',
+    'Libelle_academie': 'category',
+    'Libelle_region': 'category',
+    'latitude': 'float32',
+    'longitude': 'float32',
+    'etat': 'category',
+    'libelle_nature': 'category',
+}
+
+# Colonnes lues par chaque page (projection sur l'instantané)
+COLONNES_SEARCH = [
+    'code_insee', 'code_postal', 'com_name_upper', 'ville_recherche',
+    'type_et_libelle', 'no_de_voie_debut', 'no_de_voie_fin',
+    'parite', 'code_rne', 'type_etablissement',
+]
+COLONNES_STATS = [
+    'libelle_region', 'libelle_departement_eleve', 'com_name_upper',
+    'type_et_libelle', 'code_rne', 'type_etablissement',
+]
+COLONNES_ANNUAIRE_PERIMETRE = [
+    'Identifiant_de_l_etablissement', 'Nom_etablissement', 'Adresse_1',
+    'latitude', 'longitude', 'etab_recherche',
+]
+COLONNES_ANNUAIRE_PROXIMITE = [
+    'Identifiant_de_l_etablissement', 'Nom_etablissement', 'Type_etablissement', 'Adresse_1',
+    'Code_postal', 'Nom_commune', 'latitude', 'longitude',
+]
+
+def appliquer_schema(df, schema):
+    """Convertit les colonnes présentes dans df vers les types compacts du schéma"""
+    types = {colonne: type_ for colonne, type_ in schema.items() if colonne in df.columns}
+    for colonne, type_ in types.items():
+        if type_.startswith('Int'):
+            # Les codes lus en float (à cause des NaN) sont d'abord arrondis proprement
+            df[colonne] = pd.to_numeric(df[colonne], errors='coerce').round().astype(type_)
+        else:
+            df[colonne] = df[colonne].astype(type_)
+    return df
+
+def memoire(df):
+    """Mémoire occupée par le DataFrame, en Mo"""
+    return df.memory_usage(deep=True).sum() / 1e6
@@ -0,0 +1,132 @@
+"""
+Instantanés Arrow (Feather v2 non compressé) des jeux de données préparés.
+
+Les fichiers sont écrits une seule fois (un seul bloc d'enregistrements par
+table) puis ouverts en mémoire partagée (memory map, lecture seule) par chaque
+processus Streamlit. Les valeurs des entiers (nullables ou non), les codes des
+colonnes category et les flottants sans valeur manquante sont des vues sur le cache
+de pages du système, partagé par les processus. Sont recopiés dans chaque processus :
+les masques des entiers nullables, les codes des category qui ont des valeurs
+manquantes, les flottants avec NaN et les colonnes de chaînes (object).
+Sur une carte scolaire de 1 million de lignes (32 Mo), la part propre à chaque
+processus passe ainsi d'environ 32 Mo (tout recopié par to_pandas) à environ 13 Mo.
+
+Si une version produite par le pipeline d'ingestion (python -m pipeline.ingestion)
+est active, les instantanés sont lus dans datasets/versions/<version>/ ; sinon
+ils sont construits à la demande dans datasets/snapshot/ à partir du CSV nettoyé
+(version None).
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+DOSSIER_SNAPSHOT = 'datasets/snapshot'
+DOSSIER_VERSIONS = 'datasets/versions'
+FICHIER_VERSION_COURANTE = os.path.join(DOSSIER_VERSIONS, 'COURANTE')
+
+def version_courante():
+    """Nom de la version active du pipeline d'ingestion, ou None"""
+    try:
+        with open(FICHIER_VERSION_COURANTE, encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def definir_version_courante(version):
+    """Active une version (écriture atomique du pointeur COURANTE)"""
+    os.makedirs(DOSSIER_VERSIONS, exist_ok=True)
+    chemin_tmp = f"{FICHIER_VERSION_COURANTE}.{os.getpid()}.tmp"
+    with open(chemin_tmp, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(chemin_tmp, FICHIER_VERSION_COURANTE)
+
+def dossier_version(version):
+    """Dossier des artefacts d'une version (None : instantanés construits depuis le CSV nettoyé)"""
+    return os.path.join(DOSSIER_VERSIONS, version) if version else DOSSIER_SNAPSHOT
+
+def lister_versions():
+    """Versions produites par le pipeline (dossiers avec manifest.json), de la plus ancienne à la plus récente"""
+    if not os.path.isdir(DOSSIER_VERSIONS):
+        return []
+    return sorted(
+        nom for nom in os.listdir(DOSSIER_VERSIONS)
+        if os.path.exists(os.path.join(DOSSIER_VERSIONS, nom, 'manifest.json'))
+    )
+
+def dossier_courant():
+    return dossier_version(version_courante())
+
+def chemin_snapshot(nom, dossier=None):
+    return os.path.join(dossier or dossier_courant(), f"{nom}.arrow")
+
+def snapshot_a_jour(nom, sources, dossier=DOSSIER_SNAPSHOT):
+    """Vrai si l'instantané existe et est plus récent que tous ses fichiers sources"""
+    chemin = chemin_snapshot(nom, dossier)
+    if not os.path.exists(chemin):
+        return False
+    date_snapshot = os.path.getmtime(chemin)
+    return all(not os.path.exists(source) or os.path.getmtime(source) <= date_snapshot for source in sources)
+
+def ecrire_snapshot(df, nom, dossier=None):
+    """
+    Écrit le DataFrame au format Arrow IPC non compressé (condition pour le memory map).
+    L'écriture passe par un fichier temporaire renommé à la fin, pour que les autres
+    processus ne lisent jamais un fichier à moitié écrit.
+    """
+    dossier = dossier or dossier_courant()
+    os.makedirs(dossier, exist_ok=True)
+    chemin = chemin_snapshot(nom, dossier)
+    chemin_tmp = f"{chemin}.{os.getpid()}.tmp"
+    # Un seul bloc : chaque colonne est un tampon contigu, lisible en vue par lire_snapshot
+    feather.write_feather(df.reset_index(drop=True), chemin_tmp, compression='uncompressed', chunksize=max(len(df), 1))
+    os.replace(chemin_tmp, chemin)
+    return chemin
+
+def _tampon(tableau):
+    """Vue NumPy (lecture seule) sur le tampon de valeurs d'un tableau Arrow"""
+    type_ = tableau.type.to_pandas_dtype()
+    return np.frombuffer(tableau.buffers()[1], dtype=type_, count=len(tableau) + tableau.offset)[tableau.offset:]
+
+def _vue_partagee(colonne, type_pandas):
+    """
+    Entier nullable ou category construit sur les tampons du memory map, ou None si la
+    colonne est laissée à to_pandas (autres types, instantané écrit en plusieurs blocs).
+    to_pandas recopie ces deux types : le masque (entiers) et les codes -1 des valeurs
+    manquantes (category) sont les seules parties propres au processus.
+    """
+    if colonne.num_chunks != 1 or not len(colonne):
+        return None
+    tableau = colonne.chunk(0)
+    if type_pandas.startswith('Int') and pa.types.is_integer(tableau.type):
+        return pd.arrays.IntegerArray(_tampon(tableau), tableau.is_null().to_numpy(zero_copy_only=False))
+    if pa.types.is_dictionary(tableau.type):
+        codes = _tampon(tableau.indices)
+        if tableau.null_count:
+            codes = np.where(tableau.is_null().to_numpy(zero_copy_only=False), -1, codes).astype(codes.dtype)
+        categories = pd.Index(tableau.dictionary.to_pandas())
+        return pd.Categorical.from_codes(codes, categories, ordered=tableau.type.ordered, validate=False)
+    return None
+
+def lire_snapshot(nom, columns=None, dossier=None):
+    """
+    Ouvre l'instantané en memory map et le convertit en DataFrame sans recopier les
+    colonnes qui peuvent ne pas l'être : entiers nullables et category sont construits
+    sur les tampons (_vue_partagee), les autres colonnes passent par to_pandas
+    (split_blocks évite la consolidation en blocs, donc la copie des numériques).
+    """
+    table = feather.read_table(chemin_snapshot(nom, dossier), columns=columns, memory_map=True)
+    types = {c['name']: c['numpy_type'] for c in (table.schema.pandas_metadata or {}).get('columns', [])}
+    vues = {}
+    for nom_colonne in table.column_names:
+        vue = _vue_partagee(table.column(nom_colonne), types.get(nom_colonne, ''))
+        if vue is not None:
+            vues[nom_colonne] = vue
+    autres = table.drop_columns(list(vues)).to_pandas(split_blocks=True)
+    # Constructeur sans copie ni consolidation (insert et l'affectation de colonne recopient les entiers nullables)
+    return pd.DataFrame(
+        {nom_colonne: vues[nom_colonne] if nom_colonne in vues else autres[nom_colonne] for nom_colonne in table.column_names},
+        index=autres.index, copy=False,
+    )
@@ -0,0 +1,77 @@
+"""
+Index spatial des établissements de l'annuaire (plus proches voisins, rayon).
+
+Les positions (latitude, longitude) sont projetées sur la sphère unité (x, y, z) et
+indexées dans un cKDTree (scipy). La distance euclidienne entre deux points de la
+sphère (corde) croît avec la distance orthodromique : les k plus proches voisins et
+les requêtes « à moins de R km » sont donc exacts, après conversion corde <-> km.
+
+Un arbre est construit par type d'établissement (Collège, Lycée) et un pour
+l'ensemble : le filtre par type ne coûte rien à la requête. Toutes les requêtes
+acceptent un point ou des tableaux de points (requêtes groupées).
+"""
+import numpy as np
+from scipy.spatial import cKDTree
+
+from utils.distances import RAYON_TERRE_KM
+
+def vers_xyz(latitude, longitude):
+    """Coordonnées (n, 3) sur la sphère unité"""
+    lat = np.radians(np.asarray(latitude, dtype='float64'))
+    lon = np.radians(np.asarray(longitude, dtype='float64'))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+def corde_depuis_km(distance_km):
+    return 2 * np.sin(np.asarray(distance_km) / (2 * RAYON_TERRE_KM))
+
+def km_depuis_corde(corde):
+    return 2 * RAYON_TERRE_KM * np.arcsin(np.clip(np.asarray(corde) / 2, 0, 1))
+
+def construire_index_spatial(annuaire):
+    """
+    Index spatial de l'annuaire filtré. Renvoie un dictionnaire type -> (arbre, positions),
+    positions étant les numéros de ligne de l'annuaire ; la clé None indexe tous les types.
+    """
+    valides = annuaire['latitude'].notna().to_numpy() & annuaire['longitude'].notna().to_numpy()
+    types = annuaire['Type_etablissement'].astype(str).to_numpy()
+    xyz = vers_xyz(annuaire['latitude'].to_numpy(dtype='float64', na_value=np.nan),
+                   annuaire['longitude'].to_numpy(dtype='float64', na_value=np.nan))
+    index = {}
+    for type_etablissement in [None] + sorted(set(types[valides])):
+        selection = valides if type_etablissement is None else valides & (types == type_etablissement)
+        positions = np.flatnonzero(selection)
+        index[type_etablissement] = (cKDTree(xyz[positions]), positions)
+    return index
+
+def plus_proches(index, latitude, longitude, k=1, type_etablissement=None):
+    """
+    k établissements les plus proches de chaque point.
+    Renvoie (distances_km, positions) de forme (n, k) ; pour un point seul, de forme (k,).
+    Les positions manquantes (moins de k établissements) valent -1.
+    """
+    arbre, positions = index[type_etablissement]
+    # k sous forme de liste : la dimension des voisins est conservée même pour k=1
+    cordes, voisins = arbre.query(vers_xyz(latitude, longitude), k=list(range(1, k + 1)))
+    trouves = voisins < len(positions)
+    lignes = np.where(trouves, positions[np.where(trouves, voisins, 0)], -1)
+    return np.where(trouves, km_depuis_corde(np.where(trouves, cordes, 0)), np.inf), lignes
+
+def dans_rayon(index, latitude, longitude, rayon_km, type_etablissement=None):
+    """
+    Établissements à moins de rayon_km d'un point, triés par distance : (distances_km, positions).
+    Pour des tableaux de points, renvoie une liste de couples (un par point).
+    """
+    arbre, positions = index[type_etablissement]
+    xyz = vers_xyz(latitude, longitude)
+    voisins = arbre.query_ball_point(xyz, r=float(corde_depuis_km(rayon_km)))
+
+    def trier(point, trouves):
+        trouves = np.asarray(trouves, dtype='int64')
+        distances = km_depuis_corde(np.linalg.norm(arbre.data[trouves] - point, axis=1)) if len(trouves) else np.empty(0)
+        ordre = np.argsort(distances, kind='stable')
+        return distances[ordre], positions[trouves[ordre]]
+
+    if xyz.ndim == 1:
+        return trier(xyz, voisins)
+    return [trier(point, trouves) for point, trouves in zip(xyz, voisins)]
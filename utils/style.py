@@ -0,0 +1,113 @@
+import streamlit as st
+
+def appliquer_style():
+    """Injecte la feuille de style commune à toutes les pages"""
+    st.markdown("""
+        <style>    
+        /* Style gris */
+        p, h1, h2, h3, ul, li .contact-item, .etablissement-info, .main h1, .main h2, .main h3, .main h4, .main p, .main label, .main div {
+            color: #4F4F4F !important;
+        }
+                
+        button div p {
+                color: white !important;
+        }
+
+        /* Style des cartes établissements */
+        .result-card {
+            background-color: white;
+            padding: 2rem;
+            border-radius: 15px;
+            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+            margin-bottom: 2rem;
+            border: 1px solid #e0e0e0;
+        }
+        
+        /* Style des badges caractéristiques */
+        .badge-container {
+            display: flex;
+            flex-wrap: wrap;
+            gap: 10px;
+            margin-top: 1rem;
+            justify-content: flex-start;
+        }
+                
+        [data-testid="stSidebarNav"] {
+            visibility: hidden;
+            display:none;
+        }
+        
+        .badge {
+            color: #4F4F4F;
+            flex: 0 0 auto;
+            background-color: #f8f9fa;
+            padding: 0.5rem 1rem;
+            border-radius: 20px;
+            border: 1px solid #dee2e6;
+            font-size: 0.9rem;
+            transition: all 0.2s ease;
+            white-space: nowrap;
+        }
+        
+        .badge:hover {
+            transform: translateY(-2px);
+            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+            background-color: #e9ecef;
+        }
+        
+        /* Style des informations de contact */
+        .contact-info {
+            display: flex;
+            flex-wrap: wrap;
+            gap: 1rem;
+            margin: 1rem 0;
+            background-color: #f8f9fa;
+            padding: 1rem;
+            border-radius: 10px;
+        }
+        
+        .contact-item {
+            display: flex;
+            align-items: center;
+            gap: 0.5rem;
+            padding: 0.5rem;
+        }
+        
+        .contact-item a {
+            color: #0066cc;
+            text-decoration: none;
+        }
+        
+        .contact-item a:hover {
+            text-decoration: underline;
+            color: #004494;
+        }
+        
+        /* Style des infos établissement */
+        .etablissement-info {
+            margin-top: 1rem;
+            background-color: #f8f9fa;
+            padding: 1rem;
+            border-radius: 10px;
+        }
+
+        /* Ajustements supplémentaires */
+        .stApp {
+            background-color: white;
+            color: #4F4F4F !important;
+        }
+
+        .stSidebar {
+            background-color: #262730;
+        }
+
+        .stSelectbox {
+            color: white !important;
+        }
+        
+        /* Style pour les messages d'info et warning */
+        .stAlert > div {
+            color: #4F4F4F !important;
+        }
+        </style>
+    """, unsafe_allow_html=True)